@@ -7,11 +7,89 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Database Configuration
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derivada de DATABASE_URL se vazia
+
+    # Pool de conexões (por engine e por processo)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
 
     # Stellar Configuration
     STELLAR_NETWORK: str = "testnet"
     STELLAR_HORIZON_URL: str = "https://horizon-testnet.stellar.org"
 
+    # Consultas em lote ao Horizon
+    HORIZON_BULK_CONCURRENCY: int = 10
+    HORIZON_REQUEST_TIMEOUT: float = 10.0
+
+    # Cliente HTTP compartilhado pelas chamadas ao Horizon e ao friendbot
+    HTTP_HTTP2: bool = True  # Requer o pacote h2 (httpx[http2])
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 11.0
+    HTTP_POST_TIMEOUT: float = 33.0
+    HTTP_STREAM_READ_TIMEOUT: float = 60.0  # Sem eventos por esse tempo, reconecta
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Cache de contas do Horizon (segundos)
+    ACCOUNT_CACHE_MAXSIZE: int = 10000
+    ACCOUNT_CACHE_TTL: float = 30.0
+    ACCOUNT_CACHE_STALE_TTL: float = 300.0
+
+    # Emissão de certificações em lote (máx. 100 operações por transação)
+    ISSUANCE_BATCH_MAX_OPERATIONS: int = 100
+    ISSUANCE_BATCH_MAX_WAIT: float = 0.5
+
+    # Contas de canal para envio paralelo (chaves secretas separadas por vírgula)
+    CHANNEL_SECRET_KEYS: str = ""
+    # Empréstimos não devolvidos (ex.: processo encerrado) expiram após esse
+    # tempo; os em uso são renovados durante o envio
+    CHANNEL_LEASE_TIMEOUT: float = 60.0
+    CHANNEL_LEASE_POLL_INTERVAL: float = 0.1
+
+    # Provisionamento assíncrono de carteiras: workers no processo dedicado
+    # (python -m app.workers.wallet_jobs) e, opcionalmente, no próprio processo
+    # da API. Sem um dos dois os cadastros ficam com a carteira pendente.
+    WALLET_JOB_PROCESS_WORKERS: int = 4
+    WALLET_JOB_WORKERS: int = 0
+    WALLET_JOB_MAX_ATTEMPTS: int = 5
+    WALLET_JOB_POLL_INTERVAL: float = 2.0
+
+    # Estoque de carteiras pré-provisionadas (financiadas e com trustlines)
+    WALLET_POOL_SIZE: int = 20
+    WALLET_POOL_REFILL_CONCURRENCY: int = 5
+    WALLET_POOL_CHECK_INTERVAL: float = 10.0
+
+    # Chave Fernet para criptografar as chaves secretas guardadas no banco
+    WALLET_ENCRYPTION_KEY: str = ""
+
+    # Hashing de senhas (custo do bcrypt e threads dedicadas por processo)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Cache de usuários autenticados (por processo; segundos)
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+
+    # Fila de trabalho dos auditores (certificações em análise por auditor e
+    # segundos até uma atribuição sem resposta voltar para a fila)
+    AUDITOR_MAX_ASSIGNED: int = 5
+    AUDITOR_ASSIGNMENT_TIMEOUT: float = 86400.0
+
+    # Expiração de certificações (intervalo da varredura em segundos e
+    # operações de clawback por transação, máx. 100)
+    CERTIFICATION_EXPIRY_SWEEP_INTERVAL: float = 3600.0
+    CERTIFICATION_REVOCATION_BATCH_SIZE: int = 100
+    # Clawbacks sem confirmação após esse tempo são verificados no Horizon
+    # (bem acima do timeout de 30s das transações)
+    CERTIFICATION_REVOCATION_TIMEOUT: float = 120.0
+
+    # Ingestão da blockchain (cursor inicial quando ainda não há um salvo)
+    INGESTION_START_CURSOR: str = "0"
+
     # Platform Issuer (sua conta que emitirá os tokens de certificação)
     ISSUER_SECRET_KEY: str = ""  # Configure com sua chave secreta
     ISSUER_PUBLIC_KEY: str = ""  # Configure com sua chave pública
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -6,12 +8,51 @@ from app.config import get_settings
 
 settings = get_settings()
 
-# Criar engine do SQLAlchemy
-engine = create_engine(settings.DATABASE_URL)
+# Drivers assíncronos usados para cada banco quando ASYNC_DATABASE_URL não é informada
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return settings.DATABASE_URL
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def _pool_options(database_url: str) -> dict:
+    """Configuração do pool de conexões (não se aplica ao SQLite em memória)"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Criar engine do SQLAlchemy (scripts e migrações)
+engine = create_engine(settings.DATABASE_URL, **_pool_options(settings.DATABASE_URL))
 
 # Criar sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine e sessões assíncronas usadas pelas rotas da API
+async_database_url = _async_database_url()
+async_engine = create_async_engine(
+    async_database_url, **_pool_options(async_database_url)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base para os modelos
 Base = declarative_base()
 
@@ -22,4 +63,31 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency para obter a sessão assíncrona do banco de dados
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _pool_metrics(pool) -> dict:
+    metrics = {"class": type(pool).__name__}
+    # Pools sem limite (ex.: SQLite em memória) não expõem esses contadores
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            metrics[name] = getattr(pool, name)()
+    if "size" in metrics and "checkedout" in metrics:
+        capacity = metrics["size"] + settings.DB_MAX_OVERFLOW
+        metrics["max_overflow"] = settings.DB_MAX_OVERFLOW
+        metrics["utilization"] = round(metrics["checkedout"] / capacity, 3)
+    return metrics
+
+
+def get_pool_metrics() -> dict:
+    """Uso atual dos pools de conexões (API assíncrona e workers síncronos)"""
+    return {
+        "async": _pool_metrics(async_engine.pool),
+        "sync": _pool_metrics(engine.pool),
+    }
@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.issuanceBatcher import CertificationIssuanceBatcher
+from app.services.stellarService import AsyncStellarService
+
+
+# Serviços compartilhados pelo processo, criados apenas no primeiro uso.
+# As rotas os recebem via Depends, e o lifespan da aplicação os encerra.
+@lru_cache()
+def get_stellar_service() -> AsyncStellarService:
+    return AsyncStellarService()
+
+
+@lru_cache()
+def get_chain_mirror() -> ChainMirrorService:
+    return ChainMirrorService(get_stellar_service())
+
+
+@lru_cache()
+def get_issuance_batcher() -> CertificationIssuanceBatcher:
+    return CertificationIssuanceBatcher(get_stellar_service())
+
+
+async def close_services():
+    """Fecha as conexões HTTP do serviço Stellar, se ele chegou a ser criado"""
+    if get_stellar_service.cache_info().currsize:
+        await get_stellar_service().close()
+    for dependency in (get_issuance_batcher, get_chain_mirror, get_stellar_service):
+        dependency.cache_clear()
@@ -1,20 +1,72 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
-from app.database import engine
-from app.models import database_models
-from app.routes import auditor, auth, certification, restaurant, user
+from app.database import async_engine, get_pool_metrics
+from app.dependencies import close_services, get_stellar_service
+from app.routes import auditor, auth, certification, jobs, restaurant, user
+from app.services.walletPoolService import WalletPoolReplenisher
+from app.services.walletProvisioningService import WalletProvisioningWorker
+from app.utils.security import check_wallet_encryption_key
 
-# Criar tabelas no banco de dados
-database_models.Base.metadata.create_all(bind=engine)
+# O schema do banco é gerenciado pelas migrações (alembic upgrade head)
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+async def start_wallet_workers():
+    """Inicia os workers de carteiras no processo da API (WALLET_JOB_WORKERS > 0)"""
+    try:
+        stellar_service = get_stellar_service()
+        wallet_pool = WalletPoolReplenisher(stellar_service)
+        await wallet_pool.start()
+        wallet_worker = WalletProvisioningWorker(stellar_service)
+        await wallet_worker.start()
+        return wallet_pool, wallet_worker
+    except Exception as e:
+        logger.error(f"Erro ao iniciar os workers de carteiras: {e}")
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sem a chave os cadastros não conseguem guardar as carteiras: falhar já
+    check_wallet_encryption_key()
+
+    # Por padrão os workers de carteiras rodam apenas no processo dedicado.
+    # Se habilitados aqui, são criados em segundo plano para não atrasar a
+    # inicialização com o serviço Stellar e as primeiras consultas ao banco.
+    wallet_startup = None
+    if settings.WALLET_JOB_WORKERS > 0:
+        wallet_startup = asyncio.create_task(start_wallet_workers())
+    else:
+        logger.info(
+            "Carteiras dos cadastros são provisionadas pelo worker dedicado: "
+            "python -m app.workers.wallet_jobs"
+        )
+
+    yield
+
+    if wallet_startup is not None:
+        started = await wallet_startup
+        if started is not None:
+            for service in started:
+                await service.stop()
+    # Fechar as sessões HTTP assíncronas abertas com o Horizon
+    await close_services()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="FoodTrust - Certificação Alimentar na Blockchain",
     description="Sistema descentralizado para certificação de estabelecimentos alimentares",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -33,6 +85,7 @@ app.include_router(
 app.include_router(auditor.router, prefix="/api/auditor", tags=["auditor"])
 app.include_router(user.router, prefix="/api/user", tags=["user"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 
 @app.get("/")
@@ -47,4 +100,10 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/db")
+async def database_pool_status():
+    """Uso dos pools de conexões com o banco"""
+    return {"status": "healthy", "pools": get_pool_metrics()}
\ No newline at end of file
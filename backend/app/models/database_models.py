@@ -1,9 +1,26 @@
 from datetime import datetime
 
 from app.database import Base
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    Numeric,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
+# Listas guardadas como JSONB no PostgreSQL (indexáveis com GIN) e JSON nos demais
+JSONList = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Restaurant(Base):
     __tablename__ = "restaurants"
@@ -12,10 +29,31 @@ class Restaurant(Base):
     name = Column(String(100), nullable=False)
     address = Column(String(200), nullable=False)
     stellar_public_key = Column(String(56), unique=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
 
     # Relacionamentos
     certifications = relationship("Certification", back_populates="restaurant")
+    active_certifications = relationship(
+        "RestaurantActiveCertification", back_populates="restaurant"
+    )
+
+    __table_args__ = (
+        # Paginação por cursor ordena por (created_at, id)
+        Index("ix_restaurants_created_at_id", "created_at", "id"),
+        # Filtros ILIKE e busca por similaridade (pg_trgm)
+        Index(
+            "ix_restaurants_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_restaurants_address_trgm",
+            "address",
+            postgresql_using="gin",
+            postgresql_ops={"address": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
 
 class Certification(Base):
@@ -24,12 +62,19 @@ class Certification(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
     certification_type = Column(String(20), nullable=False)
-    products = Column(Text, nullable=False)  # Lista de produtos em formato JSON
+    products = Column(JSONList, nullable=False)  # Lista de produtos
     status = Column(String(20), nullable=False)
     auditor_id = Column(Integer, ForeignKey("auditors.id"), nullable=True)
+    assigned_at = Column(DateTime, nullable=True)  # Atribuição pela fila de auditores
     issued_at = Column(DateTime, nullable=True)
     expires_at = Column(DateTime, nullable=True)
     transaction_hash = Column(String(64), nullable=True)
+    # Recuperação do token após a expiração; revoked_at sem revocation_hash
+    # indica que o token não pôde ser recuperado (ex.: trustline sem clawback).
+    # revocation_hash sem revoked_at: clawback enviado e ainda não confirmado
+    revoked_at = Column(DateTime, nullable=True)
+    revocation_hash = Column(String(64), nullable=True)
+    revocation_started_at = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
 
@@ -37,6 +82,43 @@ class Certification(Base):
     restaurant = relationship("Restaurant", back_populates="certifications")
     auditor = relationship("Auditor", back_populates="certifications")
 
+    __table_args__ = (
+        Index(
+            "ix_certifications_status_type_created",
+            "status",
+            "certification_type",
+            "created_at",
+        ),
+        Index("ix_certifications_auditor_status", "auditor_id", "status"),
+        # Varredura de expiração: aprovadas vencidas e expiradas a revogar
+        Index("ix_certifications_status_expires", "status", "expires_at"),
+        Index("ix_certifications_restaurant_type", "restaurant_id", "certification_type"),
+        # Apenas uma solicitação pendente por restaurante e tipo
+        Index(
+            "uq_certifications_pending_restaurant_type",
+            "restaurant_id",
+            "certification_type",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        # Fila de auditores: pendentes ainda não atribuídas, lidas por ordem de chegada
+        Index(
+            "ix_certifications_unassigned_queue",
+            "created_at",
+            "certification_type",
+            postgresql_where=text("status = 'pending' AND auditor_id IS NULL"),
+            sqlite_where=text("status = 'pending' AND auditor_id IS NULL"),
+        ),
+        # Buscas por produto (operador @>) resolvidas pelo índice GIN
+        Index(
+            "ix_certifications_products_gin",
+            "products",
+            postgresql_using="gin",
+            postgresql_ops={"products": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 class Auditor(Base):
     __tablename__ = "auditors"
@@ -44,7 +126,7 @@ class Auditor(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False)
-    specializations = Column(Text, nullable=False)  # Lista em formato JSON
+    specializations = Column(JSONList, nullable=False)  # Lista de tipos de certificação
     stellar_public_key = Column(String(56), unique=True, nullable=False)
     is_active = Column(Boolean, default=True)
     certifications_issued = Column(Integer, default=0)
@@ -53,6 +135,16 @@ class Auditor(Base):
     # Relacionamentos
     certifications = relationship("Certification", back_populates="auditor")
 
+    __table_args__ = (
+        # Buscas por especialização (operador @>) resolvidas pelo índice GIN
+        Index(
+            "ix_auditors_specializations_gin",
+            "specializations",
+            postgresql_using="gin",
+            postgresql_ops={"specializations": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -62,4 +154,156 @@ class User(Base):
     email = Column(String(100), unique=True, nullable=False)
     password_hash = Column(String(128), nullable=False)
     stellar_public_key = Column(String(56), unique=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
\ No newline at end of file
+    # Incrementada ao trocar a senha, invalidando tokens emitidos antes
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Paginação por cursor ordena por (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Filtros ILIKE e busca por similaridade (pg_trgm)
+        Index(
+            "ix_users_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class RestaurantChainBalance(Base):
+    """Espelho local dos saldos de tokens de certificação de cada conta Stellar"""
+
+    __tablename__ = "restaurant_chain_balances"
+
+    stellar_public_key = Column(String(56), primary_key=True)
+    asset_code = Column(String(12), primary_key=True)
+    asset_issuer = Column(String(56), nullable=False)
+    balance = Column(Numeric(20, 7), nullable=False, default=0)
+    synced_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
+class RestaurantActiveCertification(Base):
+    """Conjunto de certificações ativas de cada restaurante, indexado por tipo"""
+
+    __tablename__ = "restaurant_active_certifications"
+
+    # Chave primária começando pelo tipo para filtrar restaurantes por certificação
+    certification_type = Column(String(20), primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    certification_id = Column(Integer, ForeignKey("certifications.id"), nullable=True)
+    activated_at = Column(DateTime, default=datetime.now)
+
+    # Relacionamentos
+    restaurant = relationship("Restaurant", back_populates="active_certifications")
+
+
+class IngestionCursor(Base):
+    """Último paging token processado por cada stream de ingestão do Horizon"""
+
+    __tablename__ = "ingestion_cursors"
+
+    name = Column(String(50), primary_key=True)
+    paging_token = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class CertificationTransaction(Base):
+    """Histórico local das operações de certificação ingeridas da blockchain"""
+
+    __tablename__ = "certification_transactions"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    # Nulo enquanto a operação emitida localmente não foi confirmada pela ingestão
+    paging_token = Column(String(64), unique=True, nullable=True)
+    transaction_hash = Column(String(64), nullable=False)
+    operation_type = Column(String(32), nullable=False)
+    source_account = Column(String(56), nullable=False)
+    stellar_public_key = Column(String(56), nullable=False)  # Conta do restaurante
+    asset_code = Column(String(12), nullable=False)
+    amount = Column(Numeric(20, 7), nullable=False)
+    memo = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_certification_transactions_account_created",
+            "stellar_public_key",
+            "created_at",
+        ),
+        # Uma linha por conta e asset em cada transação: a rota que emite e a
+        # ingestão registram a mesma operação sem contar o saldo duas vezes
+        Index(
+            "uq_certification_transactions_operation",
+            "transaction_hash",
+            "stellar_public_key",
+            "asset_code",
+            unique=True,
+        ),
+    )
+
+
+class ChannelAccount(Base):
+    """Contas de canal e seu empréstimo atual, compartilhado entre os processos"""
+
+    __tablename__ = "channel_accounts"
+
+    public_key = Column(String(56), primary_key=True)
+    # Identifica o empréstimo; nulo quando a conta está livre
+    lease_id = Column(String(36), nullable=True)
+    leased_until = Column(DateTime, nullable=True)
+
+
+class AccountSequence(Base):
+    """Último número de sequência alocado para contas que enviam transações"""
+
+    __tablename__ = "account_sequences"
+
+    account_id = Column(String(56), primary_key=True)
+    sequence = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class WalletJob(Base):
+    """Job de provisionamento de carteira (financiamento e trustlines)"""
+
+    __tablename__ = "wallet_jobs"
+
+    id = Column(String(36), primary_key=True)
+    entity_type = Column(String(20), nullable=False)  # restaurant, user ou auditor
+    entity_id = Column(Integer, nullable=True)
+    stellar_public_key = Column(String(56), nullable=False)
+    secret_key = Column(Text, nullable=True)  # Criptografada; removida ao terminar
+    status = Column(String(20), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    trustlines = Column(Text, nullable=True)  # Lista em formato JSON
+    error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index("ix_wallet_jobs_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class PooledWallet(Base):
+    """Carteira pré-provisionada aguardando ser atribuída em um cadastro"""
+
+    __tablename__ = "wallet_pool"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stellar_public_key = Column(String(56), unique=True, nullable=False)
+    encrypted_secret_key = Column(Text, nullable=True)  # Removida ao ser reivindicada
+    trustlines = Column(Text, nullable=True)  # Lista em formato JSON
+    status = Column(String(20), nullable=False)  # available ou claimed
+    created_at = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_wallet_pool_status_id", "status", "id"),)
@@ -1,8 +1,11 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Generic, Optional, TypeVar
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+
+DataT = TypeVar("DataT")
+ItemT = TypeVar("ItemT")
 
 
 class CertificationType(str, Enum):
@@ -17,6 +20,19 @@ class CertificationStatus(str, Enum):
     PENDING = "pending"
     APPROVED = "approved"
     REJECTED = "rejected"
+    EXPIRED = "expired"
+
+
+class WalletJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class PooledWalletStatus(str, Enum):
+    AVAILABLE = "available"
+    CLAIMED = "claimed"
 
 
 # Restaurant Models
@@ -25,13 +41,46 @@ class RestaurantCreate(BaseModel):
     address: str = Field(..., min_length=10, max_length=200)
 
 
-class Restaurant(BaseModel):
+class RestaurantSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     address: str
     stellar_public_key: str
     created_at: datetime
-    certifications: list[dict] = []
+
+
+class ChainCertification(BaseModel):
+    """Saldo de token de certificação espelhado da blockchain"""
+
+    asset_code: str
+    balance: str
+    issuer: str
+
+
+class Restaurant(RestaurantSummary):
+    certifications: list[ChainCertification] = []
+    certifications_synced_at: Optional[datetime] = None
+
+
+class CertificationHistoryEntry(BaseModel):
+    hash: str
+    created_at: datetime
+    memo: Optional[str] = None
+    source_account: str
+    operation_type: str
+    asset_code: str
+    amount: str
+
+
+class RestaurantDetail(Restaurant):
+    certification_history: list[CertificationHistoryEntry] = []
+
+
+class RestaurantSearchResults(BaseModel):
+    query: str
+    results: list[Restaurant]
 
 
 # Certification Models
@@ -43,20 +92,59 @@ class CertificationRequest(BaseModel):
     notes: Optional[str] = Field(None, max_length=500)
 
 
+class BulkCertificationRequest(BaseModel):
+    requests: list[CertificationRequest] = Field(..., min_length=1, max_length=500)
+
+
+class BulkCertificationItem(BaseModel):
+    """Resultado de uma solicitação do lote, na mesma posição do pedido"""
+
+    index: int
+    restaurant_id: int
+    certification_type: CertificationType
+    success: bool
+    certification_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkCertificationResults(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkCertificationItem]
+
+
 class Certification(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     restaurant_id: int
     certification_type: CertificationType
     products: list[str]
     status: CertificationStatus
-    auditor_id: Optional[str]
-    issued_at: Optional[datetime]
-    expires_at: Optional[datetime]
-    transaction_hash: Optional[str]
-    notes: Optional[str]
+    auditor_id: Optional[int] = None
+    issued_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    transaction_hash: Optional[str] = None
+    revoked_at: Optional[datetime] = None
+    revocation_hash: Optional[str] = None
+    notes: Optional[str] = None
     created_at: datetime
 
 
+class CertificationWithRestaurant(Certification):
+    restaurant: Optional[RestaurantSummary] = None
+
+
+class CertificationList(BaseModel):
+    certifications: list[CertificationWithRestaurant]
+
+
+class RestaurantCertifications(BaseModel):
+    restaurant_id: int
+    local_certifications: list[Certification]
+    blockchain_certifications: list[ChainCertification]
+
+
 # Auditor Models
 class AuditorCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
@@ -65,6 +153,8 @@ class AuditorCreate(BaseModel):
 
 
 class Auditor(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     email: str
@@ -75,6 +165,24 @@ class Auditor(BaseModel):
     created_at: datetime
 
 
+class AuditorSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    email: str
+    specializations: list[CertificationType]
+    is_active: bool
+
+
+class AuditorList(BaseModel):
+    auditors: list[Auditor]
+
+
+class CertificationDetail(CertificationWithRestaurant):
+    auditor: Optional[AuditorSummary] = None
+
+
 class AuditDecision(BaseModel):
     certification_id: int
     approved: bool
@@ -101,6 +209,12 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 
+class CurrentUser(UserResponse):
+    """Usuário autenticado, resolvido a partir do token (pode vir do cache)"""
+
+    token_version: int = 0
+
+
 class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=100)
     email: Optional[str] = None
@@ -108,20 +222,30 @@ class UserUpdate(BaseModel):
 
 
 # Response Models
-class APIResponse(BaseModel):
+# Parametrizados com o modelo dos dados (ex.: APIResponse[RestaurantDetail]),
+# a resposta é validada e serializada direto para JSON pelo Pydantic
+class APIResponse(BaseModel, Generic[DataT]):
     success: bool
     message: str
-    data: Optional[dict] = None
+    data: Optional[DataT] = None
 
 
-class PaginatedResponse(BaseModel):
-    items: list[dict]
+class PaginatedResponse(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
     total: int
     page: int
     size: int
     pages: int
 
 
+class CursorPaginatedResponse(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
 # Search and Filter Models
 class RestaurantFilter(BaseModel):
     name: Optional[str] = None
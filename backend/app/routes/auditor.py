@@ -1,103 +1,120 @@
-import json
 import logging
 from datetime import datetime
+from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import database_models
-from app.models.schemas import APIResponse, AuditorCreate
-from app.services.stellarService import StellarService
-from fastapi import APIRouter, Depends, HTTPException
+from app.models.schemas import (
+    APIResponse,
+    Auditor,
+    AuditorCreate,
+    AuditorList,
+    CertificationType,
+    WalletJobStatus,
+)
+from app.services.auditorQueueService import AuditorWorkQueue
+from app.services.walletProvisioningService import (
+    assign_wallet,
+    notify_wallet_workers,
+    wallet_job_to_dict,
+)
+from app.utils.json_filters import json_array_contains
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-stellar_service = StellarService()
-
-
-@router.post("/register", response_model=APIResponse)
-async def register_auditor(auditor: AuditorCreate, db: Session = Depends(get_db)):
-    """Registra um novo auditor na plataforma"""
+work_queue = AuditorWorkQueue()
+
+
+@router.post(
+    "/register",
+    response_model=APIResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def register_auditor(
+    auditor: AuditorCreate, db: AsyncSession = Depends(get_async_db)
+):
+    """Registra um novo auditor; a carteira é provisionada em segundo plano"""
     try:
         logger.info("Receive request to create a new auditor")
-        stellar_wallet_info = stellar_service.create_new_wallet()
 
-        if not stellar_wallet_info["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to create Stellar wallet: {stellar_wallet_info.get('error', 'Erro desconhecido')}",
+        existing_email = await db.scalar(
+            select(database_models.Auditor).where(
+                database_models.Auditor.email == auditor.email
             )
-
-        stellar_public_key = stellar_wallet_info["public_key"]
-
-        existing_email = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.email == auditor.email)
-            .first()
         )
 
         if existing_email:
             raise HTTPException(status_code=400, detail="Email já cadastrado")
 
+        # Usar uma carteira do estoque ou agendar financiamento e trustlines
+        keypair, wallet_job = await assign_wallet(db, "auditor")
+
         new_auditor = database_models.Auditor(
             name=auditor.name,
             email=auditor.email,
-            specializations=json.dumps(
-                auditor.specializations
-            ),  # Converter lista para JSON
-            stellar_public_key=stellar_public_key,
+            specializations=auditor.specializations,
+            stellar_public_key=keypair.public_key,
             is_active=True,  # Por simplicidade, aprovamos automaticamente
             certifications_issued=0,
             created_at=datetime.now(),
         )
 
         db.add(new_auditor)
-        db.commit()
-        db.refresh(new_auditor)
+        await db.flush()
+        wallet_job.entity_id = new_auditor.id
+        wallet_ready = wallet_job.status == WalletJobStatus.SUCCEEDED
+        await db.commit()
+        await db.refresh(new_auditor)
+        notify_wallet_workers()
 
         return APIResponse(
             success=True,
-            message="Auditor registrado com sucesso",
-            data={"auditor_id": new_auditor.id},
+            message=(
+                "Auditor registrado com sucesso"
+                if wallet_ready
+                else "Auditor registrado; a carteira está sendo configurada"
+            ),
+            data={
+                "auditor_id": new_auditor.id,
+                "job": wallet_job_to_dict(wallet_job),
+            },
         )
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade de dados")
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao registrar auditor: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/list", response_model=APIResponse)
-async def list_auditors(db: Session = Depends(get_db)):
+@router.get("/list", response_model=APIResponse[AuditorList])
+async def list_auditors(
+    specialization: Optional[CertificationType] = Query(
+        None, description="Filtrar por especialização"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Lista todos os auditores ativos"""
     try:
         # Buscar auditores ativos
-        active_auditors_query = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.is_active == True)
-            .all()
+        query = select(database_models.Auditor).where(
+            database_models.Auditor.is_active == True
         )
-
-        # Converter para lista de dicionários
-        active_auditors = []
-        for auditor in active_auditors_query:
-            active_auditors.append(
-                {
-                    "id": auditor.id,
-                    "name": auditor.name,
-                    "email": auditor.email,
-                    "specializations": json.loads(auditor.specializations),
-                    "stellar_public_key": auditor.stellar_public_key,
-                    "is_active": auditor.is_active,
-                    "certifications_issued": auditor.certifications_issued,
-                    "created_at": auditor.created_at.isoformat(),
-                }
+        if specialization:
+            query = query.where(
+                json_array_contains(
+                    db, database_models.Auditor.specializations, specialization.value
+                )
             )
+        active_auditors = (await db.scalars(query)).all()
 
         return APIResponse(
             success=True,
@@ -110,109 +127,136 @@ async def list_auditors(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/{auditor_id}", response_model=APIResponse)
-async def get_auditor(auditor_id: int, db: Session = Depends(get_db)):
+@router.get("/{auditor_id}", response_model=APIResponse[Auditor])
+async def get_auditor(auditor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtém detalhes de um auditor específico"""
     try:
         # Buscar auditor
-        auditor = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.id == auditor_id)
-            .first()
+        auditor = await db.get(database_models.Auditor, auditor_id)
+
+        if not auditor:
+            raise HTTPException(status_code=404, detail="Auditor não encontrado")
+
+        return APIResponse(
+            success=True, message="Auditor encontrado", data=auditor
         )
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter auditor: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.post("/{auditor_id}/next", response_model=APIResponse)
+async def claim_next_certification(
+    auditor_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    """Atribui ao auditor a próxima certificação pendente da sua especialidade"""
+    try:
+        auditor = await db.get(database_models.Auditor, auditor_id)
+
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
 
-        # Converter para dicionário
-        auditor_dict = {
-            "id": auditor.id,
-            "name": auditor.name,
-            "email": auditor.email,
-            "specializations": json.loads(auditor.specializations),
-            "stellar_public_key": auditor.stellar_public_key,
-            "is_active": auditor.is_active,
-            "certifications_issued": auditor.certifications_issued,
-            "created_at": auditor.created_at.isoformat(),
-        }
+        if not auditor.is_active:
+            raise HTTPException(status_code=400, detail="Auditor não está ativo")
+
+        result = await work_queue.claim_next(db, auditor)
+        if not result["success"]:
+            raise HTTPException(status_code=409, detail=result["error"])
+
+        certification = result["certification"]
+        if certification is None:
+            return APIResponse(
+                success=True,
+                message="Nenhuma certificação pendente disponível",
+                data={"certification": None, "assigned_pending": result["load"]},
+            )
 
         return APIResponse(
-            success=True, message="Auditor encontrado", data=auditor_dict
+            success=True,
+            message="Certificação atribuída ao auditor",
+            data={
+                "certification": {
+                    "id": certification.id,
+                    "restaurant_id": certification.restaurant_id,
+                    "certification_type": certification.certification_type,
+                    "products": certification.products,
+                    "status": certification.status,
+                    "auditor_id": certification.auditor_id,
+                    "assigned_at": certification.assigned_at.isoformat(),
+                    "notes": certification.notes,
+                    "created_at": certification.created_at.isoformat(),
+                },
+                "assigned_pending": result["load"],
+            },
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao obter auditor: {e}")
+        await db.rollback()
+        logger.error(f"Erro ao atribuir certificação ao auditor: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.post("/{auditor_id}/deactivate", response_model=APIResponse)
-async def deactivate_auditor(auditor_id: int, db: Session = Depends(get_db)):
+async def deactivate_auditor(auditor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Desativa um auditor"""
     try:
         # Buscar auditor
-        auditor = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.id == auditor_id)
-            .first()
-        )
+        auditor = await db.get(database_models.Auditor, auditor_id)
 
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
 
-        # Desativar auditor
+        # Desativar auditor e redistribuir as certificações em análise
         auditor.is_active = False
-        db.commit()
+        await db.flush()
+        await work_queue.assign_pending(db)
+        await db.commit()
 
         return APIResponse(success=True, message="Auditor desativado com sucesso")
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao desativar auditor: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.post("/{auditor_id}/activate", response_model=APIResponse)
-async def activate_auditor(auditor_id: int, db: Session = Depends(get_db)):
+async def activate_auditor(auditor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Reativa um auditor"""
     try:
         # Buscar auditor
-        auditor = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.id == auditor_id)
-            .first()
-        )
+        auditor = await db.get(database_models.Auditor, auditor_id)
 
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
 
         # Ativar auditor
         auditor.is_active = True
-        db.commit()
+        await db.commit()
 
         return APIResponse(success=True, message="Auditor ativado com sucesso")
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao ativar auditor: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/{auditor_id}/stats", response_model=APIResponse)
-async def get_auditor_stats(auditor_id: int, db: Session = Depends(get_db)):
+async def get_auditor_stats(auditor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtém estatísticas de um auditor"""
     try:
         # Buscar auditor
-        auditor = (
-            db.query(database_models.Auditor)
-            .filter(database_models.Auditor.id == auditor_id)
-            .first()
-        )
+        auditor = await db.get(database_models.Auditor, auditor_id)
 
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
@@ -223,7 +267,8 @@ async def get_auditor_stats(auditor_id: int, db: Session = Depends(get_db)):
             "auditor_id": auditor.id,
             "name": auditor.name,
             "certifications_issued": auditor.certifications_issued,
-            "specializations": json.loads(auditor.specializations),
+            "assigned_pending": await work_queue.current_load(db, auditor.id),
+            "specializations": auditor.specializations,
             "is_active": auditor.is_active,
             "member_since": auditor.created_at.isoformat(),
         }
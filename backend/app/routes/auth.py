@@ -1,43 +1,57 @@
 from datetime import timedelta
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import database_models
 from app.models.schemas import APIResponse
 from app.utils.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     create_access_token,
-    verify_password,
+    verify_and_update_password,
 )
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
 
 @router.post("/token", response_model=APIResponse)
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Endpoint para autenticação OAuth2"""
     # Buscar usuário pelo email
-    user = (
-        db.query(database_models.User)
-        .filter(database_models.User.email == form_data.username)
-        .first()
+    user = await db.scalar(
+        select(database_models.User).where(
+            database_models.User.email == form_data.username
+        )
     )
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password(
+            form_data.password, user.password_hash
+        )
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Atualizar o hash se o custo do bcrypt mudou desde o cadastro
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     # Criar token de acesso
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data={"sub": str(user.id), "ver": user.token_version},
+        expires_delta=access_token_expires,
     )
 
     return APIResponse(
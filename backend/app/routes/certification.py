@@ -1,137 +1,265 @@
-import json
 import logging
 from datetime import datetime, timedelta
+from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_async_db
+from app.dependencies import (
+    get_chain_mirror,
+    get_issuance_batcher,
+    get_stellar_service,
+)
 from app.models import database_models
 from app.models.schemas import (
     APIResponse,
+    BulkCertificationRequest,
+    BulkCertificationResults,
+    CertificationDetail,
+    CertificationList,
     CertificationRequest,
     CertificationStatus,
+    RestaurantCertifications,
 )
-from app.services.stellarService import StellarService
+from app.services.auditorQueueService import AuditorWorkQueue
+from app.services.certificationIndexService import CertificationIndexService
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.issuanceBatcher import CertificationIssuanceBatcher
+from app.services.stellarService import AsyncStellarService
+from app.utils.json_filters import json_array_contains
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-stellar_service = StellarService()
+certification_index = CertificationIndexService()
+work_queue = AuditorWorkQueue()
 
 
 @router.post("/request", response_model=APIResponse)
 async def request_certification(
-    cert_request: CertificationRequest, db: Session = Depends(get_db)
+    cert_request: CertificationRequest, db: AsyncSession = Depends(get_async_db)
 ):
     """Solicita nova certificação para um restaurante"""
     try:
         # Verificar se restaurante existe
-        restaurant = db.query(database_models.Restaurant).filter(
-            database_models.Restaurant.id == cert_request.restaurant_id
-        ).first()
+        restaurant = await db.get(
+            database_models.Restaurant, cert_request.restaurant_id
+        )
         
         if not restaurant:
             raise HTTPException(status_code=404, detail="Restaurante não encontrado")
 
-        # Verificar se já existe solicitação pendente do mesmo tipo
-        existing_cert = db.query(database_models.Certification).filter(
-            database_models.Certification.restaurant_id == cert_request.restaurant_id,
-            database_models.Certification.certification_type == cert_request.certification_type,
-            database_models.Certification.status == CertificationStatus.PENDING
-        ).first()
-        
-        if existing_cert:
-            raise HTTPException(
-                status_code=400,
-                detail="Já existe uma solicitação pendente deste tipo",
-            )
-
-        # Criar nova solicitação
+        # Criar nova solicitação; o índice único parcial impede duas
+        # solicitações pendentes do mesmo tipo para o restaurante
         new_certification = database_models.Certification(
             restaurant_id=cert_request.restaurant_id,
-            certification_type=cert_request.certification_type,
-            products=json.dumps(cert_request.products),  # Converter lista para JSON
+            certification_type=cert_request.certification_type.value,
+            products=cert_request.products,
             status=CertificationStatus.PENDING,
             notes=cert_request.notes,
             created_at=datetime.now()
         )
         
         db.add(new_certification)
-        db.commit()
-        db.refresh(new_certification)
+        await db.flush()
+
+        # Auditor ativo menos carregado da especialidade, se houver vaga
+        auditor_id = await work_queue.assign(db, new_certification)
+        await db.commit()
 
         return APIResponse(
             success=True,
             message="Solicitação de certificação criada com sucesso",
-            data={"certification_id": new_certification.id},
+            data={"certification_id": new_certification.id, "auditor_id": auditor_id},
         )
 
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Já existe uma solicitação pendente deste tipo",
+        )
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao solicitar certificação: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/pending", response_model=APIResponse)
+def _insert_pending_certifications(db: AsyncSession):
+    """INSERT que ignora as linhas barradas pelo índice único de pendentes.
+
+    Cobre solicitações concorrentes criadas entre a verificação e a inserção;
+    as linhas ignoradas simplesmente não aparecem no RETURNING.
+    """
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return (
+        dialect.insert(database_models.Certification)
+        .on_conflict_do_nothing()
+        .returning(
+            database_models.Certification.id,
+            database_models.Certification.restaurant_id,
+            database_models.Certification.certification_type,
+        )
+    )
+
+
+@router.post("/request/bulk", response_model=APIResponse[BulkCertificationResults])
+async def request_certifications_bulk(
+    bulk_request: BulkCertificationRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Solicita várias certificações em uma única transação.
+
+    Restaurantes e solicitações pendentes são verificados com uma query cada,
+    e as novas solicitações são gravadas com um único INSERT de várias linhas.
+    Cada item do lote recebe seu próprio resultado.
+    """
+    try:
+        requests = bulk_request.requests
+        restaurant_ids = {item.restaurant_id for item in requests}
+        cert_types = {item.certification_type.value for item in requests}
+
+        existing_restaurants = set(
+            (
+                await db.scalars(
+                    select(database_models.Restaurant.id).where(
+                        database_models.Restaurant.id.in_(restaurant_ids)
+                    )
+                )
+            ).all()
+        )
+        pending = set(
+            (
+                await db.execute(
+                    select(
+                        database_models.Certification.restaurant_id,
+                        database_models.Certification.certification_type,
+                    ).where(
+                        database_models.Certification.status
+                        == CertificationStatus.PENDING,
+                        database_models.Certification.restaurant_id.in_(restaurant_ids),
+                        database_models.Certification.certification_type.in_(cert_types),
+                    )
+                )
+            ).all()
+        )
+
+        # Erros por item; os válidos seguem para a inserção
+        errors = {}
+        to_insert = {}
+        for index, item in enumerate(requests):
+            key = (item.restaurant_id, item.certification_type.value)
+            if item.restaurant_id not in existing_restaurants:
+                errors[index] = "Restaurante não encontrado"
+            elif key in pending:
+                errors[index] = "Já existe uma solicitação pendente deste tipo"
+            elif key in to_insert:
+                errors[index] = "Solicitação repetida no lote"
+            else:
+                to_insert[key] = index
+
+        created = {}
+        if to_insert:
+            now = datetime.now()
+            rows = await db.execute(
+                _insert_pending_certifications(db),
+                [
+                    {
+                        "restaurant_id": requests[index].restaurant_id,
+                        "certification_type": requests[index].certification_type.value,
+                        "products": requests[index].products,
+                        "status": CertificationStatus.PENDING,
+                        "notes": requests[index].notes,
+                        "created_at": now,
+                    }
+                    for index in to_insert.values()
+                ],
+            )
+            created = {
+                (restaurant_id, cert_type): certification_id
+                for certification_id, restaurant_id, cert_type in rows
+            }
+            # Distribui todas as novas solicitações entre os auditores
+            await work_queue.assign_pending(
+                db, certification_ids=list(created.values())
+            )
+        await db.commit()
+
+        results = []
+        for index, item in enumerate(requests):
+            key = (item.restaurant_id, item.certification_type.value)
+            certification_id = created.get(key) if to_insert.get(key) == index else None
+            error = errors.get(index)
+            if certification_id is None and error is None:
+                # Criada por outra requisição entre a verificação e o INSERT
+                error = "Já existe uma solicitação pendente deste tipo"
+            results.append(
+                {
+                    "index": index,
+                    "restaurant_id": item.restaurant_id,
+                    "certification_type": item.certification_type,
+                    "success": certification_id is not None,
+                    "certification_id": certification_id,
+                    "error": error,
+                }
+            )
+
+        return APIResponse(
+            success=True,
+            message=f"{len(created)} de {len(requests)} solicitações criadas",
+            data={
+                "created": len(created),
+                "failed": len(requests) - len(created),
+                "results": results,
+            },
+        )
+
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Erro ao solicitar certificações em lote: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/pending", response_model=APIResponse[CertificationList])
 async def get_pending_certifications(
     auditor_id: int = Query(None, description="Filtrar por auditor"),
     cert_type: str = Query(None, description="Filtrar por tipo de certificação"),
-    db: Session = Depends(get_db)
+    product: str = Query(None, description="Filtrar por produto"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Lista certificações pendentes de aprovação"""
     try:
-        # Construir query base
-        query = db.query(database_models.Certification).filter(
-            database_models.Certification.status == CertificationStatus.PENDING
+        # Construir query base (restaurante carregado no mesmo JOIN)
+        query = (
+            select(database_models.Certification)
+            .options(joinedload(database_models.Certification.restaurant))
+            .where(database_models.Certification.status == CertificationStatus.PENDING)
         )
         
         # Aplicar filtros adicionais
         if auditor_id:
-            query = query.filter(database_models.Certification.auditor_id == auditor_id)
+            query = query.where(database_models.Certification.auditor_id == auditor_id)
         
         if cert_type:
-            query = query.filter(database_models.Certification.certification_type == cert_type)
+            query = query.where(database_models.Certification.certification_type == cert_type)
+
+        if product:
+            query = query.where(
+                json_array_contains(db, database_models.Certification.products, product)
+            )
         
         # Executar query
-        pending_certs = query.all()
+        pending_certs = (await db.scalars(query)).all()
         
-        # Preparar resultado
-        result = []
-        for cert in pending_certs:
-            # Obter informações do restaurante
-            restaurant = db.query(database_models.Restaurant).filter(
-                database_models.Restaurant.id == cert.restaurant_id
-            ).first()
-            
-            # Converter para dicionário
-            cert_dict = {
-                "id": cert.id,
-                "restaurant_id": cert.restaurant_id,
-                "certification_type": cert.certification_type,
-                "products": json.loads(cert.products),
-                "status": cert.status,
-                "auditor_id": cert.auditor_id,
-                "issued_at": cert.issued_at.isoformat() if cert.issued_at else None,
-                "expires_at": cert.expires_at.isoformat() if cert.expires_at else None,
-                "transaction_hash": cert.transaction_hash,
-                "notes": cert.notes,
-                "created_at": cert.created_at.isoformat(),
-                "restaurant": {
-                    "id": restaurant.id,
-                    "name": restaurant.name,
-                    "address": restaurant.address,
-                    "stellar_public_key": restaurant.stellar_public_key,
-                    "created_at": restaurant.created_at.isoformat()
-                } if restaurant else None
-            }
-            
-            result.append(cert_dict)
-
+        # O modelo de resposta lê os atributos (e o restaurante) do próprio ORM
         return APIResponse(
             success=True,
-            message=f"Encontradas {len(result)} certificações pendentes",
-            data={"certifications": result},
+            message=f"Encontradas {len(pending_certs)} certificações pendentes",
+            data={"certifications": pending_certs},
         )
 
     except Exception as e:
@@ -141,14 +269,17 @@ async def get_pending_certifications(
 
 @router.post("/{certification_id}/approve", response_model=APIResponse)
 async def approve_certification(
-    certification_id: int, auditor_id: int, db: Session = Depends(get_db)
+    certification_id: int,
+    auditor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    stellar_service: AsyncStellarService = Depends(get_stellar_service),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
+    issuance_batcher: CertificationIssuanceBatcher = Depends(get_issuance_batcher),
 ):
     """Aprova uma certificação e emite token na blockchain"""
     try:
         # Verificar se certificação existe
-        certification = db.query(database_models.Certification).filter(
-            database_models.Certification.id == certification_id
-        ).first()
+        certification = await db.get(database_models.Certification, certification_id)
         
         if not certification:
             raise HTTPException(status_code=404, detail="Certificação não encontrada")
@@ -158,10 +289,13 @@ async def approve_certification(
                 status_code=400, detail="Certificação não está pendente"
             )
 
+        if certification.auditor_id not in (None, auditor_id):
+            raise HTTPException(
+                status_code=409, detail="Certificação atribuída a outro auditor"
+            )
+
         # Verificar se auditor existe e está ativo
-        auditor = db.query(database_models.Auditor).filter(
-            database_models.Auditor.id == auditor_id
-        ).first()
+        auditor = await db.get(database_models.Auditor, auditor_id)
         
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
@@ -170,17 +304,16 @@ async def approve_certification(
             raise HTTPException(status_code=400, detail="Auditor não está ativo")
 
         # Verificar se auditor tem especialização no tipo de certificação
-        auditor_specializations = json.loads(auditor.specializations)
-        if certification.certification_type not in auditor_specializations:
+        if certification.certification_type not in auditor.specializations:
             raise HTTPException(
                 status_code=400,
                 detail="Auditor não tem especialização neste tipo de certificação",
             )
 
         # Obter restaurante
-        restaurant = db.query(database_models.Restaurant).filter(
-            database_models.Restaurant.id == certification.restaurant_id
-        ).first()
+        restaurant = await db.get(
+            database_models.Restaurant, certification.restaurant_id
+        )
 
         # Emitir token de certificação na blockchain
         issued_at = datetime.now()
@@ -193,8 +326,13 @@ async def approve_certification(
             "auditor_id": auditor_id,
         }
 
+        # Devolver a conexão ao pool enquanto o lote é montado e enviado: o
+        # lote usa suas próprias conexões (sequências e contas de canal) e
+        # aprovações simultâneas não podem segurar todas as do pool
+        await db.commit()
+
         logger.info(f"Emitindo token de certificação para o restaurante {restaurant.name} (ID: {restaurant.id})")
-        result = stellar_service.issue_certification_token(
+        result = await issuance_batcher.issue(
             restaurant.stellar_public_key,
             certification.certification_type,
             metadata,
@@ -225,11 +363,32 @@ async def approve_certification(
         certification.expires_at = expires_at
         certification.transaction_hash = result["transaction_hash"]
 
-        # Atualizar contador do auditor
-        auditor.certifications_issued += 1
+        # Atualizar contador do auditor (no banco: outras aprovações podem ter
+        # terminado enquanto o lote era enviado)
+        auditor.certifications_issued = database_models.Auditor.certifications_issued + 1
+
+        # Incluir no índice de certificações ativas usado nas buscas
+        await db.run_sync(
+            certification_index.activate,
+            certification.restaurant_id,
+            certification.certification_type,
+            certification.id,
+        )
+
+        # Refletir o token emitido no histórico e no espelho local de saldos
+        await db.run_sync(
+            chain_mirror.record_operation,
+            transaction_hash=result["transaction_hash"],
+            operation_type="payment",
+            source_account=stellar_service.issuer_keypair.public_key,
+            public_key=restaurant.stellar_public_key,
+            asset_code=result["asset_code"],
+            asset_issuer=stellar_service.issuer_keypair.public_key,
+            amount=Decimal(result["amount"]),
+        )
 
         # Salvar alterações
-        db.commit()
+        await db.commit()
 
         return APIResponse(
             success=True,
@@ -244,21 +403,22 @@ async def approve_certification(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao aprovar certificação: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.post("/{certification_id}/reject", response_model=APIResponse)
 async def reject_certification(
-    certification_id: int, auditor_id: int, reason: str, db: Session = Depends(get_db)
+    certification_id: int,
+    auditor_id: int,
+    reason: str,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Rejeita uma certificação"""
     try:
         # Verificar se certificação existe
-        certification = db.query(database_models.Certification).filter(
-            database_models.Certification.id == certification_id
-        ).first()
+        certification = await db.get(database_models.Certification, certification_id)
         
         if not certification:
             raise HTTPException(status_code=404, detail="Certificação não encontrada")
@@ -268,10 +428,13 @@ async def reject_certification(
                 status_code=400, detail="Certificação não está pendente"
             )
 
+        if certification.auditor_id not in (None, auditor_id):
+            raise HTTPException(
+                status_code=409, detail="Certificação atribuída a outro auditor"
+            )
+
         # Verificar auditor
-        auditor = db.query(database_models.Auditor).filter(
-            database_models.Auditor.id == auditor_id
-        ).first()
+        auditor = await db.get(database_models.Auditor, auditor_id)
         
         if not auditor:
             raise HTTPException(status_code=404, detail="Auditor não encontrado")
@@ -282,7 +445,7 @@ async def reject_certification(
         certification.notes = f"Rejeitada: {reason}"
         
         # Salvar alterações
-        db.commit()
+        await db.commit()
 
         return APIResponse(
             success=True,
@@ -293,47 +456,39 @@ async def reject_certification(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao rejeitar certificação: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/restaurant/{restaurant_id}", response_model=APIResponse)
-async def get_restaurant_certifications(restaurant_id: int, db: Session = Depends(get_db)):
+@router.get(
+    "/restaurant/{restaurant_id}",
+    response_model=APIResponse[RestaurantCertifications],
+)
+async def get_restaurant_certifications(
+    restaurant_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    stellar_service: AsyncStellarService = Depends(get_stellar_service),
+):
     """Obtém todas as certificações de um restaurante"""
     try:
         # Verificar se restaurante existe
-        restaurant = db.query(database_models.Restaurant).filter(
-            database_models.Restaurant.id == restaurant_id
-        ).first()
+        restaurant = await db.get(database_models.Restaurant, restaurant_id)
         
         if not restaurant:
             raise HTTPException(status_code=404, detail="Restaurante não encontrado")
 
         # Certificações do banco de dados local
-        local_certs_query = db.query(database_models.Certification).filter(
-            database_models.Certification.restaurant_id == restaurant_id
+        local_certs = (
+            await db.scalars(
+                select(database_models.Certification).where(
+                    database_models.Certification.restaurant_id == restaurant_id
+                )
+            )
         ).all()
-        
-        # Converter para lista de dicionários
-        local_certs = []
-        for cert in local_certs_query:
-            local_certs.append({
-                "id": cert.id,
-                "restaurant_id": cert.restaurant_id,
-                "certification_type": cert.certification_type,
-                "products": json.loads(cert.products),
-                "status": cert.status,
-                "auditor_id": cert.auditor_id,
-                "issued_at": cert.issued_at.isoformat() if cert.issued_at else None,
-                "expires_at": cert.expires_at.isoformat() if cert.expires_at else None,
-                "transaction_hash": cert.transaction_hash,
-                "notes": cert.notes,
-                "created_at": cert.created_at.isoformat()
-            })
 
         # Certificações ativas na blockchain
-        blockchain_certs = stellar_service.get_restaurant_certifications(
+        blockchain_certs = await stellar_service.get_restaurant_certifications(
             restaurant.stellar_public_key
         )
 
@@ -354,60 +509,27 @@ async def get_restaurant_certifications(restaurant_id: int, db: Session = Depend
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/{certification_id}", response_model=APIResponse)
-async def get_certification_details(certification_id: int, db: Session = Depends(get_db)):
+@router.get("/{certification_id}", response_model=APIResponse[CertificationDetail])
+async def get_certification_details(
+    certification_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """Obtém detalhes de uma certificação específica"""
     try:
-        # Buscar certificação
-        certification = db.query(database_models.Certification).filter(
-            database_models.Certification.id == certification_id
-        ).first()
-        
+        # Buscar certificação com restaurante e auditor em uma única query
+        certification = await db.scalar(
+            select(database_models.Certification)
+            .options(
+                joinedload(database_models.Certification.restaurant),
+                joinedload(database_models.Certification.auditor),
+            )
+            .where(database_models.Certification.id == certification_id)
+        )
+
         if not certification:
             raise HTTPException(status_code=404, detail="Certificação não encontrada")
 
-        # Buscar restaurante e auditor relacionados
-        restaurant = db.query(database_models.Restaurant).filter(
-            database_models.Restaurant.id == certification.restaurant_id
-        ).first()
-        
-        auditor = None
-        if certification.auditor_id:
-            auditor = db.query(database_models.Auditor).filter(
-                database_models.Auditor.id == certification.auditor_id
-            ).first()
-
-        # Montar resposta
-        cert_details = {
-            "id": certification.id,
-            "restaurant_id": certification.restaurant_id,
-            "certification_type": certification.certification_type,
-            "products": json.loads(certification.products),
-            "status": certification.status,
-            "auditor_id": certification.auditor_id,
-            "issued_at": certification.issued_at.isoformat() if certification.issued_at else None,
-            "expires_at": certification.expires_at.isoformat() if certification.expires_at else None,
-            "transaction_hash": certification.transaction_hash,
-            "notes": certification.notes,
-            "created_at": certification.created_at.isoformat(),
-            "restaurant": {
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "address": restaurant.address,
-                "stellar_public_key": restaurant.stellar_public_key,
-                "created_at": restaurant.created_at.isoformat()
-            } if restaurant else None,
-            "auditor": {
-                "id": auditor.id,
-                "name": auditor.name,
-                "email": auditor.email,
-                "specializations": json.loads(auditor.specializations),
-                "is_active": auditor.is_active
-            } if auditor else None
-        }
-
         return APIResponse(
-            success=True, message="Certificação encontrada", data=cert_details
+            success=True, message="Certificação encontrada", data=certification
         )
 
     except HTTPException:
@@ -0,0 +1,33 @@
+import logging
+
+from app.database import get_async_db
+from app.models import database_models
+from app.models.schemas import APIResponse
+from app.services.walletProvisioningService import wallet_job_to_dict
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=APIResponse)
+async def get_wallet_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Obtém o status de um job de provisionamento de carteira"""
+    try:
+        job = await db.get(database_models.WalletJob, job_id)
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Job não encontrado")
+
+        return APIResponse(
+            success=True,
+            message=f"Job {job.status}",
+            data=wallet_job_to_dict(job),
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -1,179 +1,325 @@
+import json
 import logging
 from datetime import datetime
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
+from app.dependencies import get_chain_mirror
 from app.models import database_models
 from app.models.schemas import (
     APIResponse,
+    CursorPaginatedResponse,
     PaginatedResponse,
+    Restaurant,
     RestaurantCreate,
+    RestaurantDetail,
+    RestaurantSearchResults,
+    WalletJobStatus,
 )
-from app.services.stellarService import StellarService
-from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.certificationIndexService import CertificationIndexService
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.walletProvisioningService import (
+    assign_wallet,
+    notify_wallet_workers,
+    wallet_job_to_dict,
+)
+from app.utils.pagination import count_rows, estimate_row_count, keyset_paginate
+from app.utils.responses import ORJSONResponse
+from app.utils.search import ranked_search
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-stellar_service = StellarService()
+certification_index = CertificationIndexService()
 
 
-@router.post("/register", response_model=APIResponse)
+@router.post(
+    "/register",
+    response_model=APIResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def register_restaurant(
-    restaurant: RestaurantCreate, db: Session = Depends(get_db)
+    restaurant: RestaurantCreate,
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
 ):
-    """Registra um novo restaurante na plataforma"""
+    """Registra um novo restaurante; a carteira é provisionada em segundo plano"""
     try:
-        # Criar uma nova carteira Stellar para o restaurante
+        # Usar uma carteira do estoque ou agendar financiamento e trustlines
         logger.info(f"Criando nova carteira Stellar para o restaurante: {restaurant.name}")
-        stellar_wallet_info = stellar_service.create_new_wallet()
-
-        if not stellar_wallet_info["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erro ao criar carteira Stellar: {stellar_wallet_info.get('error', 'Erro desconhecido')}",
-            )
-
-        stellar_public_key = stellar_wallet_info["public_key"]
-        
-        # Verificar se as trustlines foram configuradas
-        trustlines = stellar_wallet_info.get("trustlines", [])
-        if trustlines:
-            logger.info(f"Trustlines configuradas com sucesso: {', '.join(trustlines)}")
-        else:
-            logger.warning("Nenhuma trustline foi configurada durante a criação da carteira")
+        keypair, wallet_job = await assign_wallet(db, "restaurant")
 
         # Criar novo restaurante no banco de dados
         new_restaurant = database_models.Restaurant(
             name=restaurant.name,
             address=restaurant.address,
-            stellar_public_key=stellar_public_key,
+            stellar_public_key=keypair.public_key,
             created_at=datetime.now(),
         )
 
         db.add(new_restaurant)
-        db.commit()
-        db.refresh(new_restaurant)
+        await db.flush()
+        wallet_job.entity_id = new_restaurant.id
+        wallet_ready = wallet_job.status == WalletJobStatus.SUCCEEDED
+        if wallet_ready:
+            # Carteira do estoque: trustlines já configuradas, com saldo zero
+            await db.run_sync(
+                chain_mirror.store_new_trustlines,
+                keypair.public_key,
+                json.loads(wallet_job.trustlines),
+            )
+        await db.commit()
+        await db.refresh(new_restaurant)
+        notify_wallet_workers()
 
         # Preparar resposta
         response_data = {"restaurant_id": new_restaurant.id}
 
         # Incluir informações da carteira criada
         response_data["wallet"] = {
-            "public_key": stellar_wallet_info["public_key"],
-            "secret_key": stellar_wallet_info["secret_key"],
-            "trustlines_configured": trustlines,
+            "public_key": keypair.public_key,
+            "secret_key": keypair.secret,
             "message": "IMPORTANTE: Guarde a chave secreta em um local seguro. Ela não será mostrada novamente."
         }
+        response_data["job"] = wallet_job_to_dict(wallet_job)
 
         return APIResponse(
             success=True,
-            message="Restaurante registrado com sucesso e trustlines configuradas",
+            message=(
+                "Restaurante registrado com sucesso"
+                if wallet_ready
+                else "Restaurante registrado; a carteira está sendo configurada"
+            ),
             data=response_data,
         )
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade de dados")
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao registrar restaurante: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/list", response_model=PaginatedResponse)
+def _filter_restaurants(query, name: Optional[str], address: Optional[str]):
+    if name:
+        query = query.where(database_models.Restaurant.name.ilike(f"%{name}%"))
+    if address:
+        query = query.where(database_models.Restaurant.address.ilike(f"%{address}%"))
+    return query
+
+
+async def _restaurants_with_certifications(
+    db: AsyncSession,
+    chain_mirror: ChainMirrorService,
+    restaurants: list,
+    refresh: bool,
+):
+    """Monta os dados de cada restaurante com as certificações espelhadas"""
+    public_keys = [restaurant.stellar_public_key for restaurant in restaurants]
+
+    # Atualizar o espelho local apenas quando solicitado explicitamente
+    if refresh:
+        failed = await chain_mirror.refresh_many(db, public_keys)
+        if failed:
+            logger.warning(f"Espelho não atualizado para {len(failed)} contas")
+
+    # Certificações lidas do espelho local em uma única query
+    mirrored = await db.run_sync(chain_mirror.get_certifications, public_keys)
+
+    # Datas seguem como datetime e são convertidas na serialização da resposta
+    restaurant_list = []
+    for restaurant in restaurants:
+        mirror = mirrored[restaurant.stellar_public_key]
+        restaurant_list.append(
+            {
+                "id": restaurant.id,
+                "name": restaurant.name,
+                "address": restaurant.address,
+                "stellar_public_key": restaurant.stellar_public_key,
+                "created_at": restaurant.created_at,
+                "certifications": mirror["certifications"],
+                "certifications_synced_at": mirror["synced_at"],
+            }
+        )
+
+    return restaurant_list
+
+
+@router.get("/list", response_model=PaginatedResponse[Restaurant])
 async def list_restaurants(
     name: Optional[str] = Query(None, description="Filtrar por nome"),
     address: Optional[str] = Query(None, description="Filtrar por endereço"),
     page: int = Query(1, ge=1, description="Página"),
     size: int = Query(10, ge=1, le=100, description="Itens por página"),
-    db: Session = Depends(get_db),
+    refresh: bool = Query(
+        False, description="Atualizar certificações a partir da blockchain"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
 ):
     """Lista restaurantes com filtros e paginação"""
     try:
-        # Construir query base
-        query = db.query(database_models.Restaurant)
-
-        # Aplicar filtros
-        if name:
-            query = query.filter(database_models.Restaurant.name.ilike(f"%{name}%"))
-        if address:
-            query = query.filter(
-                database_models.Restaurant.address.ilike(f"%{address}%")
-            )
+        query = _filter_restaurants(
+            select(database_models.Restaurant), name, address
+        )
 
         # Contar total de registros
-        total = query.count()
+        total = await count_rows(db, query)
 
         # Aplicar paginação
-        restaurants = query.offset((page - 1) * size).limit(size).all()
+        restaurants = (
+            await db.scalars(query.offset((page - 1) * size).limit(size))
+        ).all()
 
-        # Converter para dicionários e adicionar certificações
-        restaurant_list = []
-        for restaurant in restaurants:
-            restaurant_dict = {
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "address": restaurant.address,
-                "stellar_public_key": restaurant.stellar_public_key,
-                "created_at": restaurant.created_at.isoformat(),
-            }
+        restaurant_list = await _restaurants_with_certifications(
+            db, chain_mirror, restaurants, refresh
+        )
 
-            # Adicionar certificações atualizadas da blockchain
-            certifications = stellar_service.get_restaurant_certifications(
-                restaurant.stellar_public_key
+        return ORJSONResponse(
+            PaginatedResponse(
+                items=restaurant_list,
+                total=total,
+                page=page,
+                size=size,
+                pages=(total + size - 1) // size,
             )
-            restaurant_dict["certifications"] = certifications
+        )
 
-            restaurant_list.append(restaurant_dict)
+    except Exception as e:
+        logger.error(f"Erro ao listar restaurantes: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-        return PaginatedResponse(
-            items=restaurant_list,
-            total=total,
-            page=page,
-            size=size,
-            pages=(total + size - 1) // size,
+
+@router.get("/list/cursor", response_model=CursorPaginatedResponse[Restaurant])
+async def list_restaurants_by_cursor(
+    name: Optional[str] = Query(None, description="Filtrar por nome"),
+    address: Optional[str] = Query(None, description="Filtrar por endereço"),
+    cursor: Optional[str] = Query(None, description="Cursor da página anterior"),
+    size: int = Query(10, ge=1, le=100, description="Itens por página"),
+    include_total: bool = Query(False, description="Incluir o total de registros"),
+    refresh: bool = Query(
+        False, description="Atualizar certificações a partir da blockchain"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
+):
+    """Lista restaurantes paginando por cursor (ordem de criação)"""
+    try:
+        query = _filter_restaurants(
+            select(database_models.Restaurant), name, address
         )
 
+        try:
+            restaurants, next_cursor = await keyset_paginate(
+                db, query, database_models.Restaurant, cursor, size
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Sem filtros, o total vem das estatísticas do banco em vez de um COUNT
+        total, total_is_estimate = None, False
+        if include_total:
+            if not name and not address:
+                total = await estimate_row_count(
+                    db, database_models.Restaurant.__tablename__
+                )
+                total_is_estimate = total is not None
+            if total is None:
+                total = await count_rows(db, query)
+
+        restaurant_list = await _restaurants_with_certifications(
+            db, chain_mirror, restaurants, refresh
+        )
+
+        return ORJSONResponse(
+            CursorPaginatedResponse(
+                items=restaurant_list,
+                size=size,
+                next_cursor=next_cursor,
+                total=total,
+                total_is_estimate=total_is_estimate,
+            )
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar restaurantes: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/{restaurant_id}", response_model=APIResponse)
-async def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    """Obtém detalhes de um restaurante específico"""
+@router.get("/search", response_model=APIResponse[RestaurantSearchResults])
+async def search_restaurants(
+    q: str = Query(..., min_length=1, max_length=100, description="Termo de busca"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de resultados"),
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
+):
+    """Busca restaurantes por nome ou endereço, ordenados por relevância"""
     try:
-        restaurant = (
-            db.query(database_models.Restaurant)
-            .filter(database_models.Restaurant.id == restaurant_id)
-            .first()
+        query = ranked_search(
+            db,
+            select(database_models.Restaurant),
+            [database_models.Restaurant.name, database_models.Restaurant.address],
+            q.strip(),
+        )
+        restaurants = (
+            await db.scalars(query.order_by(database_models.Restaurant.id).limit(limit))
+        ).all()
+
+        restaurant_list = await _restaurants_with_certifications(
+            db, chain_mirror, restaurants, refresh=False
         )
 
+        return ORJSONResponse(
+            APIResponse(
+                success=True,
+                message=f"Encontrados {len(restaurant_list)} restaurantes",
+                data={"query": q, "results": restaurant_list},
+            )
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar restaurantes: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/{restaurant_id}", response_model=APIResponse[RestaurantDetail])
+async def get_restaurant(
+    restaurant_id: int,
+    refresh: bool = Query(
+        False, description="Atualizar certificações a partir da blockchain"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
+):
+    """Obtém detalhes de um restaurante específico"""
+    try:
+        restaurant = await db.get(database_models.Restaurant, restaurant_id)
+
         if not restaurant:
             raise HTTPException(status_code=404, detail="Restaurante não encontrado")
 
-        # Converter para dicionário
-        restaurant_dict = {
-            "id": restaurant.id,
-            "name": restaurant.name,
-            "address": restaurant.address,
-            "stellar_public_key": restaurant.stellar_public_key,
-            "created_at": restaurant.created_at.isoformat(),
-        }
+        # Obter certificações do espelho local (atualizado sob demanda)
+        if refresh:
+            await chain_mirror.refresh(db, restaurant.stellar_public_key)
 
-        # Obter certificações atualizadas da blockchain
-        certifications = stellar_service.get_restaurant_certifications(
-            restaurant.stellar_public_key
-        )
-        restaurant_dict["certifications"] = certifications
+        restaurant_dict = (
+            await _restaurants_with_certifications(
+                db, chain_mirror, [restaurant], refresh=False
+            )
+        )[0]
 
-        # Obter histórico de transações de certificação
-        certification_history = stellar_service.get_certification_transactions(
-            restaurant.stellar_public_key
+        # Obter histórico de certificações ingerido da blockchain
+        certification_history = await db.run_sync(
+            chain_mirror.get_certification_transactions, restaurant.stellar_public_key
         )
         restaurant_dict["certification_history"] = certification_history
 
@@ -188,52 +334,42 @@ async def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/search/by-certification")
+@router.get("/search/by-certification", response_model=PaginatedResponse[Restaurant])
 async def search_by_certification(
     certifications: List[str] = Query(..., description="Lista de certificações"),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    chain_mirror: ChainMirrorService = Depends(get_chain_mirror),
 ):
     """Busca restaurantes por certificações específicas"""
     try:
-        # Obter todos os restaurantes
-        restaurants = db.query(database_models.Restaurant).all()
+        cert_types = certification_index.normalize_types(certifications)
+        if not cert_types:
+            # Certificação desconhecida: nenhum restaurante pode possuí-la
+            return ORJSONResponse(
+                PaginatedResponse(items=[], total=0, page=page, size=size, pages=0)
+            )
 
-        certified_restaurants = []
+        # Filtro e paginação resolvidos pelo banco via índice de certificações
+        query = certification_index.restaurants_with_all(cert_types)
+        total = await count_rows(db, query)
+        restaurants = (
+            await db.scalars(query.offset((page - 1) * size).limit(size))
+        ).all()
 
-        for restaurant in restaurants:
-            restaurant_certs = stellar_service.get_restaurant_certifications(
-                restaurant.stellar_public_key
+        paginated_restaurants = await _restaurants_with_certifications(
+            db, chain_mirror, restaurants, refresh=False
+        )
+
+        return ORJSONResponse(
+            PaginatedResponse(
+                items=paginated_restaurants,
+                total=total,
+                page=page,
+                size=size,
+                pages=(total + size - 1) // size,
             )
-            cert_codes = [cert["asset_code"] for cert in restaurant_certs]
-
-            # Verificar se tem todas as certificações solicitadas
-            has_all_certs = all(cert.upper() in cert_codes for cert in certifications)
-
-            if has_all_certs:
-                restaurant_dict = {
-                    "id": restaurant.id,
-                    "name": restaurant.name,
-                    "address": restaurant.address,
-                    "stellar_public_key": restaurant.stellar_public_key,
-                    "created_at": restaurant.created_at.isoformat(),
-                    "certifications": restaurant_certs,
-                }
-                certified_restaurants.append(restaurant_dict)
-
-        # Paginação
-        total = len(certified_restaurants)
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_restaurants = certified_restaurants[start_idx:end_idx]
-
-        return PaginatedResponse(
-            items=paginated_restaurants,
-            total=total,
-            page=page,
-            size=size,
-            pages=(total + size - 1) // size,
         )
 
     except Exception as e:
@@ -242,26 +378,36 @@ async def search_by_certification(
 
 
 @router.delete("/{restaurant_id}", response_model=APIResponse)
-async def delete_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
+async def delete_restaurant(
+    restaurant_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """Remove um restaurante da plataforma"""
     try:
-        restaurant = (
-            db.query(database_models.Restaurant)
-            .filter(database_models.Restaurant.id == restaurant_id)
-            .first()
-        )
+        restaurant = await db.get(database_models.Restaurant, restaurant_id)
 
         if not restaurant:
             raise HTTPException(status_code=404, detail="Restaurante não encontrado")
 
-        db.delete(restaurant)
-        db.commit()
+        await db.execute(
+            delete(database_models.RestaurantActiveCertification).where(
+                database_models.RestaurantActiveCertification.restaurant_id
+                == restaurant.id
+            )
+        )
+        await db.execute(
+            delete(database_models.RestaurantChainBalance).where(
+                database_models.RestaurantChainBalance.stellar_public_key
+                == restaurant.stellar_public_key
+            )
+        )
+        await db.delete(restaurant)
+        await db.commit()
 
         return APIResponse(success=True, message="Restaurante removido com sucesso")
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao deletar restaurante {restaurant_id}: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
\ No newline at end of file
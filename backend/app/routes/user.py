@@ -2,144 +2,183 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_async_db
+from app.dependencies import get_stellar_service
 from app.models import database_models
 from app.models.schemas import (
     APIResponse,
+    CurrentUser,
+    CursorPaginatedResponse,
     PaginatedResponse,
     UserCreate,
     UserLogin,
     UserResponse,
     UserUpdate,
+    WalletJobStatus,
 )
-from app.services.stellarService import StellarService
+from app.services.stellarService import AsyncStellarService
+from app.services.walletProvisioningService import (
+    assign_wallet,
+    notify_wallet_workers,
+    wallet_job_to_dict,
+)
+from app.utils.cache import TTLCache
+from app.utils.pagination import count_rows, estimate_row_count, keyset_paginate
+from app.utils.search import ranked_search
 from app.utils.security import (
+    ALGORITHM,
+    SECRET_KEY,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
 )
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
-stellar_service = StellarService()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+# Usuários autenticados já resolvidos, por (id, versão do token)
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+
+def invalidate_principal(user_id: int, token_version: int):
+    principal_cache.invalidate((user_id, token_version))
+
+
 # Função para obter o usuário atual a partir do token
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        from app.utils.security import SECRET_KEY, ALGORITHM
-
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+        token_version = int(payload.get("ver", 0))
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    user = db.query(database_models.User).filter(database_models.User.id == user_id).first()
-    if user is None:
+    # A maioria das requisições é resolvida sem consultar o banco
+    cache_key = (user_id, token_version)
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    # Uma atualização do perfil durante a consulta descarta o resultado antigo
+    generation = principal_cache.generation(cache_key)
+    user = await db.get(database_models.User, user_id)
+    if user is None or user.token_version != token_version:
         raise credentials_exception
-    return user
 
+    principal = CurrentUser(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        stellar_public_key=user.stellar_public_key,
+        created_at=user.created_at,
+        token_version=user.token_version,
+    )
+    principal_cache.set(cache_key, principal, generation=generation)
+    return principal
 
-@router.post("/register", response_model=APIResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Registra um novo usuário na plataforma"""
+
+@router.post(
+    "/register",
+    response_model=APIResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Registra um novo usuário; a carteira é provisionada em segundo plano"""
     try:
         # Verificar se o email já existe
-        existing_user = (
-            db.query(database_models.User)
-            .filter(database_models.User.email == user.email)
-            .first()
+        existing_user = await db.scalar(
+            select(database_models.User).where(database_models.User.email == user.email)
         )
         if existing_user:
             raise HTTPException(status_code=400, detail="Email já cadastrado")
 
-        # Criar uma nova carteira Stellar para o usuário
+        # Usar uma carteira do estoque ou agendar financiamento e trustlines
         logger.info(f"Criando nova carteira Stellar para o usuário: {user.name}")
-        stellar_wallet_info = stellar_service.create_new_wallet()
-
-        if not stellar_wallet_info["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erro ao criar carteira Stellar: {stellar_wallet_info.get('error', 'Erro desconhecido')}",
-            )
-
-        stellar_public_key = stellar_wallet_info["public_key"]
-        
-        # Verificar se as trustlines foram configuradas
-        trustlines = stellar_wallet_info.get("trustlines", [])
-        if trustlines:
-            logger.info(f"Trustlines configuradas com sucesso: {', '.join(trustlines)}")
-        else:
-            logger.warning("Nenhuma trustline foi configurada durante a criação da carteira")
+        keypair, wallet_job = await assign_wallet(db, "user")
 
         # Hash da senha
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await hash_password_async(user.password)
 
         # Criar novo usuário no banco de dados
         new_user = database_models.User(
             name=user.name,
             email=user.email,
             password_hash=hashed_password,
-            stellar_public_key=stellar_public_key,
+            stellar_public_key=keypair.public_key,
             created_at=datetime.now(),
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.flush()
+        wallet_job.entity_id = new_user.id
+        wallet_ready = wallet_job.status == WalletJobStatus.SUCCEEDED
+        await db.commit()
+        await db.refresh(new_user)
+        notify_wallet_workers()
 
         # Preparar resposta
         response_data = {"user_id": new_user.id}
 
         # Incluir informações da carteira criada
         response_data["wallet"] = {
-            "public_key": stellar_wallet_info["public_key"],
-            "trustlines_configured": trustlines,
+            "public_key": keypair.public_key,
             "message": "IMPORTANTE: Guarde a chave secreta em um local seguro. Ela não será mostrada novamente."
         }
+        response_data["job"] = wallet_job_to_dict(wallet_job)
 
         return APIResponse(
             success=True,
-            message="Usuário registrado com sucesso",
+            message=(
+                "Usuário registrado com sucesso"
+                if wallet_ready
+                else "Usuário registrado; a carteira está sendo configurada"
+            ),
             data=response_data,
         )
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Erro de integridade de dados")
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao registrar usuário: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.post("/login", response_model=APIResponse)
-async def login_user(user_login: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_login: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Autentica um usuário e retorna um token de acesso"""
     try:
         # Buscar usuário pelo email
-        user = (
-            db.query(database_models.User)
-            .filter(database_models.User.email == user_login.email)
-            .first()
+        user = await db.scalar(
+            select(database_models.User).where(
+                database_models.User.email == user_login.email
+            )
         )
         
         if not user:
@@ -150,17 +189,26 @@ async def login_user(user_login: UserLogin, db: Session = Depends(get_db)):
             )
             
         # Verificar senha
-        if not verify_password(user_login.password, user.password_hash):
+        valid, new_hash = await verify_and_update_password(
+            user_login.password, user.password_hash
+        )
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou senha incorretos",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+
+        # Atualizar o hash se o custo do bcrypt mudou desde o cadastro
+        if new_hash:
+            user.password_hash = new_hash
+            await db.commit()
             
         # Criar token de acesso
         access_token_expires = timedelta(minutes=30)
         access_token = create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
+            data={"sub": str(user.id), "ver": user.token_version},
+            expires_delta=access_token_expires,
         )
         
         return APIResponse(
@@ -186,7 +234,10 @@ async def login_user(user_login: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=APIResponse)
-async def get_user_me(current_user: database_models.User = Depends(get_current_user)):
+async def get_user_me(
+    current_user: CurrentUser = Depends(get_current_user),
+    stellar_service: AsyncStellarService = Depends(get_stellar_service),
+):
     """Obtém informações do usuário atual"""
     try:
         user_data = {
@@ -198,7 +249,7 @@ async def get_user_me(current_user: database_models.User = Depends(get_current_u
         }
         
         # Obter saldo da carteira Stellar
-        account_info = stellar_service.get_account_info(current_user.stellar_public_key)
+        account_info = await stellar_service.get_account_info(current_user.stellar_public_key)
         if account_info:
             balances = []
             for balance in account_info.get("balances", []):
@@ -229,90 +280,102 @@ async def get_user_me(current_user: database_models.User = Depends(get_current_u
 @router.put("/me", response_model=APIResponse)
 async def update_user_me(
     user_update: UserUpdate,
-    current_user: database_models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza informações do usuário atual"""
     try:
+        user = await db.get(database_models.User, current_user.id)
+        if not user:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
         # Verificar se o email já existe (se estiver sendo atualizado)
-        if user_update.email and user_update.email != current_user.email:
-            existing_user = (
-                db.query(database_models.User)
-                .filter(database_models.User.email == user_update.email)
-                .first()
+        if user_update.email and user_update.email != user.email:
+            existing_user = await db.scalar(
+                select(database_models.User).where(
+                    database_models.User.email == user_update.email
+                )
             )
             if existing_user:
                 raise HTTPException(status_code=400, detail="Email já cadastrado")
-            current_user.email = user_update.email
+            user.email = user_update.email
             
         # Atualizar nome se fornecido
         if user_update.name:
-            current_user.name = user_update.name
+            user.name = user_update.name
             
-        # Atualizar senha se fornecida
+        # Atualizar senha se fornecida; tokens emitidos antes deixam de valer
         if user_update.password:
-            current_user.password_hash = get_password_hash(user_update.password)
+            user.password_hash = await hash_password_async(user_update.password)
+            user.token_version += 1
             
-        db.commit()
-        
+        await db.commit()
+        invalidate_principal(current_user.id, current_user.token_version)
+
+        response_data = {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+        }
+        if user_update.password:
+            response_data["access_token"] = create_access_token(
+                data={"sub": str(user.id), "ver": user.token_version}
+            )
+            response_data["token_type"] = "bearer"
+
         return APIResponse(
             success=True,
             message="Informações do usuário atualizadas com sucesso",
-            data={
-                "id": current_user.id,
-                "name": current_user.name,
-                "email": current_user.email,
-            },
+            data=response_data,
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao atualizar informações do usuário: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+def _filter_users(query, name: Optional[str], email: Optional[str]):
+    if name:
+        query = query.where(database_models.User.name.ilike(f"%{name}%"))
+    if email:
+        query = query.where(database_models.User.email.ilike(f"%{email}%"))
+    return query
+
+
+def _user_to_dict(user: database_models.User):
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "stellar_public_key": user.stellar_public_key,
+        "created_at": user.created_at.isoformat(),
+    }
+
+
 @router.get("/list", response_model=PaginatedResponse)
 async def list_users(
     name: Optional[str] = Query(None, description="Filtrar por nome"),
     email: Optional[str] = Query(None, description="Filtrar por email"),
     page: int = Query(1, ge=1, description="Página"),
     size: int = Query(10, ge=1, le=100, description="Itens por página"),
-    db: Session = Depends(get_db),
-    current_user: database_models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Lista usuários com filtros e paginação"""
     try:
-        # Construir query base
-        query = db.query(database_models.User)
-
-        # Aplicar filtros
-        if name:
-            query = query.filter(database_models.User.name.ilike(f"%{name}%"))
-        if email:
-            query = query.filter(database_models.User.email.ilike(f"%{email}%"))
+        query = _filter_users(select(database_models.User), name, email)
 
         # Contar total de registros
-        total = query.count()
+        total = await count_rows(db, query)
 
         # Aplicar paginação
-        users = query.offset((page - 1) * size).limit(size).all()
-
-        # Converter para dicionários
-        user_list = []
-        for user in users:
-            user_dict = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "stellar_public_key": user.stellar_public_key,
-                "created_at": user.created_at.isoformat(),
-            }
-            user_list.append(user_dict)
+        users = (await db.scalars(query.offset((page - 1) * size).limit(size))).all()
 
         return PaginatedResponse(
-            items=user_list,
+            items=[_user_to_dict(user) for user in users],
             total=total,
             page=page,
             size=size,
@@ -324,19 +387,92 @@ async def list_users(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+@router.get("/list/cursor", response_model=CursorPaginatedResponse)
+async def list_users_by_cursor(
+    name: Optional[str] = Query(None, description="Filtrar por nome"),
+    email: Optional[str] = Query(None, description="Filtrar por email"),
+    cursor: Optional[str] = Query(None, description="Cursor da página anterior"),
+    size: int = Query(10, ge=1, le=100, description="Itens por página"),
+    include_total: bool = Query(False, description="Incluir o total de registros"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Lista usuários paginando por cursor (ordem de criação)"""
+    try:
+        query = _filter_users(select(database_models.User), name, email)
+
+        try:
+            users, next_cursor = await keyset_paginate(
+                db, query, database_models.User, cursor, size
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Sem filtros, o total vem das estatísticas do banco em vez de um COUNT
+        total, total_is_estimate = None, False
+        if include_total:
+            if not name and not email:
+                total = await estimate_row_count(
+                    db, database_models.User.__tablename__
+                )
+                total_is_estimate = total is not None
+            if total is None:
+                total = await count_rows(db, query)
+
+        return CursorPaginatedResponse(
+            items=[_user_to_dict(user) for user in users],
+            size=size,
+            next_cursor=next_cursor,
+            total=total,
+            total_is_estimate=total_is_estimate,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao listar usuários: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/search", response_model=APIResponse)
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100, description="Termo de busca"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de resultados"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Busca usuários por nome ou email, ordenados por relevância"""
+    try:
+        query = ranked_search(
+            db,
+            select(database_models.User),
+            [database_models.User.name, database_models.User.email],
+            q.strip(),
+        )
+        users = (
+            await db.scalars(query.order_by(database_models.User.id).limit(limit))
+        ).all()
+
+        return APIResponse(
+            success=True,
+            message=f"Encontrados {len(users)} usuários",
+            data={"query": q, "results": [_user_to_dict(user) for user in users]},
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar usuários: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.get("/{user_id}", response_model=APIResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: database_models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Obtém detalhes de um usuário específico"""
     try:
-        user = (
-            db.query(database_models.User)
-            .filter(database_models.User.id == user_id)
-            .first()
-        )
+        user = await db.get(database_models.User, user_id)
 
         if not user:
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
@@ -364,8 +500,8 @@ async def get_user(
 @router.delete("/{user_id}", response_model=APIResponse)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: database_models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Remove um usuário da plataforma (apenas administradores)"""
     try:
@@ -374,23 +510,20 @@ async def delete_user(
             # Aqui você poderia adicionar uma verificação de permissão de administrador
             raise HTTPException(status_code=403, detail="Permissão negada")
             
-        user = (
-            db.query(database_models.User)
-            .filter(database_models.User.id == user_id)
-            .first()
-        )
+        user = await db.get(database_models.User, user_id)
 
         if not user:
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
+        invalidate_principal(user.id, user.token_version)
 
         return APIResponse(success=True, message="Usuário removido com sucesso")
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erro ao deletar usuário {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
\ No newline at end of file
@@ -0,0 +1,200 @@
+import logging
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from app.utils.json_filters import json_array_contains
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class AuditorWorkQueue:
+    """Fila de trabalho que distribui certificações pendentes entre auditores.
+
+    Novas solicitações são atribuídas ao auditor ativo menos carregado da
+    especialidade, respeitando o limite de solicitações em análise por
+    auditor; as que excedem o limite ficam na fila. Cada auditor também pode
+    reivindicar a solicitação pendente mais antiga ainda não atribuída. A
+    linha é travada com SKIP LOCKED, então auditores concorrentes nunca
+    recebem a mesma certificação.
+
+    Atribuições de auditores desativados ou sem resposta há mais de
+    AUDITOR_ASSIGNMENT_TIMEOUT voltam para a fila.
+    """
+
+    def __init__(self, max_assigned: int = None, assignment_timeout: float = None):
+        self.max_assigned = max_assigned or settings.AUDITOR_MAX_ASSIGNED
+        self.assignment_timeout = timedelta(
+            seconds=assignment_timeout or settings.AUDITOR_ASSIGNMENT_TIMEOUT
+        )
+
+    async def current_load(self, db: AsyncSession, auditor_id: int) -> int:
+        """Quantidade de certificações pendentes atribuídas ao auditor"""
+        return await db.scalar(
+            select(func.count(database_models.Certification.id)).where(
+                database_models.Certification.auditor_id == auditor_id,
+                database_models.Certification.status == CertificationStatus.PENDING,
+            )
+        )
+
+    def _load_subquery(self):
+        """Carga do auditor da linha externa, para ordenar e filtrar auditores"""
+        return (
+            select(func.count(database_models.Certification.id))
+            .where(
+                database_models.Certification.auditor_id == database_models.Auditor.id,
+                database_models.Certification.status == CertificationStatus.PENDING,
+            )
+            .correlate(database_models.Auditor)
+            .scalar_subquery()
+        )
+
+    async def release_stale(self, db: AsyncSession) -> int:
+        """Devolve à fila as atribuições expiradas ou de auditores inativos.
+
+        Não faz commit; retorna quantas certificações foram liberadas.
+        """
+        released = (
+            await db.execute(
+                update(database_models.Certification)
+                .where(
+                    database_models.Certification.status == CertificationStatus.PENDING,
+                    database_models.Certification.auditor_id.is_not(None),
+                    or_(
+                        database_models.Certification.assigned_at
+                        < datetime.now() - self.assignment_timeout,
+                        database_models.Certification.auditor_id.in_(
+                            select(database_models.Auditor.id).where(
+                                database_models.Auditor.is_active == False
+                            )
+                        ),
+                    ),
+                )
+                .values(auditor_id=None, assigned_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        ).rowcount
+        if released:
+            logger.info(f"{released} certificações devolvidas à fila de auditores")
+        return released
+
+    async def assign(
+        self, db: AsyncSession, certification: database_models.Certification
+    ):
+        """Atribui a certificação ao auditor ativo menos carregado da especialidade.
+
+        Não faz commit; retorna o id do auditor ou None quando todos os
+        auditores da especialidade estão no limite.
+        """
+        load = self._load_subquery()
+        candidates = (
+            await db.scalars(
+                select(database_models.Auditor.id)
+                .where(
+                    database_models.Auditor.is_active == True,
+                    json_array_contains(
+                        db,
+                        database_models.Auditor.specializations,
+                        certification.certification_type,
+                    ),
+                    load < self.max_assigned,
+                )
+                .order_by(load, database_models.Auditor.id)
+            )
+        ).all()
+
+        for auditor_id in candidates:
+            # Mesma trava de claim_next: a carga é conferida de novo com o auditor travado
+            await db.execute(
+                select(database_models.Auditor.id)
+                .where(database_models.Auditor.id == auditor_id)
+                .with_for_update()
+            )
+            if await self.current_load(db, auditor_id) >= self.max_assigned:
+                continue
+
+            certification.auditor_id = auditor_id
+            certification.assigned_at = datetime.now()
+            await db.flush()
+            return auditor_id
+        return None
+
+    async def assign_pending(
+        self, db: AsyncSession, limit: int = 100, certification_ids: list[int] = None
+    ) -> int:
+        """Libera atribuições paradas e distribui as pendentes sem auditor.
+
+        Com `certification_ids` distribui apenas essas certificações (todas,
+        sem o limite). Não faz commit; retorna quantas foram atribuídas.
+        """
+        await self.release_stale(db)
+        query = (
+            select(database_models.Certification)
+            .where(
+                database_models.Certification.status == CertificationStatus.PENDING,
+                database_models.Certification.auditor_id.is_(None),
+            )
+            .order_by(database_models.Certification.created_at)
+            .with_for_update(skip_locked=True)
+        )
+        if certification_ids is not None:
+            query = query.where(database_models.Certification.id.in_(certification_ids))
+        else:
+            query = query.limit(limit)
+        pending = (await db.scalars(query)).all()
+
+        assigned = 0
+        for certification in pending:
+            if await self.assign(db, certification) is not None:
+                assigned += 1
+        return assigned
+
+    async def claim_next(self, db: AsyncSession, auditor: database_models.Auditor):
+        """Atribui ao auditor a próxima certificação pendente da sua especialidade"""
+        # Em transação própria: os retornos abaixo desfazem a reivindicação
+        if await self.release_stale(db):
+            await db.commit()
+
+        # Travar o auditor serializa as reivindicações dele e mantém o limite exato
+        await db.execute(
+            select(database_models.Auditor.id)
+            .where(database_models.Auditor.id == auditor.id)
+            .with_for_update()
+        )
+
+        load = await self.current_load(db, auditor.id)
+        if load >= self.max_assigned:
+            await db.rollback()
+            return {
+                "success": False,
+                "error": f"Auditor já possui {load} certificações em análise",
+            }
+
+        certification = await db.scalar(
+            select(database_models.Certification)
+            .where(
+                database_models.Certification.status == CertificationStatus.PENDING,
+                database_models.Certification.auditor_id.is_(None),
+                database_models.Certification.certification_type.in_(
+                    auditor.specializations
+                ),
+            )
+            .order_by(database_models.Certification.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if certification is None:
+            await db.rollback()
+            return {"success": True, "certification": None, "load": load}
+
+        certification.auditor_id = auditor.id
+        certification.assigned_at = datetime.now()
+        await db.commit()
+        await db.refresh(certification)
+
+        logger.info(f"Certificação {certification.id} atribuída ao auditor {auditor.id}")
+        return {"success": True, "certification": certification, "load": load + 1}
@@ -0,0 +1,325 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.config import CERTIFICATION_ASSETS, get_settings
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.sequenceManager import is_bad_sequence_error
+from sqlalchemy import delete, select, update
+from stellar_sdk.exceptions import BadRequestError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Resultados de clawback que não mudam ao reenviar: não há token a recuperar
+# (saldo zero ou sem trustline) ou a trustline não permite clawback
+UNRECOVERABLE_CLAWBACK_CODES = {
+    "op_underfunded",
+    "op_no_trust",
+    "op_not_clawback_enabled",
+}
+
+
+class CertificationExpirySweeper:
+    """Expira as certificações vencidas e recupera os tokens na blockchain.
+
+    Cada varredura marca todas as certificações aprovadas com expires_at
+    vencido em um único UPDATE (pelo índice de status e expires_at) e as
+    retira do índice de certificações ativas. Em seguida recupera os tokens
+    com operações de clawback do emissor, até
+    CERTIFICATION_REVOCATION_BATCH_SIZE por transação.
+
+    Antes do envio o lote é marcado com o hash da transação e gravado, sem
+    manter linhas bloqueadas durante a chamada ao Horizon. Um envio sem
+    resposta (ex.: timeout) fica pendente e, após
+    CERTIFICATION_REVOCATION_TIMEOUT, o hash é consultado no Horizon antes de
+    qualquer reenvio, para que um token não seja recuperado duas vezes.
+    """
+
+    def __init__(
+        self, stellar_service, session_factory=AsyncSessionLocal, batch_size: int = None
+    ):
+        self.stellar_service = stellar_service
+        self.chain_mirror = ChainMirrorService(stellar_service)
+        self.session_factory = session_factory
+        self.batch_size = min(
+            batch_size or settings.CERTIFICATION_REVOCATION_BATCH_SIZE, 100
+        )
+
+    async def expire_due(self) -> int:
+        """Marca como expiradas as certificações vencidas; retorna quantas"""
+        now = datetime.now()
+        async with self.session_factory() as db:
+            expired = (
+                await db.execute(
+                    update(database_models.Certification)
+                    .where(
+                        database_models.Certification.status
+                        == CertificationStatus.APPROVED,
+                        database_models.Certification.expires_at <= now,
+                    )
+                    .values(status=CertificationStatus.EXPIRED)
+                    .execution_options(synchronize_session=False)
+                )
+            ).rowcount
+
+            if expired:
+                # Renovações apontam para a certificação mais recente e continuam no índice
+                await db.execute(
+                    delete(database_models.RestaurantActiveCertification).where(
+                        database_models.RestaurantActiveCertification.certification_id.in_(
+                            select(database_models.Certification.id).where(
+                                database_models.Certification.status
+                                == CertificationStatus.EXPIRED
+                            )
+                        )
+                    )
+                )
+
+            await db.commit()
+            return expired
+
+    def _group(self, rows) -> dict:
+        """Agrupa as certificações por conta e asset (uma operação por grupo)"""
+        grouped = {}
+        for row in rows:
+            asset_code = CERTIFICATION_ASSETS[row.certification_type]
+            grouped.setdefault((row.stellar_public_key, asset_code), []).append(row.id)
+        return grouped
+
+    async def _locked_expired(self, db, *criteria, limit: int = None):
+        """Certificações expiradas ainda não revogadas, com a conta do restaurante"""
+        query = (
+            select(
+                database_models.Certification.id,
+                database_models.Certification.certification_type,
+                database_models.Certification.revocation_hash,
+                database_models.Restaurant.stellar_public_key,
+            )
+            .join(database_models.Restaurant)
+            .where(
+                database_models.Certification.status == CertificationStatus.EXPIRED,
+                database_models.Certification.revoked_at.is_(None),
+                *criteria,
+            )
+            .order_by(database_models.Certification.expires_at)
+            .with_for_update(skip_locked=True, of=database_models.Certification)
+        )
+        if limit:
+            query = query.limit(limit)
+        return (await db.execute(query)).all()
+
+    async def _release(self, db, transaction_hash: str):
+        """Devolve as certificações de um lote não confirmado para reenvio"""
+        await db.execute(
+            update(database_models.Certification)
+            .where(
+                database_models.Certification.revocation_hash == transaction_hash,
+                database_models.Certification.revoked_at.is_(None),
+            )
+            .values(revocation_hash=None, revocation_started_at=None)
+        )
+
+    async def revoke_next_batch(self) -> int:
+        """Recupera os tokens do próximo lote de certificações expiradas.
+
+        Retorna quantas certificações foram resolvidas (revogadas ou marcadas
+        como irrecuperáveis); zero encerra a varredura.
+        """
+        issuer = self.stellar_service.issuer_keypair.public_key
+
+        async with self.session_factory() as db:
+            rows = await self._locked_expired(
+                db,
+                database_models.Certification.revocation_hash.is_(None),
+                limit=self.batch_size,
+            )
+            if not rows:
+                await db.rollback()
+                return 0
+
+            # Renovações vencidas do mesmo restaurante são recuperadas juntas
+            grouped = self._group(rows)
+            source_account = await self.stellar_service.sequence_manager.next_account(
+                issuer
+            )
+            transaction = self.stellar_service.build_clawback_batch_transaction(
+                source_account,
+                [
+                    (public_key, asset_code, len(certification_ids))
+                    for (public_key, asset_code), certification_ids in grouped.items()
+                ],
+            )
+            transaction_hash = transaction.hash_hex()
+
+            # Marcar o lote como em envio e liberar as linhas antes do Horizon
+            await db.execute(
+                update(database_models.Certification)
+                .where(database_models.Certification.id.in_([row.id for row in rows]))
+                .values(
+                    revocation_hash=transaction_hash,
+                    revocation_started_at=datetime.now(),
+                )
+            )
+            await db.commit()
+
+        try:
+            await self.stellar_service.submit_transaction(transaction)
+        except BadRequestError as e:
+            # Rejeitada pelo Horizon: a transação nunca entrará no ledger
+            if is_bad_sequence_error(e):
+                await self.stellar_service.sequence_manager.resync(issuer)
+            return await self._handle_rejection(transaction_hash, grouped, e)
+        except Exception as e:
+            # Sem resposta não se sabe se entrou no ledger; o hash é verificado depois
+            logger.error(f"Lote de revogação {transaction_hash} sem confirmação: {e}")
+            return 0
+
+        return await self._confirm(transaction_hash, grouped)
+
+    async def _confirm(self, transaction_hash: str, grouped: dict) -> int:
+        """Conclui as revogações de uma transação incluída no ledger"""
+        issuer = self.stellar_service.issuer_keypair.public_key
+        async with self.session_factory() as db:
+            revoked = (
+                await db.execute(
+                    update(database_models.Certification)
+                    .where(
+                        database_models.Certification.revocation_hash == transaction_hash,
+                        database_models.Certification.revoked_at.is_(None),
+                    )
+                    .values(revoked_at=datetime.now())
+                )
+            ).rowcount
+
+            # Refletir a revogação no histórico e no espelho local de saldos
+            for (public_key, asset_code), certification_ids in grouped.items():
+                await db.run_sync(
+                    self.chain_mirror.record_operation,
+                    transaction_hash=transaction_hash,
+                    operation_type="clawback",
+                    source_account=issuer,
+                    public_key=public_key,
+                    asset_code=asset_code,
+                    asset_issuer=issuer,
+                    amount=-Decimal(len(certification_ids)),
+                )
+                # A mesma conta pode ter mais de um asset no lote
+                await db.flush()
+            await db.commit()
+
+        for public_key, _ in grouped:
+            self.stellar_service.invalidate_account(public_key)
+
+        logger.info(f"Lote de {revoked} certificações revogado: {transaction_hash}")
+        return revoked
+
+    async def _handle_rejection(
+        self, transaction_hash: str, grouped: dict, error: BadRequestError
+    ) -> int:
+        """Marca as certificações cujo clawback nunca terá sucesso.
+
+        Uma única operação inválida derruba a transação inteira; as demais
+        voltam a ficar pendentes e são reenviadas no próximo lote.
+        """
+        operation_codes = []
+        if error.extras:
+            operation_codes = error.extras.get("result_codes", {}).get("operations", [])
+
+        unrecoverable = []
+        if len(operation_codes) == len(grouped):
+            for ((public_key, _), certification_ids), code in zip(
+                grouped.items(), operation_codes
+            ):
+                if code in UNRECOVERABLE_CLAWBACK_CODES:
+                    unrecoverable.extend(certification_ids)
+                    logger.warning(
+                        f"Tokens das certificações {certification_ids} ({public_key}) "
+                        f"não puderam ser recuperados: {code}"
+                    )
+        else:
+            logger.error(f"Erro ao revogar lote de certificações: {error}")
+
+        async with self.session_factory() as db:
+            if unrecoverable:
+                await db.execute(
+                    update(database_models.Certification)
+                    .where(database_models.Certification.id.in_(unrecoverable))
+                    .values(
+                        revoked_at=datetime.now(),
+                        revocation_hash=None,
+                        revocation_started_at=None,
+                    )
+                )
+            await self._release(db, transaction_hash)
+            await db.commit()
+        return len(unrecoverable)
+
+    async def reconcile_in_flight(self) -> int:
+        """Verifica no Horizon os lotes enviados sem confirmação.
+
+        Lotes encontrados no ledger têm as revogações concluídas; os ausentes
+        (ou que falharam) já passaram do timeout da transação e não podem
+        mais entrar, então voltam a ficar pendentes. Retorna quantas
+        certificações foram revogadas.
+        """
+        started_before = datetime.now() - timedelta(
+            seconds=settings.CERTIFICATION_REVOCATION_TIMEOUT
+        )
+        async with self.session_factory() as db:
+            rows = await self._locked_expired(
+                db,
+                database_models.Certification.revocation_hash.is_not(None),
+                database_models.Certification.revocation_started_at < started_before,
+            )
+            in_flight = {}
+            for row in rows:
+                in_flight.setdefault(row.revocation_hash, []).append(row)
+            await db.rollback()
+
+        revoked = 0
+        for transaction_hash, transaction_rows in in_flight.items():
+            transaction = await self.stellar_service.get_transaction(transaction_hash)
+            if transaction is not None and transaction.get("successful"):
+                revoked += await self._confirm(
+                    transaction_hash, self._group(transaction_rows)
+                )
+                continue
+
+            logger.warning(f"Lote de revogação {transaction_hash} fora do ledger; reenviando")
+            async with self.session_factory() as db:
+                await self._release(db, transaction_hash)
+                await db.commit()
+        return revoked
+
+    async def sweep(self):
+        """Executa uma varredura completa; retorna (expiradas, revogadas)"""
+        expired = await self.expire_due()
+        revoked = await self.reconcile_in_flight()
+        while True:
+            resolved = await self.revoke_next_batch()
+            if not resolved:
+                break
+            revoked += resolved
+        return expired, revoked
+
+    async def run(self, interval: float = None):
+        """Executa varreduras periódicas até ser cancelado"""
+        if not self.stellar_service.issuer_keypair:
+            raise ValueError("Chave privada do emissor não configurada")
+
+        interval = interval or settings.CERTIFICATION_EXPIRY_SWEEP_INTERVAL
+        while True:
+            try:
+                expired, revoked = await self.sweep()
+                if expired or revoked:
+                    logger.info(
+                        f"Varredura de expiração: {expired} expiradas, {revoked} revogadas"
+                    )
+            except Exception as e:
+                logger.error(f"Erro na varredura de expiração: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from app.config import CERTIFICATION_ASSETS
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from sqlalchemy import distinct, func, insert, select
+from sqlalchemy.orm import Session
+
+# Permite buscar tanto pelo tipo ("gluten_free") quanto pelo asset ("GLUTENFREE")
+ASSET_TO_CERTIFICATION_TYPE = {
+    asset_code: cert_type for cert_type, asset_code in CERTIFICATION_ASSETS.items()
+}
+
+
+class CertificationIndexService:
+    """Mantém a tabela restaurant_active_certifications usada nas buscas.
+
+    A tabela é atualizada na aprovação (e na expiração) das certificações,
+    permitindo que o filtro "possui todas as certificações X, Y" seja
+    resolvido pelo banco com paginação, sem consultar a blockchain.
+    """
+
+    def normalize_types(self, certifications: list[str]):
+        """Converte tipos/asset codes informados em tipos de certificação.
+
+        Retorna None se algum valor não corresponder a uma certificação conhecida.
+        """
+        cert_types = set()
+        for value in certifications:
+            if value.lower() in CERTIFICATION_ASSETS:
+                cert_types.add(value.lower())
+            elif value.upper() in ASSET_TO_CERTIFICATION_TYPE:
+                cert_types.add(ASSET_TO_CERTIFICATION_TYPE[value.upper()])
+            else:
+                return None
+        return cert_types
+
+    def activate(
+        self,
+        db: Session,
+        restaurant_id: int,
+        certification_type: str,
+        certification_id: int = None,
+    ):
+        """Marca uma certificação como ativa para o restaurante"""
+        entry = db.query(database_models.RestaurantActiveCertification).filter(
+            database_models.RestaurantActiveCertification.restaurant_id == restaurant_id,
+            database_models.RestaurantActiveCertification.certification_type
+            == certification_type,
+        ).first()
+
+        if entry is None:
+            entry = database_models.RestaurantActiveCertification(
+                restaurant_id=restaurant_id,
+                certification_type=certification_type,
+            )
+            db.add(entry)
+
+        entry.certification_id = certification_id
+        entry.activated_at = datetime.now()
+
+    def rebuild(self, db: Session) -> int:
+        """Reconstrói o índice a partir das certificações aprovadas e não expiradas.
+
+        Um único INSERT ... SELECT com a certificação mais recente de cada
+        restaurante e tipo; retorna quantas entradas foram criadas.
+        """
+        active = database_models.RestaurantActiveCertification
+        certifications = database_models.Certification
+
+        db.query(active).delete(synchronize_session=False)
+        latest = (
+            select(
+                certifications.certification_type,
+                certifications.restaurant_id,
+                func.max(certifications.id),
+                func.max(certifications.issued_at),
+            )
+            .where(
+                certifications.status == CertificationStatus.APPROVED,
+                certifications.expires_at > datetime.now(),
+            )
+            .group_by(certifications.certification_type, certifications.restaurant_id)
+        )
+        inserted = db.execute(
+            insert(active).from_select(
+                ["certification_type", "restaurant_id", "certification_id", "activated_at"],
+                latest,
+            )
+        ).rowcount
+        db.commit()
+        return inserted
+
+    def restaurants_with_all(self, cert_types: set[str]):
+        """Query de restaurantes que possuem todas as certificações informadas"""
+        matching_ids = (
+            select(database_models.RestaurantActiveCertification.restaurant_id)
+            .where(
+                database_models.RestaurantActiveCertification.certification_type.in_(
+                    cert_types
+                )
+            )
+            .group_by(database_models.RestaurantActiveCertification.restaurant_id)
+            .having(
+                func.count(
+                    distinct(
+                        database_models.RestaurantActiveCertification.certification_type
+                    )
+                )
+                == len(cert_types)
+            )
+        )
+
+        return (
+            select(database_models.Restaurant)
+            .where(database_models.Restaurant.id.in_(matching_ids))
+            .order_by(database_models.Restaurant.id)
+        )
@@ -0,0 +1,245 @@
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from app.models import database_models
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class ChainMirrorService:
+    """Mantém a tabela restaurant_chain_balances sincronizada com a blockchain.
+
+    As rotas de listagem leem as certificações desta tabela com uma única
+    query, e só consultam o Horizon quando uma atualização é pedida.
+    """
+
+    def __init__(self, stellar_service):
+        self.stellar_service = stellar_service
+
+    def get_certifications(self, db: Session, public_keys: list[str]):
+        """Obtém as certificações espelhadas de várias contas em uma query"""
+        mirrored = {
+            public_key: {"certifications": [], "synced_at": None}
+            for public_key in public_keys
+        }
+        if not public_keys:
+            return mirrored
+
+        rows = (
+            db.query(database_models.RestaurantChainBalance)
+            .filter(
+                database_models.RestaurantChainBalance.stellar_public_key.in_(
+                    public_keys
+                )
+            )
+            .order_by(database_models.RestaurantChainBalance.asset_code)
+            .all()
+        )
+
+        for row in rows:
+            entry = mirrored[row.stellar_public_key]
+            entry["certifications"].append(
+                {
+                    "asset_code": row.asset_code,
+                    "balance": f"{row.balance:.7f}",
+                    "issuer": row.asset_issuer,
+                }
+            )
+            if entry["synced_at"] is None or row.synced_at < entry["synced_at"]:
+                entry["synced_at"] = row.synced_at
+
+        return mirrored
+
+    def store_certifications(
+        self, db: Session, public_key: str, certifications: list[dict]
+    ):
+        """Substitui o espelho de uma conta pelos saldos informados"""
+        synced_at = datetime.now()
+        db.query(database_models.RestaurantChainBalance).filter(
+            database_models.RestaurantChainBalance.stellar_public_key == public_key
+        ).delete(synchronize_session=False)
+
+        for certification in certifications:
+            db.add(
+                database_models.RestaurantChainBalance(
+                    stellar_public_key=public_key,
+                    asset_code=certification["asset_code"],
+                    asset_issuer=certification["issuer"],
+                    balance=Decimal(certification["balance"]),
+                    synced_at=synced_at,
+                )
+            )
+
+    def store_new_trustlines(self, db: Session, public_key: str, asset_codes: list[str]):
+        """Espelha trustlines recém-criadas, que começam com saldo zero"""
+        self.store_certifications(
+            db,
+            public_key,
+            [
+                {
+                    "asset_code": asset_code,
+                    "balance": "0",
+                    "issuer": self.stellar_service.issuer_keypair.public_key,
+                }
+                for asset_code in asset_codes
+            ],
+        )
+
+    def apply_balance_change(
+        self,
+        db: Session,
+        public_key: str,
+        asset_code: str,
+        asset_issuer: str,
+        amount: Decimal,
+    ):
+        """Aplica uma variação de saldo conhecida sem consultar o Horizon"""
+        row = (
+            db.query(database_models.RestaurantChainBalance)
+            .filter(
+                database_models.RestaurantChainBalance.stellar_public_key == public_key,
+                database_models.RestaurantChainBalance.asset_code == asset_code,
+            )
+            .first()
+        )
+
+        if row is None:
+            row = database_models.RestaurantChainBalance(
+                stellar_public_key=public_key,
+                asset_code=asset_code,
+                asset_issuer=asset_issuer,
+                balance=Decimal("0"),
+            )
+            db.add(row)
+
+        row.balance = Decimal(row.balance) + Decimal(amount)
+        row.synced_at = datetime.now()
+
+    def record_operation(
+        self,
+        db: Session,
+        transaction_hash: str,
+        operation_type: str,
+        source_account: str,
+        public_key: str,
+        asset_code: str,
+        asset_issuer: str,
+        amount: Decimal,
+        memo: str = None,
+        created_at: datetime = None,
+        paging_token: str = None,
+    ) -> bool:
+        """Registra uma operação de certificação no histórico e no espelho de saldos.
+
+        Idempotente por (transaction_hash, conta, asset): quando a operação já
+        foi registrada (pela rota que a emitiu ou pela ingestão) apenas a
+        confirma com o paging token, sem aplicar o saldo de novo. Retorna se
+        a operação foi inserida.
+        """
+        transactions = database_models.CertificationTransaction
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        inserted = db.execute(
+            dialect.insert(transactions)
+            .values(
+                paging_token=paging_token,
+                transaction_hash=transaction_hash,
+                operation_type=operation_type,
+                source_account=source_account,
+                stellar_public_key=public_key,
+                asset_code=asset_code,
+                amount=abs(amount),
+                memo=memo,
+                created_at=created_at or datetime.now(),
+            )
+            .on_conflict_do_nothing()
+            .returning(transactions.id)
+        ).first()
+
+        if inserted is None:
+            if paging_token is not None:
+                # Confirmação da ingestão para uma operação emitida localmente
+                db.execute(
+                    update(transactions)
+                    .where(
+                        transactions.transaction_hash == transaction_hash,
+                        transactions.stellar_public_key == public_key,
+                        transactions.asset_code == asset_code,
+                        transactions.paging_token.is_(None),
+                    )
+                    .values(paging_token=paging_token, memo=memo, created_at=created_at)
+                )
+            return False
+
+        self.apply_balance_change(db, public_key, asset_code, asset_issuer, amount)
+        return True
+
+    def get_certification_transactions(
+        self, db: Session, public_key: str, limit: int = 50
+    ):
+        """Obtém o histórico de certificações de uma conta a partir das tabelas locais"""
+        rows = (
+            db.query(database_models.CertificationTransaction)
+            .filter(
+                database_models.CertificationTransaction.stellar_public_key == public_key
+            )
+            .order_by(database_models.CertificationTransaction.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+        return [
+            {
+                "hash": row.transaction_hash,
+                "created_at": row.created_at.isoformat(),
+                "memo": row.memo,
+                "source_account": row.source_account,
+                "operation_type": row.operation_type,
+                "asset_code": row.asset_code,
+                "amount": f"{row.amount:.7f}",
+            }
+            for row in rows
+        ]
+
+    async def refresh(self, db: AsyncSession, public_key: str) -> bool:
+        """Atualiza o espelho de uma conta a partir do Horizon"""
+        account = await self.stellar_service.get_account_info(
+            public_key, use_cache=False
+        )
+        if not account:
+            # Mantém o último estado conhecido se o Horizon não responder
+            logger.warning(f"Não foi possível atualizar o espelho da conta {public_key}")
+            return False
+
+        await db.run_sync(
+            self.store_certifications,
+            public_key,
+            self.stellar_service.extract_certifications(account),
+        )
+        await db.commit()
+        return True
+
+    async def refresh_many(self, db: AsyncSession, public_keys: list[str]):
+        """Atualiza o espelho de várias contas com consultas paralelas ao Horizon.
+
+        Retorna as chaves que não puderam ser atualizadas.
+        """
+        results = await self.stellar_service.get_restaurant_certifications_bulk(
+            public_keys, use_cache=False
+        )
+
+        failed = []
+        for public_key, result in results.items():
+            if result["success"]:
+                await db.run_sync(
+                    self.store_certifications, public_key, result["certifications"]
+                )
+            else:
+                failed.append(public_key)
+
+        await db.commit()
+        return failed
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from stellar_sdk import Keypair
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ChannelAccountPool:
+    """Pool de contas de canal usadas como origem das transações do emissor.
+
+    Cada transação em andamento consome o número de sequência de uma conta
+    de canal diferente, enquanto o emissor assina apenas as operações de
+    pagamento. Assim várias emissões podem ser enviadas no mesmo ledger sem
+    disputar a sequência da conta emissora.
+
+    Os empréstimos ficam na tabela channel_accounts (SELECT ... FOR UPDATE
+    SKIP LOCKED), então os vários workers do uvicorn nunca usam a mesma conta
+    ao mesmo tempo. Enquanto a conta está em uso o empréstimo é renovado a
+    cada terço de CHANNEL_LEASE_TIMEOUT, de modo que um envio lento (timeout
+    do Horizon, reenvio após tx_bad_seq) não perde a conta; um empréstimo não
+    devolvido (ex.: processo encerrado) expira após CHANNEL_LEASE_TIMEOUT.
+    """
+
+    def __init__(self, secret_keys: list[str] = None, session_factory=AsyncSessionLocal):
+        if secret_keys is None:
+            secret_keys = [
+                key.strip()
+                for key in settings.CHANNEL_SECRET_KEYS.split(",")
+                if key.strip()
+            ]
+        self.keypairs = {
+            keypair.public_key: keypair
+            for keypair in (Keypair.from_secret(secret) for secret in secret_keys)
+        }
+        self.session_factory = session_factory
+        self._registered = False
+        # Acorda quem aguarda uma conta quando este processo devolve uma
+        self._released = asyncio.Event()
+
+    @property
+    def size(self) -> int:
+        return len(self.keypairs)
+
+    async def _register(self, db):
+        """Garante uma linha em channel_accounts para cada conta configurada"""
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        await db.execute(
+            dialect.insert(database_models.ChannelAccount)
+            .values([{"public_key": public_key} for public_key in self.keypairs])
+            .on_conflict_do_nothing()
+        )
+        await db.commit()
+        self._registered = True
+
+    async def _acquire(self):
+        """Reserva uma conta livre (ou com empréstimo expirado); None se não houver"""
+        now = datetime.now()
+        async with self.session_factory() as db:
+            if not self._registered:
+                await self._register(db)
+
+            is_free = or_(
+                database_models.ChannelAccount.leased_until.is_(None),
+                database_models.ChannelAccount.leased_until < now,
+            )
+            channel = (
+                await db.execute(
+                    select(
+                        database_models.ChannelAccount.public_key,
+                        database_models.ChannelAccount.leased_until,
+                    )
+                    .where(
+                        database_models.ChannelAccount.public_key.in_(self.keypairs),
+                        is_free,
+                    )
+                    .order_by(database_models.ChannelAccount.leased_until.nulls_first())
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+            ).first()
+            if channel is None:
+                await db.rollback()
+                return None
+
+            # A condição é verificada de novo no UPDATE: sem FOR UPDATE (SQLite)
+            # outra sessão pode ter reservado a mesma conta nesse intervalo
+            lease_id = str(uuid.uuid4())
+            claimed = (
+                await db.execute(
+                    update(database_models.ChannelAccount)
+                    .where(
+                        database_models.ChannelAccount.public_key == channel.public_key,
+                        is_free,
+                    )
+                    .values(
+                        lease_id=lease_id,
+                        leased_until=now
+                        + timedelta(seconds=settings.CHANNEL_LEASE_TIMEOUT),
+                    )
+                )
+            ).rowcount
+            await db.commit()
+            if not claimed:
+                return None
+
+            if channel.leased_until is not None:
+                logger.warning(f"Empréstimo expirado da conta de canal {channel.public_key}")
+            return self.keypairs[channel.public_key], lease_id
+
+    async def _renew(self, public_key: str, lease_id: str) -> bool:
+        """Estende o empréstimo; False se ele já expirou e foi reservado por outro"""
+        async with self.session_factory() as db:
+            renewed = (
+                await db.execute(
+                    update(database_models.ChannelAccount)
+                    .where(
+                        database_models.ChannelAccount.public_key == public_key,
+                        database_models.ChannelAccount.lease_id == lease_id,
+                    )
+                    .values(
+                        leased_until=datetime.now()
+                        + timedelta(seconds=settings.CHANNEL_LEASE_TIMEOUT)
+                    )
+                )
+            ).rowcount
+            await db.commit()
+            return bool(renewed)
+
+    async def _keep_alive(self, public_key: str, lease_id: str):
+        """Renova o empréstimo periodicamente até ser cancelado"""
+        while True:
+            await asyncio.sleep(settings.CHANNEL_LEASE_TIMEOUT / 3)
+            try:
+                if not await self._renew(public_key, lease_id):
+                    logger.error(f"Empréstimo da conta de canal {public_key} perdido")
+                    return
+            except Exception as e:
+                logger.warning(f"Erro ao renovar empréstimo da conta de canal {public_key}: {e}")
+
+    async def _release(self, public_key: str, lease_id: str):
+        async with self.session_factory() as db:
+            await db.execute(
+                update(database_models.ChannelAccount)
+                .where(
+                    database_models.ChannelAccount.public_key == public_key,
+                    database_models.ChannelAccount.lease_id == lease_id,
+                )
+                .values(lease_id=None, leased_until=None)
+            )
+            await db.commit()
+        self._released.set()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Empresta uma conta de canal, aguardando se todas estiverem em uso"""
+        while True:
+            leased = await self._acquire()
+            if leased is not None:
+                break
+            # Devoluções de outros processos são percebidas pela consulta periódica
+            self._released.clear()
+            try:
+                await asyncio.wait_for(
+                    self._released.wait(), settings.CHANNEL_LEASE_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        keypair, lease_id = leased
+        keep_alive = asyncio.create_task(self._keep_alive(keypair.public_key, lease_id))
+        try:
+            yield keypair
+        finally:
+            keep_alive.cancel()
+            await asyncio.gather(keep_alive, return_exceptions=True)
+            await self._release(keypair.public_key, lease_id)
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import httpx
+from app.config import get_settings
+from stellar_sdk import __version__ as stellar_sdk_version
+from stellar_sdk.client.base_async_client import BaseAsyncClient
+from stellar_sdk.client.response import Response
+from stellar_sdk.exceptions import (
+    ConnectionError,
+    ContentSizeLimitExceededError,
+    StreamClientError,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+IDENTIFICATION_HEADERS = {
+    "X-Client-Name": "py-stellar-base",
+    "X-Client-Version": stellar_sdk_version,
+}
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpxAsyncClient(BaseAsyncClient):
+    """Cliente HTTP assíncrono do SDK Stellar sobre um único httpx.AsyncClient.
+
+    Mantém as conexões abertas (keep-alive) entre chamadas, usa HTTP/2
+    quando o pacote h2 está instalado e limita as requisições simultâneas
+    por host, de modo que Horizon e friendbot compartilhem o mesmo pool sem
+    que um deles ocupe todas as conexões.
+    """
+
+    def __init__(
+        self,
+        http2: bool = None,
+        max_connections: int = None,
+        max_connections_per_host: int = None,
+    ):
+        http2 = settings.HTTP_HTTP2 if http2 is None else http2
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("Pacote h2 não instalado; usando HTTP/1.1")
+            http2 = False
+
+        self.http2 = http2
+        self.max_connections_per_host = (
+            max_connections_per_host or settings.HTTP_MAX_CONNECTIONS_PER_HOST
+        )
+        self.timeout = httpx.Timeout(
+            settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        )
+        self.post_timeout = httpx.Timeout(
+            settings.HTTP_POST_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        )
+        max_connections = max_connections or settings.HTTP_MAX_CONNECTIONS
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            headers=IDENTIFICATION_HEADERS,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+    def _slots(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_slots[host]
+
+    @staticmethod
+    def _to_response(response: httpx.Response, text: str) -> Response:
+        return Response(
+            status_code=response.status_code,
+            text=text,
+            headers=dict(response.headers),
+            url=str(response.url),
+        )
+
+    async def get(
+        self, url: str, params=None, max_content_size: int = None
+    ) -> Response:
+        try:
+            async with self._slots(url):
+                async with self._client.stream("GET", url, params=params) as response:
+                    content = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        content.extend(chunk)
+                        if max_content_size and len(content) > max_content_size:
+                            raise ContentSizeLimitExceededError(
+                                limit=max_content_size, content_size=len(content)
+                            )
+                    text = content.decode(response.encoding or "utf-8")
+                    return self._to_response(response, text)
+        except httpx.HTTPError as e:
+            raise ConnectionError(e) from e
+
+    async def post(self, url: str, data=None, json_data=None) -> Response:
+        try:
+            async with self._slots(url):
+                response = await self._client.post(
+                    url, data=data, json=json_data, timeout=self.post_timeout
+                )
+            return self._to_response(response, response.text)
+        except httpx.HTTPError as e:
+            raise ConnectionError(e) from e
+
+    async def stream(self, url: str, params=None):
+        """Acompanha um endpoint SSE do Horizon, reconectando a partir do último id"""
+        query_params = dict(params or {})
+        retry = 1.0
+        stream_timeout = httpx.Timeout(
+            settings.HTTP_STREAM_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        )
+
+        while True:
+            try:
+                async with self._client.stream(
+                    "GET",
+                    url,
+                    params=query_params,
+                    headers={"Accept": "text/event-stream"},
+                    timeout=stream_timeout,
+                ) as response:
+                    response.raise_for_status()
+                    event_id, data = None, []
+                    async for line in response.aiter_lines():
+                        if line:
+                            field, _, value = line.partition(":")
+                            value = value[1:] if value.startswith(" ") else value
+                            if field == "data":
+                                data.append(value)
+                            elif field == "id":
+                                event_id = value
+                            elif field == "retry" and value.isdigit():
+                                retry = int(value) / 1000
+                            continue
+
+                        # Linha em branco encerra o evento
+                        if event_id:
+                            query_params["cursor"] = event_id
+                        payload = "\n".join(data)
+                        event_id, data = None, []
+                        if payload and payload not in ('"hello"', '"byebye"'):
+                            try:
+                                yield json.loads(payload)
+                            except json.JSONDecodeError:
+                                pass
+
+            except (httpx.TimeoutException, httpx.RemoteProtocolError) as e:
+                logger.warning(
+                    f"Stream interrompido ({e!r}), reconectando a partir do cursor "
+                    f"{query_params.get('cursor')}"
+                )
+            except httpx.HTTPError as e:
+                raise StreamClientError(
+                    query_params.get("cursor"), "Failed to get stream message."
+                ) from e
+
+            # O Horizon encerra o stream periodicamente; continua do último evento
+            await asyncio.sleep(retry)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+@lru_cache()
+def get_http_client() -> HttpxAsyncClient:
+    """Cliente HTTP compartilhado por todas as chamadas ao Horizon e ao friendbot"""
+    return HttpxAsyncClient()
+
+
+async def close_http_client():
+    if get_http_client.cache_info().currsize:
+        await get_http_client().close()
+        get_http_client.cache_clear()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class LedgerIngestionService:
+    """Ingere incrementalmente as operações da conta emissora.
+
+    Acompanha o stream SSE de operações do emissor no Horizon e aplica cada
+    pagamento/clawback de certificação às tabelas locais (espelho de saldos e
+    histórico). O paging token é salvo junto com cada operação, então um
+    reinício continua do ponto em que parou sem reprocessar o histórico.
+    """
+
+    CURSOR_NAME = "issuer_operations"
+
+    def __init__(self, stellar_service, chain_mirror, session_factory=AsyncSessionLocal):
+        self.stellar_service = stellar_service
+        self.chain_mirror = chain_mirror
+        self.session_factory = session_factory
+
+    def load_cursor(self, db: Session) -> str:
+        """Obtém o último paging token processado"""
+        cursor = db.query(database_models.IngestionCursor).filter(
+            database_models.IngestionCursor.name == self.CURSOR_NAME
+        ).first()
+        return cursor.paging_token if cursor else settings.INGESTION_START_CURSOR
+
+    def save_cursor(self, db: Session, paging_token: str):
+        """Persiste o paging token da última operação processada"""
+        cursor = db.query(database_models.IngestionCursor).filter(
+            database_models.IngestionCursor.name == self.CURSOR_NAME
+        ).first()
+        if cursor is None:
+            cursor = database_models.IngestionCursor(name=self.CURSOR_NAME)
+            db.add(cursor)
+        cursor.paging_token = paging_token
+        cursor.updated_at = datetime.now()
+
+    def _parse_operation(self, record: dict):
+        """Converte uma operação do Horizon em (conta, asset, variação de saldo)"""
+        issuer = self.stellar_service.issuer_keypair.public_key
+
+        if not record.get("transaction_successful", True):
+            return None
+        if record.get("asset_issuer") != issuer:
+            return None
+
+        if record["type"] == "payment" and record.get("from") == issuer:
+            return record["to"], record["asset_code"], Decimal(record["amount"])
+        if record["type"] == "clawback":
+            return record["from"], record["asset_code"], -Decimal(record["amount"])
+        return None
+
+    def apply_operation(self, db: Session, record: dict) -> bool:
+        """Aplica uma operação às tabelas locais e avança o cursor (sem commit)"""
+        paging_token = record["paging_token"]
+
+        # Operações já registradas (emitidas por esta API ou replay após falha)
+        # são apenas confirmadas, sem alterar o saldo de novo
+        applied = False
+        parsed = self._parse_operation(record)
+        if parsed:
+            account, asset_code, amount = parsed
+            transaction = record.get("transaction") or {}
+            applied = self.chain_mirror.record_operation(
+                db,
+                transaction_hash=record["transaction_hash"],
+                operation_type=record["type"],
+                source_account=record["source_account"],
+                public_key=account,
+                asset_code=asset_code,
+                asset_issuer=record["asset_issuer"],
+                amount=amount,
+                memo=transaction.get("memo"),
+                created_at=datetime.fromisoformat(
+                    record["created_at"].replace("Z", "+00:00")
+                ).replace(tzinfo=None),
+                paging_token=paging_token,
+            )
+
+        self.save_cursor(db, paging_token)
+        return applied
+
+    async def run(self):
+        """Consome o stream de operações do emissor indefinidamente"""
+        if not self.stellar_service.issuer_keypair:
+            raise ValueError("Chave privada do emissor não configurada")
+
+        retry_delay = 1
+        while True:
+            db = self.session_factory()
+            try:
+                cursor = await db.run_sync(self.load_cursor)
+                logger.info(f"Iniciando ingestão a partir do cursor {cursor}")
+
+                stream = (
+                    self.stellar_service.server.operations()
+                    .for_account(self.stellar_service.issuer_keypair.public_key)
+                    .join("transactions")
+                    .cursor(cursor)
+                    .stream()
+                )
+                async for record in stream:
+                    applied = await db.run_sync(self.apply_operation, record)
+                    await db.commit()
+                    if applied:
+                        logger.info(
+                            f"Operação {record['paging_token']} aplicada "
+                            f"({record['type']} {record.get('asset_code')})"
+                        )
+                    retry_delay = 1
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Erro na ingestão, reconectando em {retry_delay}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            finally:
+                await db.close()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.services.channelAccountPool import ChannelAccountPool
+from stellar_sdk.exceptions import BadRequestError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class PendingIssuance:
+    restaurant_public_key: str
+    asset_code: str
+    future: asyncio.Future
+    retried: bool = False
+
+
+class CertificationIssuanceBatcher:
+    """Agrupa emissões de certificação em transações com vários pagamentos.
+
+    Cada aprovação entra em uma fila; a fila é enviada como uma única
+    transação do emissor quando atinge `max_operations` ou quando a primeira
+    emissão pendente espera `max_wait` segundos. Todos os chamadores do lote
+    recebem o mesmo hash de transação.
+
+    Com contas de canal configuradas, cada lote usa uma conta de canal como
+    origem e vários lotes podem estar em andamento ao mesmo tempo; sem elas,
+    os lotes são enviados um por vez a partir da conta emissora.
+    """
+
+    def __init__(
+        self,
+        stellar_service,
+        max_operations: int = None,
+        max_wait: float = None,
+        channel_pool: ChannelAccountPool = None,
+    ):
+        self.stellar_service = stellar_service
+        self.channel_pool = channel_pool or ChannelAccountPool()
+        self.max_operations = min(
+            max_operations or settings.ISSUANCE_BATCH_MAX_OPERATIONS, 100
+        )
+        self.max_wait = max_wait if max_wait is not None else settings.ISSUANCE_BATCH_MAX_WAIT
+        self._pending: list[PendingIssuance] = []
+        self._timer = None
+        self._tasks = set()
+        self._submit_lock = asyncio.Lock()
+
+    async def issue(
+        self, restaurant_public_key: str, certification_type: str, metadata: dict
+    ):
+        """Emite token de certificação para o restaurante dentro de um lote"""
+        prepared = await self.stellar_service.prepare_certification_payment(
+            restaurant_public_key, certification_type
+        )
+        if not prepared["success"]:
+            return prepared
+
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(
+            PendingIssuance(restaurant_public_key, prepared["asset_code"], future)
+        )
+        return await future
+
+    def _enqueue(self, item: PendingIssuance):
+        self._pending.append(item)
+        if len(self._pending) >= self.max_operations:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        """Separa os lotes pendentes e agenda o envio de cada um"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_operations]
+            self._pending = self._pending[self.max_operations :]
+
+            task = asyncio.create_task(self._submit(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _submit(self, batch: list[PendingIssuance]):
+        """Envia um lote como uma única transação e resolve cada chamador"""
+        payments = [(item.restaurant_public_key, item.asset_code) for item in batch]
+        try:
+            if self.channel_pool.size:
+                async with self.channel_pool.lease() as channel_keypair:
+                    response = await self._submit_payments(payments, channel_keypair)
+            else:
+                async with self._submit_lock:
+                    response = await self._submit_payments(payments)
+
+            logger.info(
+                f"Lote de {len(batch)} certificações emitido: {response['hash']}"
+            )
+            for item in batch:
+                self.stellar_service.invalidate_account(item.restaurant_public_key)
+                self._resolve(
+                    item,
+                    {
+                        "success": True,
+                        "transaction_hash": response["hash"],
+                        "asset_code": item.asset_code,
+                        "amount": "1",
+                    },
+                )
+
+        except Exception as e:
+            logger.error(f"Erro ao emitir lote de certificações: {e}")
+            self._handle_failure(batch, e)
+
+    async def _submit_payments(self, payments, channel_keypair=None):
+        source_keypair = channel_keypair or self.stellar_service.issuer_keypair
+        return await self.stellar_service.sequence_manager.submit(
+            source_keypair.public_key,
+            lambda source_account: (
+                self.stellar_service.build_certification_batch_transaction(
+                    source_account, payments, channel_keypair
+                )
+            ),
+        )
+
+    def _handle_failure(self, batch: list[PendingIssuance], error: Exception):
+        """Falha as operações rejeitadas e reenvia uma vez as que eram válidas.
+
+        Uma única operação inválida (ex.: op_no_trust) derruba a transação
+        inteira; os resultados por operação do Horizon indicam quais itens
+        realmente falharam.
+        """
+        operation_codes = []
+        if isinstance(error, BadRequestError) and error.extras:
+            operation_codes = error.extras.get("result_codes", {}).get("operations", [])
+
+        if len(operation_codes) != len(batch):
+            for item in batch:
+                self._resolve(item, {"success": False, "error": str(error)})
+            return
+
+        for item, code in zip(batch, operation_codes):
+            if code != "op_success":
+                self._resolve(item, {"success": False, "error": code})
+            elif item.retried:
+                self._resolve(item, {"success": False, "error": str(error)})
+            else:
+                item.retried = True
+                self._enqueue(item)
+
+    def _resolve(self, item: PendingIssuance, result: dict):
+        if not item.future.done():
+            item.future.set_result(result)
@@ -0,0 +1,103 @@
+import logging
+from datetime import datetime
+
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from stellar_sdk import Account
+from stellar_sdk.exceptions import BadRequestError
+
+logger = logging.getLogger(__name__)
+
+
+def is_bad_sequence_error(error: Exception) -> bool:
+    """Verifica se o Horizon rejeitou a transação por número de sequência"""
+    if not isinstance(error, BadRequestError) or not error.extras:
+        return False
+    return error.extras.get("result_codes", {}).get("transaction") == "tx_bad_seq"
+
+
+class SequenceManager:
+    """Aloca números de sequência localmente para as contas de origem.
+
+    A sequência de cada conta é carregada do Horizon uma única vez e guardada
+    na tabela account_sequences; cada alocação é um UPDATE ... RETURNING
+    atômico, o que coordena os vários workers do uvicorn sem consultar o
+    Horizon a cada transação. Em caso de tx_bad_seq a sequência é
+    ressincronizada e a transação reenviada.
+    """
+
+    def __init__(self, stellar_service, session_factory=AsyncSessionLocal):
+        self.stellar_service = stellar_service
+        self.session_factory = session_factory
+
+    async def _allocate(self, account_id: str):
+        """Incrementa e retorna a sequência da conta, ou None se não carregada"""
+        async with self.session_factory() as db:
+            sequence = await db.scalar(
+                update(database_models.AccountSequence)
+                .where(database_models.AccountSequence.account_id == account_id)
+                .values(
+                    sequence=database_models.AccountSequence.sequence + 1,
+                    updated_at=datetime.now(),
+                )
+                .returning(database_models.AccountSequence.sequence)
+            )
+            await db.commit()
+            return sequence
+
+    async def resync(self, account_id: str, overwrite: bool = True):
+        """Recarrega a sequência atual da conta a partir do Horizon.
+
+        Com overwrite=False apenas semeia a conta: se outra requisição já a
+        carregou e alocou sequências, a linha existente é mantida.
+        """
+        account = await self.stellar_service.load_account(account_id)
+
+        async with self.session_factory() as db:
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            statement = dialect.insert(database_models.AccountSequence).values(
+                account_id=account_id,
+                sequence=account.sequence,
+                updated_at=datetime.now(),
+            )
+            if overwrite:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[database_models.AccountSequence.account_id],
+                    set_={
+                        "sequence": statement.excluded.sequence,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                )
+            else:
+                statement = statement.on_conflict_do_nothing()
+            await db.execute(statement)
+            await db.commit()
+
+        logger.info(f"Sequência da conta {account_id} sincronizada: {account.sequence}")
+
+    async def next_account(self, account_id: str) -> Account:
+        """Retorna a conta pronta para montar a próxima transação"""
+        sequence = await self._allocate(account_id)
+        if sequence is None:
+            await self.resync(account_id, overwrite=False)
+            sequence = await self._allocate(account_id)
+
+        # O TransactionBuilder incrementa a sequência ao montar a transação
+        return Account(account_id, sequence - 1)
+
+    async def submit(self, account_id: str, build_transaction):
+        """Monta com a próxima sequência e envia, ressincronizando em tx_bad_seq"""
+        for attempt in range(2):
+            source_account = await self.next_account(account_id)
+            try:
+                return await self.stellar_service.submit_transaction(
+                    build_transaction(source_account)
+                )
+            except Exception as e:
+                if attempt == 0 and is_bad_sequence_error(e):
+                    logger.warning(f"tx_bad_seq na conta {account_id}, ressincronizando")
+                    await self.resync(account_id)
+                    continue
+                raise
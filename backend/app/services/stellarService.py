@@ -1,16 +1,38 @@
+import asyncio
 import json
 import logging
 
 from app.config import CERTIFICATION_ASSETS, get_settings
-from stellar_sdk import Asset, Keypair, Server, TransactionBuilder
+from app.services.httpTransport import close_http_client, get_http_client
+from app.services.sequenceManager import SequenceManager
+from app.utils.cache import TTLCache
+from stellar_sdk import (
+    Asset,
+    Keypair,
+    ServerAsync,
+    TransactionBuilder,
+)
+from stellar_sdk.exceptions import NotFoundError
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+FRIENDBOT_URL = "https://friendbot.stellar.org"
+
+# Cache de contas compartilhado por todas as instâncias do serviço no processo
+account_cache = TTLCache(
+    maxsize=settings.ACCOUNT_CACHE_MAXSIZE,
+    ttl=settings.ACCOUNT_CACHE_TTL,
+    stale_ttl=settings.ACCOUNT_CACHE_STALE_TTL,
+)
+# Revalidações em andamento, também compartilhadas para não repetir a busca
+account_revalidations = {}
+
+
+class BaseStellarService:
+    """Montagem de transações e leitura de contas, sem chamadas de rede"""
 
-class StellarService:
     def __init__(self):
-        self.server = Server(settings.STELLAR_HORIZON_URL)
         self.issuer_keypair = (
             Keypair.from_secret(settings.ISSUER_SECRET_KEY)
             if settings.ISSUER_SECRET_KEY
@@ -22,7 +44,228 @@ class StellarService:
             else "Public Global Stellar Network ; September 2015"
         )
 
-    def create_new_wallet(self):
+    def _build_trustlines_transaction(self, user_account, user_keypair):
+        """Monta a transação que cria trustlines para todos os tipos de certificação"""
+        transaction_builder = TransactionBuilder(
+            source_account=user_account,
+            network_passphrase=self.network_passphrase,
+            base_fee=100,
+        )
+
+        # Adicionar operações de trustline para cada tipo de certificação
+        trustlines_added = []
+        for cert_type, asset_code in CERTIFICATION_ASSETS.items():
+            certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
+            transaction_builder.append_change_trust_op(
+                asset=certification_asset,
+                limit="1000",  # Limite de tokens que pode receber
+            )
+            trustlines_added.append(asset_code)
+
+        # Construir e assinar a transação
+        transaction = transaction_builder.set_timeout(30).build()
+        transaction.sign(user_keypair)
+        return transaction, trustlines_added
+
+    def _build_trust_line_transaction(self, user_account, user_keypair, asset_code):
+        """Monta a transação que cria uma única trustline"""
+        certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
+
+        transaction = (
+            TransactionBuilder(
+                source_account=user_account,
+                network_passphrase=self.network_passphrase,
+                base_fee=100,
+            )
+            .append_change_trust_op(
+                asset=certification_asset,
+                limit="1000",  # Limite de tokens que pode receber
+            )
+            .set_timeout(30)
+            .build()
+        )
+
+        transaction.sign(user_keypair)
+        return transaction
+
+    def _has_trustline(self, account: dict, asset_code: str) -> bool:
+        """Verifica se a conta possui trustline para o asset de certificação"""
+        for balance in account.get("balances", []):
+            if balance.get("asset_type") != "native":
+                if (balance.get("asset_code") == asset_code and
+                    balance.get("asset_issuer") == self.issuer_keypair.public_key):
+                    return True
+        return False
+
+    def _build_certification_transaction(
+        self,
+        issuer_account,
+        restaurant_public_key: str,
+        certification_type: str,
+        asset_code: str,
+        metadata: dict,
+    ):
+        """Monta e assina a transação de pagamento do token de certificação"""
+        certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
+
+        # Criar memo com metadados da certificação
+        memo_data = json.dumps(
+            {
+                "type": "certification",
+                "cert_type": certification_type,
+                "restaurant_id": metadata.get("restaurant_id"),
+                "issued_at": metadata.get("issued_at"),
+                "auditor_id": metadata.get("auditor_id"),
+            }
+        )
+
+        # Construir transação
+        transaction = (
+            TransactionBuilder(
+                source_account=issuer_account,
+                network_passphrase=self.network_passphrase,
+                base_fee=100,
+            )
+            .add_text_memo(memo_data[:28])  # Stellar memo tem limite de 28 bytes
+            .append_payment_op(
+                destination=restaurant_public_key,
+                asset=certification_asset,
+                amount="1",  # 1 token = 1 certificação
+            )
+            .set_timeout(30)
+            .build()
+        )
+
+        # Assinar transação
+        transaction.sign(self.issuer_keypair)
+        return transaction
+
+    def build_certification_batch_transaction(
+        self, source_account, payments: list[tuple[str, str]], channel_keypair=None
+    ):
+        """Monta e assina uma transação com vários pagamentos de certificação.
+
+        `payments` é uma lista de (conta de destino, asset code). Com uma conta
+        de canal, ela é a origem da transação e o emissor é a origem de cada
+        pagamento, assinando ambos.
+        """
+        payment_source = self.issuer_keypair.public_key if channel_keypair else None
+        memo_data = json.dumps({"type": "certification", "operations": len(payments)})
+
+        transaction_builder = TransactionBuilder(
+            source_account=source_account,
+            network_passphrase=self.network_passphrase,
+            base_fee=100,
+        ).add_text_memo(memo_data[:28])  # Stellar memo tem limite de 28 bytes
+
+        for destination, asset_code in payments:
+            transaction_builder.append_payment_op(
+                destination=destination,
+                asset=Asset(asset_code, self.issuer_keypair.public_key),
+                amount="1",  # 1 token = 1 certificação
+                source=payment_source,
+            )
+
+        transaction = transaction_builder.set_timeout(30).build()
+        if channel_keypair:
+            transaction.sign(channel_keypair)
+        transaction.sign(self.issuer_keypair)
+        return transaction
+
+    def build_clawback_batch_transaction(
+        self, source_account, clawbacks: list[tuple[str, str, int]]
+    ):
+        """Monta e assina uma transação que recupera tokens de certificação.
+
+        `clawbacks` é uma lista de (conta do restaurante, asset code, tokens),
+        uma operação por item. Requer o emissor com AUTH_CLAWBACK_ENABLED
+        ativo quando as trustlines foram criadas.
+        """
+        memo_data = json.dumps({"type": "expiry", "operations": len(clawbacks)})
+
+        transaction_builder = TransactionBuilder(
+            source_account=source_account,
+            network_passphrase=self.network_passphrase,
+            base_fee=100,
+        ).add_text_memo(memo_data[:28])  # Stellar memo tem limite de 28 bytes
+
+        for account, asset_code, tokens in clawbacks:
+            transaction_builder.append_clawback_op(
+                asset=Asset(asset_code, self.issuer_keypair.public_key),
+                from_=account,
+                amount=str(tokens),
+            )
+
+        transaction = transaction_builder.set_timeout(30).build()
+        transaction.sign(self.issuer_keypair)
+        return transaction
+
+    def extract_certifications(self, account: dict):
+        """Filtra os saldos da conta que são tokens de certificação da plataforma"""
+        certifications = []
+        for balance in account["balances"]:
+            if balance["asset_type"] != "native":  # Ignorar XLM
+                asset_code = balance["asset_code"]
+                asset_issuer = balance["asset_issuer"]
+
+                # Verificar se é um token de certificação nosso
+                if asset_issuer == self.issuer_keypair.public_key:
+                    certifications.append(
+                        {
+                            "asset_code": asset_code,
+                            "balance": balance["balance"],
+                            "issuer": asset_issuer,
+                        }
+                    )
+
+        return certifications
+
+    def _extract_certification_transactions(self, transactions: dict):
+        """Filtra as transações cujo memo identifica uma certificação"""
+        certification_txs = []
+        for tx in transactions["_embedded"]["records"]:
+            if tx["memo"] and "certification" in tx["memo"]:
+                certification_txs.append(
+                    {
+                        "hash": tx["hash"],
+                        "created_at": tx["created_at"],
+                        "memo": tx["memo"],
+                        "source_account": tx["source_account"],
+                    }
+                )
+
+        return certification_txs
+
+    def validate_stellar_address(self, public_key: str):
+        """Valida formato de endereço Stellar"""
+        try:
+            Keypair.from_public_key(public_key)
+            return True
+        except ValueError:
+            return False
+
+
+class AsyncStellarService(BaseStellarService):
+    """Serviço Stellar não bloqueante usado pelas rotas, workers e scripts.
+
+    Todas as chamadas ao Horizon e ao friendbot passam pelo cliente HTTP
+    assíncrono do SDK, de modo que uma chamada lenta não trava o event loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Transporte HTTP único do processo (keep-alive e HTTP/2)
+        self.client = get_http_client()
+        self.server = ServerAsync(settings.STELLAR_HORIZON_URL, client=self.client)
+        self.account_cache = account_cache
+        self._revalidations = account_revalidations
+        self.sequence_manager = SequenceManager(self)
+
+    async def close(self):
+        """Fecha as conexões HTTP abertas com o Horizon (compartilhadas pelo processo)"""
+        await close_http_client()
+
+    async def create_new_wallet(self):
         """Cria uma nova carteira Stellar e a financia no testnet"""
         try:
             # Gerar novo par de chaves
@@ -31,17 +274,17 @@ class StellarService:
             secret_key = keypair.secret
 
             # Financiar a conta no testnet
-            funded = self.create_test_account(public_key)
+            funded = await self.create_test_account(public_key)
 
             if not funded:
                 return {
                     "success": False,
                     "error": "Não foi possível financiar a conta no testnet",
                 }
-                
+
             # Configurar trustlines para todos os tipos de certificação
-            trustlines_setup = self.setup_all_trustlines(secret_key)
-            
+            trustlines_setup = await self.setup_all_trustlines(secret_key)
+
             if not trustlines_setup["success"]:
                 logger.error(f"Não foi possível configurar todas as trustlines: {trustlines_setup.get('error')}")
                 return {
@@ -58,150 +301,223 @@ class StellarService:
             logger.error(f"Erro ao criar nova carteira: {e}")
             return {"success": False, "error": str(e)}
 
-    def setup_all_trustlines(self, account_secret_key):
+    async def setup_all_trustlines(self, account_secret_key):
         """Configura trustlines para todos os tipos de certificação"""
         try:
             if not self.issuer_keypair:
                 return {"success": False, "error": "Chave privada do emissor não configurada"}
-                
+
             # Carregar a conta
             user_keypair = Keypair.from_secret(account_secret_key)
-            user_account = self.server.load_account(user_keypair.public_key)
-            
+            user_account = await self.load_account(user_keypair.public_key)
+
             # Criar uma transação para configurar todas as trustlines de uma vez
-            transaction_builder = TransactionBuilder(
-                source_account=user_account,
-                network_passphrase=self.network_passphrase,
-                base_fee=100,
+            transaction, trustlines_added = self._build_trustlines_transaction(
+                user_account, user_keypair
             )
-            
-            # Adicionar operações de trustline para cada tipo de certificação
-            trustlines_added = []
-            for cert_type, asset_code in CERTIFICATION_ASSETS.items():
-                certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
-                transaction_builder.append_change_trust_op(
-                    asset=certification_asset,
-                    limit="1000",  # Limite de tokens que pode receber
-                )
-                trustlines_added.append(asset_code)
-                
-            # Construir e assinar a transação
-            transaction = transaction_builder.set_timeout(30).build()
-            transaction.sign(user_keypair)
-            
+
             # Enviar a transação
-            response = self.server.submit_transaction(transaction)
-            
+            response = await self.submit_transaction(transaction)
+            self.invalidate_account(user_keypair.public_key)
+
             return {
                 "success": True,
                 "transaction_hash": response["hash"],
                 "trustlines": trustlines_added
             }
-            
+
         except Exception as e:
             logger.error(f"Erro ao configurar trustlines: {e}")
             return {"success": False, "error": str(e)}
 
-    def create_test_account(self, public_key: str):
+    async def create_test_account(self, public_key: str):
         """Cria conta de teste para o testnet"""
         try:
             if settings.STELLAR_NETWORK == "testnet":
-                import requests
-
-                response = requests.get(
-                    f"https://friendbot.stellar.org?addr={public_key}"
-                )
+                response = await self.client.get(FRIENDBOT_URL, {"addr": public_key})
+                self.invalidate_account(public_key)
                 return response.status_code == 200
             return False
         except Exception as e:
             logger.error(f"Erro ao criar conta teste: {e}")
             return False
 
-    def get_account_info(self, public_key: str):
+    async def load_account(self, public_key: str):
+        """Carrega a conta (com número de sequência) para montar transações"""
+        return await self.server.load_account(public_key)
+
+    async def submit_transaction(self, transaction):
+        """Envia uma transação assinada ao Horizon"""
+        return await self.server.submit_transaction(transaction)
+
+    async def get_transaction(self, transaction_hash: str):
+        """Busca uma transação pelo hash; None se o Horizon não a conhece"""
+        try:
+            return await self.server.transactions().transaction(transaction_hash).call()
+        except NotFoundError:
+            return None
+
+    async def _fetch_account(self, public_key: str):
+        """Busca a conta no Horizon e atualiza o cache.
+
+        Se a conta for invalidada durante a busca, a resposta (anterior à
+        transação que a alterou) não é gravada no cache.
+        """
+        generation = self.account_cache.generation(public_key)
+        account = await self.server.accounts().account_id(public_key).call()
+        self.account_cache.set(public_key, account, generation=generation)
+        return account
+
+    async def _revalidate_account(self, public_key: str):
+        try:
+            await self._fetch_account(public_key)
+        except Exception as e:
+            logger.warning(f"Erro ao revalidar conta {public_key} no cache: {e}")
+        finally:
+            self._revalidations.pop(public_key, None)
+
+    def _cached_account(self, public_key: str):
+        """Obtém a conta do cache, revalidando em segundo plano se estiver expirada"""
+        entry = self.account_cache.get_entry(public_key)
+        if entry is None:
+            return None
+
+        account, fresh = entry
+        if not fresh and public_key not in self._revalidations:
+            self._revalidations[public_key] = asyncio.create_task(
+                self._revalidate_account(public_key)
+            )
+        return account
+
+    def invalidate_account(self, public_key: str):
+        """Remove a conta do cache após uma transação que a altera"""
+        self.account_cache.invalidate(public_key)
+
+    async def get_account_info(self, public_key: str, use_cache: bool = True):
         """Obtém informações da conta"""
         try:
-            account = self.server.accounts().account_id(public_key).call()
-            return account
+            if use_cache:
+                account = self._cached_account(public_key)
+                if account is not None:
+                    return account
+            return await self._fetch_account(public_key)
         except Exception as e:
             logger.error(f"Erro ao obter informações da conta {public_key}: {e}")
             return None
 
-    def issue_certification_token(
-        self, restaurant_public_key: str, certification_type: str, metadata: dict
+    async def get_restaurant_certifications_bulk(
+        self,
+        public_keys: list[str],
+        concurrency: int = None,
+        timeout: float = None,
+        use_cache: bool = True,
     ):
-        """Emite token de certificação para o restaurante"""
+        """Obtém as certificações de várias contas em paralelo.
+
+        O número de chamadas simultâneas ao Horizon é limitado e cada uma tem
+        seu próprio timeout. Falhas são reportadas por conta, sem interromper
+        as demais: o resultado é um dicionário indexado pela chave pública com
+        "success" e "certifications" ou "error".
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.HORIZON_BULK_CONCURRENCY)
+        timeout = timeout or settings.HORIZON_REQUEST_TIMEOUT
+
+        async def fetch(public_key: str):
+            account = self._cached_account(public_key) if use_cache else None
+            if account is not None:
+                return public_key, {
+                    "success": True,
+                    "certifications": self.extract_certifications(account),
+                }
+
+            async with semaphore:
+                try:
+                    account = await asyncio.wait_for(
+                        self._fetch_account(public_key), timeout
+                    )
+                    return public_key, {
+                        "success": True,
+                        "certifications": self.extract_certifications(account),
+                    }
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout ao obter informações da conta {public_key}")
+                    return public_key, {
+                        "success": False,
+                        "error": f"Timeout após {timeout}s",
+                    }
+                except Exception as e:
+                    logger.error(f"Erro ao obter informações da conta {public_key}: {e}")
+                    return public_key, {"success": False, "error": str(e)}
+
+        # Chaves repetidas são consultadas uma única vez
+        results = await asyncio.gather(
+            *(fetch(public_key) for public_key in dict.fromkeys(public_keys))
+        )
+        return dict(results)
+
+    async def prepare_certification_payment(
+        self, restaurant_public_key: str, certification_type: str
+    ):
+        """Valida se o restaurante pode receber o token de certificação"""
         try:
             if not self.issuer_keypair:
                 raise ValueError("Chave privada do emissor não configurada")
 
             # Verificar se a conta do restaurante existe
-            restaurant_account = self.get_account_info(restaurant_public_key)
+            restaurant_account = await self.get_account_info(restaurant_public_key)
             if not restaurant_account:
                 # Tentar criar conta no testnet
-                if not self.create_test_account(restaurant_public_key):
+                if not await self.create_test_account(restaurant_public_key):
                     raise ValueError(
                         "Conta do restaurante não existe e não foi possível criar"
                     )
+                restaurant_account = await self.get_account_info(restaurant_public_key) or {}
 
             # Criar asset de certificação
             asset_code = CERTIFICATION_ASSETS.get(certification_type)
             if not asset_code:
                 raise ValueError(f"Tipo de certificação inválido: {certification_type}")
 
-            # Verificar se o restaurante tem trustline para este asset
-            has_trustline = False
-            for balance in restaurant_account.get("balances", []):
-                if balance.get("asset_type") != "native":
-                    if (balance.get("asset_code") == asset_code and 
-                        balance.get("asset_issuer") == self.issuer_keypair.public_key):
-                        has_trustline = True
-                        break
-            
             # Se não tiver trustline, retornar erro informativo
-            if not has_trustline:
+            if not self._has_trustline(restaurant_account, asset_code):
                 logger.warning(f"Restaurante não possui trustline para {asset_code}")
                 return {
-                    "success": False, 
+                    "success": False,
                     "error": f"O restaurante não possui uma trustline para o token {asset_code}. " +
                              "É necessário configurar uma trustline antes de receber o token."
                 }
 
-            certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
+            return {"success": True, "asset_code": asset_code}
 
-            # Carregar conta do emissor
-            issuer_account = self.server.load_account(self.issuer_keypair.public_key)
-
-            # Criar memo com metadados da certificação
-            memo_data = json.dumps(
-                {
-                    "type": "certification",
-                    "cert_type": certification_type,
-                    "restaurant_id": metadata.get("restaurant_id"),
-                    "issued_at": metadata.get("issued_at"),
-                    "auditor_id": metadata.get("auditor_id"),
-                }
-            )
+        except Exception as e:
+            logger.error(f"Erro ao emitir certificação: {e}")
+            return {"success": False, "error": str(e)}
 
-            # Construir transação
-            transaction = (
-                TransactionBuilder(
-                    source_account=issuer_account,
-                    network_passphrase=self.network_passphrase,
-                    base_fee=100,
-                )
-                .add_text_memo(memo_data[:28])  # Stellar memo tem limite de 28 bytes
-                .append_payment_op(
-                    destination=restaurant_public_key,
-                    asset=certification_asset,
-                    amount="1",  # 1 token = 1 certificação
-                )
-                .set_timeout(30)
-                .build()
-            )
+    async def issue_certification_token(
+        self, restaurant_public_key: str, certification_type: str, metadata: dict
+    ):
+        """Emite token de certificação para o restaurante"""
+        prepared = await self.prepare_certification_payment(
+            restaurant_public_key, certification_type
+        )
+        if not prepared["success"]:
+            return prepared
 
-            # Assinar e enviar transação
-            transaction.sign(self.issuer_keypair)
-            response = self.server.submit_transaction(transaction)
+        try:
+            asset_code = prepared["asset_code"]
+
+            # Enviar transação com a próxima sequência alocada localmente
+            response = await self.sequence_manager.submit(
+                self.issuer_keypair.public_key,
+                lambda issuer_account: self._build_certification_transaction(
+                    issuer_account,
+                    restaurant_public_key,
+                    certification_type,
+                    asset_code,
+                    metadata,
+                ),
+            )
+            self.invalidate_account(restaurant_public_key)
 
             return {
                 "success": True,
@@ -214,39 +530,23 @@ class StellarService:
             logger.error(f"Erro ao emitir certificação: {e}")
             return {"success": False, "error": str(e)}
 
-    def get_restaurant_certifications(self, restaurant_public_key: str):
+    async def get_restaurant_certifications(self, restaurant_public_key: str):
         """Obtém todas as certificações de um restaurante"""
         try:
-            account = self.get_account_info(restaurant_public_key)
+            account = await self.get_account_info(restaurant_public_key)
             if not account:
                 return []
 
-            certifications = []
-            for balance in account["balances"]:
-                if balance["asset_type"] != "native":  # Ignorar XLM
-                    asset_code = balance["asset_code"]
-                    asset_issuer = balance["asset_issuer"]
-
-                    # Verificar se é um token de certificação nosso
-                    if asset_issuer == self.issuer_keypair.public_key:
-                        certifications.append(
-                            {
-                                "asset_code": asset_code,
-                                "balance": balance["balance"],
-                                "issuer": asset_issuer,
-                            }
-                        )
-
-            return certifications
+            return self.extract_certifications(account)
 
         except Exception as e:
             logger.error(f"Erro ao obter certificações do restaurante: {e}")
             return []
 
-    def get_certification_transactions(self, restaurant_public_key: str):
+    async def get_certification_transactions(self, restaurant_public_key: str):
         """Obtém histórico de transações de certificação"""
         try:
-            transactions = (
+            transactions = await (
                 self.server.transactions()
                 .for_account(restaurant_public_key)
                 .order(desc=True)
@@ -254,59 +554,26 @@ class StellarService:
                 .call()
             )
 
-            certification_txs = []
-            for tx in transactions["_embedded"]["records"]:
-                if tx["memo"] and "certification" in tx["memo"]:
-                    certification_txs.append(
-                        {
-                            "hash": tx["hash"],
-                            "created_at": tx["created_at"],
-                            "memo": tx["memo"],
-                            "source_account": tx["source_account"],
-                        }
-                    )
-
-            return certification_txs
+            return self._extract_certification_transactions(transactions)
 
         except Exception as e:
             logger.error(f"Erro ao obter transações de certificação: {e}")
             return []
 
-    def validate_stellar_address(self, public_key: str):
-        """Valida formato de endereço Stellar"""
-        try:
-            Keypair.from_public_key(public_key)
-            return True
-        except ValueError:
-            return False
-
-    def setup_trust_line(self, user_secret_key: str, asset_code: str):
+    async def setup_trust_line(self, user_secret_key: str, asset_code: str):
         """Configura trustline para receber tokens de certificação"""
         try:
             user_keypair = Keypair.from_secret(user_secret_key)
-            user_account = self.server.load_account(user_keypair.public_key)
-
-            certification_asset = Asset(asset_code, self.issuer_keypair.public_key)
+            user_account = await self.load_account(user_keypair.public_key)
 
-            transaction = (
-                TransactionBuilder(
-                    source_account=user_account,
-                    network_passphrase=self.network_passphrase,
-                    base_fee=100,
-                )
-                .append_change_trust_op(
-                    asset=certification_asset,
-                    limit="1000",  # Limite de tokens que pode receber
-                )
-                .set_timeout(30)
-                .build()
+            transaction = self._build_trust_line_transaction(
+                user_account, user_keypair, asset_code
             )
-
-            transaction.sign(user_keypair)
-            response = self.server.submit_transaction(transaction)
+            response = await self.submit_transaction(transaction)
+            self.invalidate_account(user_keypair.public_key)
 
             return {"success": True, "transaction_hash": response["hash"]}
 
         except Exception as e:
             logger.error(f"Erro ao configurar trustline: {e}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from app.models.schemas import PooledWalletStatus
+from app.utils.security import decrypt_secret, encrypt_secret
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from stellar_sdk import Keypair
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Acorda o reabastecedor deste processo quando uma carteira é consumida
+_wallet_claimed = asyncio.Event()
+
+
+async def claim_pooled_wallet(db: AsyncSession):
+    """Reivindica uma carteira disponível do estoque, na transação da sessão.
+
+    Retorna (keypair, trustlines) ou None se o estoque estiver vazio. A linha
+    fica bloqueada até o commit do cadastro; requisições concorrentes pulam
+    as linhas bloqueadas (SKIP LOCKED) em vez de esperar por elas.
+    """
+    wallet = await db.scalar(
+        select(database_models.PooledWallet)
+        .where(database_models.PooledWallet.status == PooledWalletStatus.AVAILABLE)
+        .order_by(database_models.PooledWallet.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if wallet is None:
+        return None
+
+    keypair = Keypair.from_secret(decrypt_secret(wallet.encrypted_secret_key))
+    wallet.status = PooledWalletStatus.CLAIMED
+    wallet.encrypted_secret_key = None
+    wallet.claimed_at = datetime.now()
+    _wallet_claimed.set()
+    return keypair, json.loads(wallet.trustlines) if wallet.trustlines else []
+
+
+class WalletPoolReplenisher:
+    """Mantém um estoque de carteiras já financiadas e com todas as trustlines.
+
+    Sempre que o número de carteiras disponíveis fica abaixo de
+    WALLET_POOL_SIZE, cria novas carteiras (até WALLET_POOL_REFILL_CONCURRENCY
+    ao mesmo tempo) e guarda suas chaves secretas criptografadas.
+    """
+
+    def __init__(
+        self,
+        stellar_service,
+        session_factory=AsyncSessionLocal,
+        target_size: int = None,
+        concurrency: int = None,
+    ):
+        self.stellar_service = stellar_service
+        self.session_factory = session_factory
+        self.target_size = settings.WALLET_POOL_SIZE if target_size is None else target_size
+        self.concurrency = concurrency or settings.WALLET_POOL_REFILL_CONCURRENCY
+        self._task = None
+
+    async def start(self):
+        """Inicia o reabastecimento em segundo plano"""
+        if self.target_size > 0:
+            if not settings.WALLET_ENCRYPTION_KEY:
+                raise ValueError(
+                    "WALLET_ENCRYPTION_KEY é obrigatória para manter o estoque de carteiras"
+                )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def available_count(self) -> int:
+        async with self.session_factory() as db:
+            return await db.scalar(
+                select(func.count())
+                .select_from(database_models.PooledWallet)
+                .where(
+                    database_models.PooledWallet.status == PooledWalletStatus.AVAILABLE
+                )
+            )
+
+    async def _run(self):
+        while True:
+            try:
+                missing = self.target_size - await self.available_count()
+                if missing > 0:
+                    batch = min(missing, self.concurrency)
+                    created = await asyncio.gather(
+                        *(self._create_wallet() for _ in range(batch))
+                    )
+                    # Continua imediatamente enquanto houver progresso
+                    if any(created):
+                        continue
+            except Exception as e:
+                logger.error(f"Erro ao reabastecer o estoque de carteiras: {e}")
+
+            _wallet_claimed.clear()
+            try:
+                await asyncio.wait_for(
+                    _wallet_claimed.wait(), settings.WALLET_POOL_CHECK_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _create_wallet(self) -> bool:
+        """Financia uma nova carteira, configura as trustlines e a adiciona ao estoque"""
+        keypair = Keypair.random()
+        if not await self.stellar_service.create_test_account(keypair.public_key):
+            logger.error("Não foi possível financiar carteira do estoque")
+            return False
+
+        result = await self.stellar_service.setup_all_trustlines(keypair.secret)
+        if not result["success"]:
+            logger.error(f"Erro ao configurar trustlines do estoque: {result['error']}")
+            return False
+
+        async with self.session_factory() as db:
+            db.add(
+                database_models.PooledWallet(
+                    stellar_public_key=keypair.public_key,
+                    encrypted_secret_key=encrypt_secret(keypair.secret),
+                    trustlines=json.dumps(result.get("trustlines", [])),
+                    status=PooledWalletStatus.AVAILABLE,
+                    created_at=datetime.now(),
+                )
+            )
+            await db.commit()
+            return True
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import database_models
+from app.models.schemas import WalletJobStatus
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.walletPoolService import claim_pooled_wallet
+from app.utils.security import decrypt_secret, encrypt_secret
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from stellar_sdk import Keypair
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Jobs em execução há mais tempo que isso são considerados interrompidos
+STALE_JOB_TIMEOUT = timedelta(minutes=5)
+
+# Acorda os workers do processo quando um novo job é criado
+_jobs_available = asyncio.Event()
+
+
+async def assign_wallet(db: AsyncSession, entity_type: str):
+    """Atribui uma carteira à nova entidade e registra o job correspondente.
+
+    Usa uma carteira do estoque pré-provisionado quando houver (o job já
+    nasce concluído); caso contrário gera um novo par de chaves e agenda o
+    financiamento e as trustlines. O job é adicionado à sessão sem commit,
+    para ser gravado na mesma transação que a entidade dona da carteira.
+    """
+    now = datetime.now()
+    pooled = await claim_pooled_wallet(db)
+    if pooled is not None:
+        keypair, trustlines = pooled
+        job = database_models.WalletJob(
+            id=str(uuid.uuid4()),
+            entity_type=entity_type,
+            stellar_public_key=keypair.public_key,
+            status=WalletJobStatus.SUCCEEDED,
+            attempts=0,
+            trustlines=json.dumps(trustlines),
+            next_attempt_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+    else:
+        keypair = Keypair.random()
+        job = database_models.WalletJob(
+            id=str(uuid.uuid4()),
+            entity_type=entity_type,
+            stellar_public_key=keypair.public_key,
+            secret_key=encrypt_secret(keypair.secret),
+            status=WalletJobStatus.PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+        )
+
+    db.add(job)
+    return keypair, job
+
+
+def notify_wallet_workers():
+    """Sinaliza aos workers deste processo que há jobs pendentes"""
+    _jobs_available.set()
+
+
+def wallet_job_to_dict(job: database_models.WalletJob):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "entity_type": job.entity_type,
+        "entity_id": job.entity_id,
+        "public_key": job.stellar_public_key,
+        "attempts": job.attempts,
+        "trustlines_configured": json.loads(job.trustlines) if job.trustlines else [],
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "status_url": f"/api/jobs/{job.id}",
+    }
+
+
+class WalletProvisioningWorker:
+    """Pool de workers que financia carteiras e configura suas trustlines.
+
+    Os jobs ficam na tabela wallet_jobs; cada worker reivindica o próximo
+    job pendente (com SKIP LOCKED, permitindo vários processos), executa o
+    friendbot e a transação de trustlines e reagenda com backoff em caso de
+    falha até WALLET_JOB_MAX_ATTEMPTS tentativas.
+    """
+
+    def __init__(self, stellar_service, session_factory=AsyncSessionLocal, workers: int = None):
+        self.stellar_service = stellar_service
+        self.chain_mirror = ChainMirrorService(stellar_service)
+        self.session_factory = session_factory
+        self.workers = settings.WALLET_JOB_WORKERS if workers is None else workers
+        self._tasks = []
+
+    async def start(self):
+        """Inicia os workers em segundo plano"""
+        self._tasks = [
+            asyncio.create_task(self._run_worker()) for _ in range(self.workers)
+        ]
+
+    async def run(self):
+        """Executa os workers até serem cancelados (uso em processo dedicado)"""
+        await self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_worker(self):
+        while True:
+            try:
+                claimed = await self._claim_next_job()
+            except Exception as e:
+                logger.error(f"Erro ao buscar job de carteira: {e}")
+                claimed = None
+
+            if claimed is None:
+                _jobs_available.clear()
+                try:
+                    await asyncio.wait_for(
+                        _jobs_available.wait(), settings.WALLET_JOB_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(claimed)
+
+    async def _claim_next_job(self):
+        """Reivindica o próximo job pendente (ou interrompido) e o marca como em execução"""
+        now = datetime.now()
+        async with self.session_factory() as db:
+            job = await db.scalar(
+                select(database_models.WalletJob)
+                .where(
+                    or_(
+                        and_(
+                            database_models.WalletJob.status == WalletJobStatus.PENDING,
+                            database_models.WalletJob.next_attempt_at <= now,
+                        ),
+                        and_(
+                            database_models.WalletJob.status == WalletJobStatus.RUNNING,
+                            database_models.WalletJob.updated_at < now - STALE_JOB_TIMEOUT,
+                        ),
+                    )
+                )
+                .order_by(database_models.WalletJob.next_attempt_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job is None:
+                await db.rollback()
+                return None
+
+            job.status = WalletJobStatus.RUNNING
+            job.attempts += 1
+            job.updated_at = now
+            await db.commit()
+            return job.id, job.stellar_public_key, job.secret_key
+
+    async def _provision(self, public_key: str, secret_key: str):
+        """Financia a conta (se ainda não existir) e configura as trustlines"""
+        account = await self.stellar_service.get_account_info(public_key, use_cache=False)
+        if not account and not await self.stellar_service.create_test_account(public_key):
+            return {
+                "success": False,
+                "error": "Não foi possível financiar a conta no testnet",
+            }
+
+        return await self.stellar_service.setup_all_trustlines(secret_key)
+
+    async def _process(self, claimed):
+        job_id, public_key, secret_key = claimed
+        try:
+            # A sessão só é aberta depois do Horizon, sem segurar conexão durante as chamadas
+            result = await self._provision(public_key, decrypt_secret(secret_key))
+
+            async with self.session_factory() as db:
+                job = await db.get(database_models.WalletJob, job_id)
+
+                if result["success"]:
+                    job.status = WalletJobStatus.SUCCEEDED
+                    job.secret_key = None
+                    job.error = None
+                    job.trustlines = json.dumps(result.get("trustlines", []))
+
+                    if job.entity_type == "restaurant":
+                        await db.run_sync(
+                            self.chain_mirror.store_new_trustlines,
+                            job.stellar_public_key,
+                            result.get("trustlines", []),
+                        )
+                    logger.info(f"Carteira {job.stellar_public_key} provisionada (job {job.id})")
+
+                elif job.attempts >= settings.WALLET_JOB_MAX_ATTEMPTS:
+                    job.status = WalletJobStatus.FAILED
+                    job.secret_key = None
+                    job.error = result.get("error")
+                    logger.error(f"Job de carteira {job.id} falhou definitivamente: {job.error}")
+
+                else:
+                    # Backoff exponencial entre as tentativas
+                    job.status = WalletJobStatus.PENDING
+                    job.error = result.get("error")
+                    job.next_attempt_at = datetime.now() + timedelta(
+                        seconds=2 ** job.attempts
+                    )
+                    logger.warning(
+                        f"Job de carteira {job.id} falhou (tentativa {job.attempts}): {job.error}"
+                    )
+
+                job.updated_at = datetime.now()
+                await db.commit()
+
+        except Exception as e:
+            logger.error(f"Erro ao processar job de carteira {job_id}: {e}")
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Cache LRU limitado com expiração por tempo (TTL).
+
+    Após o TTL a entrada ainda pode ser servida como "stale" durante
+    `stale_ttl` segundos, enquanto quem a consultou dispara a revalidação.
+    Mantém contadores de acertos e falhas para monitoramento.
+
+    Cada chave tem uma geração, incrementada por `invalidate`. Quem busca o
+    valor fora do cache lê a geração antes da busca e a repassa a `set`;
+    se a chave foi invalidada no meio tempo, o valor antigo é descartado.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict = OrderedDict()
+        # Gerações das chaves invalidadas; as descartadas pelo limite sobem o
+        # piso, que vale para qualquer chave ausente
+        self._generations: OrderedDict = OrderedDict()
+        self._clock = 0
+        self._generation_floor = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: Hashable) -> Optional[tuple[Any, bool]]:
+        """Retorna (valor, está_fresco) ou None se não houver entrada utilizável"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if age > self.ttl:
+            self.stale_hits += 1
+            return value, False
+
+        self.hits += 1
+        return value, True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor apenas se ainda estiver dentro do TTL"""
+        entry = self.get_entry(key)
+        if entry is None or not entry[1]:
+            return default
+        return entry[0]
+
+    def generation(self, key: Hashable) -> int:
+        """Geração atual da chave, para repassar a `set` após a busca"""
+        return self._generations.get(key, self._generation_floor)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """Grava o valor; descarta-o se a chave foi invalidada após `generation`"""
+        if generation is not None and generation != self.generation(key):
+            return False
+
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+        self._clock += 1
+        self._generations[key] = self._clock
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.maxsize:
+            _, dropped = self._generations.popitem(last=False)
+            self._generation_floor = max(self._generation_floor, dropped)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,15 @@
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def json_array_contains(db: AsyncSession, column, value: str):
+    """Condição SQL: a lista JSON da coluna contém o valor informado.
+
+    No PostgreSQL usa o operador @> do JSONB, atendido pelos índices GIN;
+    no SQLite percorre a lista com json_each.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return column.op("@>")(func.jsonb_build_array(value))
+
+    elements = func.json_each(column).table_valued("value")
+    return exists(select(elements.c.value).where(elements.c.value == value))
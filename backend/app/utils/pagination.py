@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Gera o cursor opaco que aponta para depois da linha informada"""
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Lê um cursor gerado por encode_cursor; levanta ValueError se for inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+
+
+async def keyset_paginate(
+    db: AsyncSession, query: Select, model, cursor: Optional[str], size: int
+):
+    """Pagina a query por (created_at, id) sem OFFSET.
+
+    Cada página continua a partir da última linha da anterior, então o custo
+    não cresce com a profundidade. Retorna (itens, próximo_cursor), sendo o
+    cursor None na última página.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(model.created_at, model.id) > tuple_(created_at, row_id)
+        )
+
+    # Uma linha a mais indica se existe próxima página
+    rows = (
+        await db.scalars(query.order_by(model.created_at, model.id).limit(size + 1))
+    ).all()
+    items = rows[:size]
+    next_cursor = None
+    if len(rows) > size:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
+
+
+async def count_rows(db: AsyncSession, query: Select) -> int:
+    """Total de linhas da query (COUNT sobre a query sem ordenação)"""
+    return await db.scalar(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
+
+
+async def estimate_row_count(db: AsyncSession, table_name: str) -> Optional[int]:
+    """Estimativa de linhas da tabela pelas estatísticas do PostgreSQL (sem COUNT)"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table_name"),
+        {"table_name": table_name},
+    )
+    # reltuples é -1 enquanto a tabela nunca foi analisada
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
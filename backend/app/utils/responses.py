@@ -0,0 +1,23 @@
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _serialize_model(obj):
+    # Modelos viram dicts rasos; o orjson percorre o resto (inclusive datetimes)
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """Resposta JSON serializada com orjson a partir dos dados já montados.
+
+    Rotas que devolvem uma Response não passam pela validação contra o
+    response_model, que é a maior parte do custo de serialização de uma
+    página. Indicada para listagens cujos itens a própria rota monta; o
+    response_model declarado continua documentando o formato no OpenAPI.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_serialize_model)
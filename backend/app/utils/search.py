@@ -0,0 +1,43 @@
+from sqlalchemy import Select, case, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def escape_like(term: str) -> str:
+    """Escapa os curingas do LIKE para buscar o termo literalmente"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def ranked_search(db: AsyncSession, query: Select, columns: list, term: str) -> Select:
+    """Filtra e ordena a query por relevância do termo nas colunas informadas.
+
+    Resultados que começam com o termo vêm primeiro, priorizando a primeira
+    coluna. No PostgreSQL a busca também aceita nomes parecidos (similaridade
+    de trigramas, via pg_trgm) e ordena por similaridade, usando os índices
+    GIN criados na migração; no SQLite usa apenas LIKE, sem índice, para
+    desenvolvimento local.
+    """
+    escaped = escape_like(term)
+    contains = [column.ilike(f"%{escaped}%", escape="\\") for column in columns]
+    # Prefixo vale mais que ocorrência no meio; a primeira coluna é a principal
+    prefix_rank = case(
+        *(
+            (column.ilike(f"{escaped}%", escape="\\"), len(columns) - position + 1)
+            for position, column in enumerate(columns)
+        ),
+        (contains[0], 1),
+        else_=0,
+    )
+
+    if db.bind.dialect.name == "postgresql":
+        similar = [column.op("%")(term) for column in columns]
+        similarity = func.greatest(
+            *(func.similarity(column, term) for column in columns)
+        )
+        return query.where(or_(*contains, *similar)).order_by(
+            prefix_rank.desc(), similarity.desc()
+        )
+
+    # Sem similaridade, textos mais curtos na coluna principal ficam à frente
+    return query.where(or_(*contains)).order_by(
+        prefix_rank.desc(), func.length(columns[0])
+    )
@@ -1,11 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
+import bcrypt
+from app.config import get_settings
+from cryptography.fernet import Fernet
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
-# Configuração para hashing de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
+
+# Configuração para hashing de senhas; o bcrypt libera o GIL, então um pool de
+# threads tira o custo do event loop e limita quantos hashes rodam ao mesmo tempo
+BCRYPT_MAX_PASSWORD_BYTES = 72
+_hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 # Configuração para JWT
 SECRET_KEY = "CHANGE_THIS_TO_A_SECURE_SECRET_KEY_IN_PRODUCTION"  # Para o hackathon
@@ -13,14 +24,60 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
+def _password_bytes(password: str) -> bytes:
+    # O bcrypt considera apenas os primeiros 72 bytes (mesmo corte feito pelo passlib)
+    return password.encode()[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha fornecida corresponde ao hash armazenado"""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode())
+    except ValueError:
+        return False
 
 
 def get_password_hash(password: str) -> str:
     """Gera um hash seguro para a senha"""
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_password_bytes(password), salt).decode()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Indica se o hash foi gerado com outro custo (ou variante) do bcrypt"""
+    try:
+        _, variant, rounds = hashed_password.split("$", 3)[:3]
+        return variant != "2b" or int(rounds) != settings.PASSWORD_BCRYPT_ROUNDS
+    except ValueError:
+        return True
+
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if password_needs_rehash(hashed_password):
+        return True, get_password_hash(plain_password)
+    return True, None
+
+
+async def hash_password_async(password: str) -> str:
+    """Gera o hash da senha no pool de hashing, sem bloquear o event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hashing_executor, get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Verifica a senha no pool de hashing.
+
+    Retorna (válida, novo_hash); novo_hash vem preenchido quando a senha é
+    válida mas o hash armazenado usa um custo diferente do configurado.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hashing_executor, _verify_and_update, plain_password, hashed_password
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -35,4 +92,36 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+@lru_cache()
+def _get_fernet() -> Fernet:
+    """Cifra usada para guardar chaves secretas de carteiras no banco.
+
+    Não há chave padrão: sem WALLET_ENCRYPTION_KEY nenhuma chave é cifrada
+    nem decifrada (o SECRET_KEY tem valor público e não serve de fallback).
+    """
+    if not settings.WALLET_ENCRYPTION_KEY:
+        raise ValueError(
+            "WALLET_ENCRYPTION_KEY não configurada (gere uma com Fernet.generate_key())"
+        )
+    return Fernet(settings.WALLET_ENCRYPTION_KEY)
+
+
+def check_wallet_encryption_key():
+    """Valida WALLET_ENCRYPTION_KEY na inicialização da aplicação.
+
+    Levanta ValueError se a chave estiver ausente ou não for uma chave Fernet.
+    """
+    _get_fernet()
+
+
+def encrypt_secret(secret: str) -> str:
+    """Criptografa uma chave secreta Stellar para armazenamento"""
+    return _get_fernet().encrypt(secret.encode()).decode()
+
+
+def decrypt_secret(token: str) -> str:
+    """Descriptografa uma chave secreta Stellar armazenada"""
+    return _get_fernet().decrypt(token.encode()).decode()
@@ -0,0 +1,30 @@
+"""
+Reconstrução do índice de certificações ativas (restaurant_active_certifications).
+
+O índice é mantido na aprovação e na expiração; use este comando para
+corrigi-lo após alterações manuais no banco. A migração d4a7c2e9f150 já o
+preenche para as certificações existentes.
+
+Executar com: python -m app.workers.certification_index
+"""
+
+import logging
+
+from app.database import SessionLocal
+from app.services.certificationIndexService import CertificationIndexService
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    db = SessionLocal()
+    try:
+        entries = CertificationIndexService().rebuild(db)
+        logger.info(f"Índice de certificações ativas reconstruído: {entries} entradas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
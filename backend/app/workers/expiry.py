@@ -0,0 +1,39 @@
+"""
+Worker de expiração de certificações.
+
+Marca as certificações vencidas como expiradas e recupera os tokens na
+blockchain em lotes de até 100 clawbacks por transação, a cada
+CERTIFICATION_EXPIRY_SWEEP_INTERVAL segundos.
+
+Executar com: python -m app.workers.expiry
+(use --once para uma única varredura, ex.: agendada pelo cron)
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.services.certificationExpiryService import CertificationExpirySweeper
+from app.services.stellarService import AsyncStellarService
+
+logger = logging.getLogger(__name__)
+
+
+async def main(once: bool = False):
+    stellar_service = AsyncStellarService()
+    sweeper = CertificationExpirySweeper(stellar_service)
+    try:
+        if once:
+            expired, revoked = await sweeper.sweep()
+            logger.info(f"Varredura concluída: {expired} expiradas, {revoked} revogadas")
+        else:
+            await sweeper.run()
+    finally:
+        await stellar_service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de expiração de certificações")
+    parser.add_argument("--once", action="store_true", help="Executar uma única varredura")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args().once))
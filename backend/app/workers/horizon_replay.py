@@ -0,0 +1,59 @@
+"""
+Horizon local que reproduz eventos SSE gravados.
+
+Serve o stream de operações de uma conta a partir de um arquivo JSON Lines
+(um registro de operação do Horizon por linha), respeitando o parâmetro
+cursor. Permite testar a ingestão sem acesso à rede:
+
+    HORIZON_REPLAY_FILE=operations.jsonl uvicorn app.workers.horizon_replay:app --port 8001
+    STELLAR_HORIZON_URL=http://localhost:8001 python -m app.workers.ingestion
+"""
+
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI, Query
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Horizon replay")
+
+
+def load_records():
+    """Carrega os registros gravados, em ordem de paging token"""
+    path = os.environ.get("HORIZON_REPLAY_FILE", "operations.jsonl")
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda record: int(record["paging_token"]))
+
+
+def involves_account(record: dict, account_id: str) -> bool:
+    return account_id in (
+        record.get("source_account"),
+        record.get("from"),
+        record.get("to"),
+    )
+
+
+@app.get("/accounts/{account_id}/operations")
+async def stream_operations(account_id: str, cursor: str = Query("0")):
+    """Reproduz as operações gravadas da conta como um stream SSE do Horizon"""
+    records = [
+        record for record in load_records() if involves_account(record, account_id)
+    ]
+    if cursor == "now":
+        start = int(records[-1]["paging_token"]) if records else 0
+    else:
+        start = int(cursor)
+
+    async def events():
+        yield 'retry: 1000\nevent: open\ndata: "hello"\n\n'
+        for record in records:
+            if int(record["paging_token"]) > start:
+                yield f"id: {record['paging_token']}\ndata: {json.dumps(record)}\n\n"
+        # Mantém a conexão aberta como o Horizon faz ao chegar no fim do stream
+        while True:
+            await asyncio.sleep(5)
+            yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
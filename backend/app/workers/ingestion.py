@@ -0,0 +1,30 @@
+"""
+Worker de ingestão da blockchain.
+
+Executar com: python -m app.workers.ingestion
+"""
+
+import asyncio
+import logging
+
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.ingestionService import LedgerIngestionService
+from app.services.stellarService import AsyncStellarService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    stellar_service = AsyncStellarService()
+    ingestion_service = LedgerIngestionService(
+        stellar_service, ChainMirrorService(stellar_service)
+    )
+    try:
+        await ingestion_service.run()
+    finally:
+        await stellar_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
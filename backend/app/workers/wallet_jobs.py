@@ -0,0 +1,37 @@
+"""
+Worker de provisionamento de carteiras em um processo separado.
+
+Também mantém o estoque de carteiras pré-provisionadas (WALLET_POOL_SIZE).
+
+Executar com: python -m app.workers.wallet_jobs
+(WALLET_JOB_PROCESS_WORKERS workers; a API não os executa por padrão)
+"""
+
+import asyncio
+import logging
+
+from app.config import get_settings
+from app.services.stellarService import AsyncStellarService
+from app.services.walletPoolService import WalletPoolReplenisher
+from app.services.walletProvisioningService import WalletProvisioningWorker
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    stellar_service = AsyncStellarService()
+    worker = WalletProvisioningWorker(
+        stellar_service, workers=get_settings().WALLET_JOB_PROCESS_WORKERS
+    )
+    wallet_pool = WalletPoolReplenisher(stellar_service)
+    await wallet_pool.start()
+    try:
+        await worker.run()
+    finally:
+        await wallet_pool.stop()
+        await stellar_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark de logins por segundo em um único processo da API.
+
+Dispara logins concorrentes em /api/user/login e, ao mesmo tempo, mede a
+latência de GET / para mostrar o quanto o hashing de senhas atrasa as demais
+rotas. Use --inline para comparar com o bcrypt rodando no event loop.
+
+Concorrência acima do pool de conexões (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+apenas enfileira os logins: as sessões assíncronas aguardam uma conexão sem
+bloquear o event loop.
+
+Executar com: python -m benchmarks.login_throughput --logins 200 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import migrate_database
+from cryptography.fernet import Fernet
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=12, help="Custo do bcrypt")
+    parser.add_argument("--workers", type=int, default=4, help="Threads de hashing")
+    parser.add_argument(
+        "--inline", action="store_true", help="Verificar senhas no event loop"
+    )
+    return parser.parse_args()
+
+
+async def probe_latency(client, stop: asyncio.Event, samples: list):
+    """Chama a cada 10 ms uma rota sem hashing e registra o intervalo real
+    entre respostas; intervalos longos indicam o event loop bloqueado"""
+    previous = time.perf_counter()
+    while not stop.is_set():
+        await client.get("/")
+        now = time.perf_counter()
+        samples.append(now - previous)
+        previous = now
+        await asyncio.sleep(0.01)
+
+
+async def run(args):
+    import httpx
+    from app.main import app
+    from app.routes import user as user_routes
+    from app.utils import security
+
+    if args.inline:
+        # Mesmo trabalho, mas executado diretamente no event loop
+        async def verify_inline(plain_password, hashed_password):
+            return security._verify_and_update(plain_password, hashed_password)
+
+        user_routes.verify_and_update_password = verify_inline
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "bench@foodtrust.dev", "password": "benchmark-password"}
+        await client.post(
+            "/api/user/register", json={"name": "Benchmark", **credentials}
+        )
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/api/user/login", json=credentials)
+                response.raise_for_status()
+
+        stop = asyncio.Event()
+        probe_samples = []
+        probe = asyncio.create_task(probe_latency(client, stop, probe_samples))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await probe
+
+    probe_samples.sort()
+    mode = "inline (event loop)" if args.inline else f"pool ({args.workers} threads)"
+    print(f"Modo: {mode} | bcrypt rounds={args.rounds}")
+    print(f"Logins: {args.logins} em {elapsed:.2f}s -> {args.logins / elapsed:.1f} logins/s")
+    if probe_samples:
+        p99 = probe_samples[int(len(probe_samples) * 0.99) - 1]
+        print(
+            f"Intervalo entre respostas de GET / (ideal ~10 ms): "
+            f"mediana {statistics.median(probe_samples) * 1000:.1f} ms, "
+            f"p99 {p99 * 1000:.1f} ms, máx {probe_samples[-1] * 1000:.1f} ms "
+            f"({len(probe_samples)} amostras)"
+        )
+
+
+def main():
+    args = parse_args()
+
+    # Configurações lidas na importação da aplicação
+    database_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_file}"
+    os.environ["PASSWORD_BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    # O cadastro cifra a chave da nova carteira
+    os.environ.setdefault("WALLET_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+    try:
+        migrate_database()
+        asyncio.run(run(args))
+    finally:
+        os.remove(database_file)
+
+
+if __name__ == "__main__":
+    main()
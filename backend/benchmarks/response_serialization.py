@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização de uma página de restaurantes (GET /api/restaurant/list).
+
+Compara o tempo para transformar uma página em bytes JSON:
+
+- dicts: dicionários com datas em isoformat() validados por um modelo sem
+  tipos (como era antes dos modelos de resposta tipados);
+- tipado: validação contra PaginatedResponse[Restaurant] e dump_json, o
+  que o FastAPI faz quando a rota devolve os dados ao response_model;
+- orjson: a página devolvida em ORJSONResponse (app.utils.responses), sem
+  revalidação, como fazem as rotas de listagem.
+
+Executar com: python -m benchmarks.response_serialization --items 100
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from app.models.schemas import PaginatedResponse, Restaurant
+from app.utils.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+class UntypedPage(BaseModel):
+    items: list[Any]
+    total: int
+    page: int
+    size: int
+    pages: int
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=2000)
+    return parser.parse_args()
+
+
+def build_rows(count: int):
+    """Restaurantes como saem de _restaurants_with_certifications"""
+    created_at = datetime(2025, 1, 1, 12, 30)
+    return [
+        {
+            "id": index,
+            "name": f"Restaurante {index}",
+            "address": f"Rua das Flores, {index} - Centro",
+            "stellar_public_key": f"G{index:055d}",
+            "created_at": created_at + timedelta(minutes=index),
+            "certifications": [
+                {"asset_code": code, "balance": "1.0000000", "issuer": "G" + "A" * 55}
+                for code in ("VEGAN", "HALAL")
+            ],
+            "certifications_synced_at": created_at,
+        }
+        for index in range(count)
+    ]
+
+
+def page_of(items):
+    return {"items": items, "total": len(items), "page": 1, "size": len(items), "pages": 1}
+
+
+def dicts_path(rows):
+    items = []
+    for row in rows:
+        item = dict(row)
+        item["created_at"] = row["created_at"].isoformat()
+        item["certifications_synced_at"] = row["certifications_synced_at"].isoformat()
+        items.append(item)
+    return UntypedPage.model_validate(page_of(items)).model_dump_json().encode()
+
+
+typed_adapter = TypeAdapter(PaginatedResponse[Restaurant])
+
+
+def typed_path(rows):
+    return typed_adapter.dump_json(typed_adapter.validate_python(page_of(rows)))
+
+
+def orjson_path(rows):
+    return ORJSONResponse(PaginatedResponse(**page_of(rows))).body
+
+
+def measure(serialize, rows, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        serialize(rows)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    args = parse_args()
+    rows = build_rows(args.items)
+
+    paths = {"dicts": dicts_path, "tipado": typed_path, "orjson": orjson_path}
+
+    print(f"Página com {args.items} restaurantes, {args.runs} rodadas")
+    baseline = None
+    for name, serialize in paths.items():
+        serialize(rows)  # aquecimento
+        median = statistics.median(measure(serialize, rows, args.runs))
+        baseline = baseline or median
+        print(
+            f"{name:>7}: mediana {median * 1e6:.0f} µs "
+            f"({baseline / median:.2f}x), {len(serialize(rows))} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização a frio da API (import até pronta).
+
+Cada rodada inicia um novo interpretador, importa app.main, executa o
+lifespan e responde GET /health, medindo o tempo de cada etapa. Falha
+(código de saída 1) se a mediana passar de --max-seconds ou se alguma
+conexão com o banco for aberta antes da primeira requisição.
+
+O schema é criado antes das rodadas com as migrações (alembic upgrade head).
+A aplicação roda com a configuração padrão, sem sobrescrever variáveis.
+
+Executar com: python -m benchmarks.startup_time --runs 5 --max-seconds 2.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import BACKEND_DIR, migrate_database
+from cryptography.fernet import Fernet
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=2.5,
+        help="Limite para a mediana do import até a primeira resposta",
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+async def measure_startup():
+    """Executado no processo filho: mede import, lifespan e primeira resposta"""
+    started = time.perf_counter()
+
+    import httpx
+    from app.database import async_engine, engine
+    from app.main import app
+
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        lifespan_ready = time.perf_counter()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+        ready = time.perf_counter()
+
+        # Conexões abertas até aqui (em uso ou devolvidas ao pool)
+        connections = sum(
+            pool.checkedin() + pool.checkedout()
+            for pool in (engine.pool, async_engine.pool)
+        )
+
+    return {
+        "import": imported - started,
+        "lifespan": lifespan_ready - imported,
+        "ready": ready - started,
+        "connections": connections,
+    }
+
+
+def run_child():
+    print(json.dumps(asyncio.run(measure_startup())))
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child()
+        return
+
+    # Configurações lidas na importação da aplicação
+    database_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_file}"
+    os.environ.setdefault("WALLET_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+    try:
+        migrate_database()
+
+        samples = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.startup_time", "--child"],
+                cwd=BACKEND_DIR,
+                env=os.environ,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        os.remove(database_file)
+
+    for stage in ("import", "lifespan", "ready"):
+        values = [sample[stage] for sample in samples]
+        print(
+            f"{stage:>8}: mediana {statistics.median(values) * 1000:.0f} ms, "
+            f"máx {max(values) * 1000:.0f} ms"
+        )
+
+    ready = statistics.median(sample["ready"] for sample in samples)
+    connections = max(sample["connections"] for sample in samples)
+    failures = []
+    if ready > args.max_seconds:
+        failures.append(
+            f"inicialização levou {ready:.2f}s (limite {args.max_seconds:.2f}s)"
+        )
+    if connections:
+        failures.append(f"{connections} conexões abertas antes da primeira requisição")
+
+    if failures:
+        for failure in failures:
+            print(f"FALHOU: {failure}")
+        sys.exit(1)
+    print(f"OK: pronta em {ready:.2f}s sem conexões com o banco")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""chain mirror tables
+
+Histórico de operações e espelho local dos saldos de certificação.
+
+Revision ID: 3e7a1c9d5b24
+Revises: 2dd86c88f220
+Create Date: 2026-10-18 03:31:08.511902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e7a1c9d5b24'
+down_revision = '2dd86c88f220'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('certification_transactions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('paging_token', sa.String(length=64), nullable=True),
+    sa.Column('transaction_hash', sa.String(length=64), nullable=False),
+    sa.Column('operation_type', sa.String(length=32), nullable=False),
+    sa.Column('source_account', sa.String(length=56), nullable=False),
+    sa.Column('stellar_public_key', sa.String(length=56), nullable=False),
+    sa.Column('asset_code', sa.String(length=12), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=20, scale=7), nullable=False),
+    sa.Column('memo', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('paging_token')
+    )
+    op.create_index('ix_certification_transactions_account_created', 'certification_transactions', ['stellar_public_key', 'created_at'], unique=False)
+    op.create_index(op.f('ix_certification_transactions_id'), 'certification_transactions', ['id'], unique=False)
+    op.create_table('restaurant_chain_balances',
+    sa.Column('stellar_public_key', sa.String(length=56), nullable=False),
+    sa.Column('asset_code', sa.String(length=12), nullable=False),
+    sa.Column('asset_issuer', sa.String(length=56), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=20, scale=7), nullable=False),
+    sa.Column('synced_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('stellar_public_key', 'asset_code')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('restaurant_chain_balances')
+    op.drop_index(op.f('ix_certification_transactions_id'), table_name='certification_transactions')
+    op.drop_index('ix_certification_transactions_account_created', table_name='certification_transactions')
+    op.drop_table('certification_transactions')
@@ -0,0 +1,33 @@
+"""auditor work queue
+
+Revision ID: 4f8b2e6c9a13
+Revises: e3a9c4d17b28
+Create Date: 2026-10-18 04:40:55.271390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8b2e6c9a13'
+down_revision = 'e3a9c4d17b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('certifications', sa.Column('assigned_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_certifications_unassigned_queue',
+        'certifications',
+        ['created_at', 'certification_type'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending' AND auditor_id IS NULL"),
+        sqlite_where=sa.text("status = 'pending' AND auditor_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_certifications_unassigned_queue', table_name='certifications')
+    op.drop_column('certifications', 'assigned_at')
@@ -0,0 +1,28 @@
+"""cursor pagination indexes
+
+Índices (created_at, id) da paginação por cursor de restaurantes e usuários.
+
+Revision ID: 5b8e1f4a2c90
+Revises: e2f4a7c1b638
+Create Date: 2026-10-18 03:40:02.917245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e1f4a2c90'
+down_revision = 'e2f4a7c1b638'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_restaurants_created_at_id', 'restaurants', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_restaurants_created_at_id', table_name='restaurants')
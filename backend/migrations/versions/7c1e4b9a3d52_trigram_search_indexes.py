@@ -0,0 +1,49 @@
+"""trigram search indexes
+
+Revision ID: 7c1e4b9a3d52
+Revises: 5b8e1f4a2c90
+Create Date: 2026-10-18 03:45:12.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b9a3d52'
+down_revision = '5b8e1f4a2c90'
+branch_labels = None
+depends_on = None
+
+# Colunas usadas nos filtros ILIKE '%termo%' e na busca por similaridade
+TRIGRAM_INDEXES = [
+    ('ix_restaurants_name_trgm', 'restaurants', 'name'),
+    ('ix_restaurants_address_trgm', 'restaurants', 'address'),
+    ('ix_users_name_trgm', 'users', 'name'),
+    ('ix_users_email_trgm', 'users', 'email'),
+]
+
+
+def upgrade() -> None:
+    # pg_trgm só existe no PostgreSQL; no SQLite a busca usa LIKE sem índice
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column_name: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for index_name, table_name, _ in TRIGRAM_INDEXES:
+        op.drop_index(index_name, table_name=table_name)
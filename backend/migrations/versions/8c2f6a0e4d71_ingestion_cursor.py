@@ -0,0 +1,31 @@
+"""ingestion cursor
+
+Cursor da ingestão incremental das operações do emissor.
+
+Revision ID: 8c2f6a0e4d71
+Revises: 3e7a1c9d5b24
+Create Date: 2026-10-18 03:32:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2f6a0e4d71'
+down_revision = '3e7a1c9d5b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_cursors',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('paging_token', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingestion_cursors')
@@ -0,0 +1,24 @@
+"""user token version
+
+Revision ID: 9a6d3f1b7e40
+Revises: 4f8b2e6c9a13
+Create Date: 2026-10-18 05:03:17.662081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a6d3f1b7e40'
+down_revision = '4f8b2e6c9a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,37 @@
+"""created_at not null
+
+Revision ID: a7d3e5c1f209
+Revises: f2c8d5a3b916
+Create Date: 2026-10-18 10:12:31.402518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e5c1f209'
+down_revision = 'f2c8d5a3b916'
+branch_labels = None
+depends_on = None
+
+# Tabelas paginadas por cursor em (created_at, id)
+TABLES = ('restaurants', 'users')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # Linhas sem data de criação passam a ser as primeiras da paginação
+        op.execute(
+            f"UPDATE {table} SET created_at = "
+            f"COALESCE((SELECT MIN(created_at) FROM {table}), CURRENT_TIMESTAMP) "
+            "WHERE created_at IS NULL"
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
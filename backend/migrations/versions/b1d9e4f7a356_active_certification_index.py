@@ -0,0 +1,34 @@
+"""active certification index
+
+Índice de certificações ativas por restaurante e tipo, usado nas buscas.
+
+Revision ID: b1d9e4f7a356
+Revises: 8c2f6a0e4d71
+Create Date: 2026-10-18 03:33:57.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1d9e4f7a356'
+down_revision = '8c2f6a0e4d71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('restaurant_active_certifications',
+    sa.Column('certification_type', sa.String(length=20), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('certification_id', sa.Integer(), nullable=True),
+    sa.Column('activated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['certification_id'], ['certifications.id'], ),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('certification_type', 'restaurant_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('restaurant_active_certifications')
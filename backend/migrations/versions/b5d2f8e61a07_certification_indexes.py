@@ -0,0 +1,47 @@
+"""certification indexes
+
+Revision ID: b5d2f8e61a07
+Revises: 7c1e4b9a3d52
+Create Date: 2026-10-18 04:02:41.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d2f8e61a07'
+down_revision = '7c1e4b9a3d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_certifications_status_type_created', 'certifications', ['status', 'certification_type', 'created_at'], unique=False)
+    op.create_index('ix_certifications_auditor_status', 'certifications', ['auditor_id', 'status'], unique=False)
+    op.create_index('ix_certifications_restaurant_type', 'certifications', ['restaurant_id', 'certification_type'], unique=False)
+
+    # Solicitações pendentes duplicadas (criadas por corrida na verificação
+    # antiga) são rejeitadas, mantendo a mais antiga, antes do índice único
+    op.execute(
+        "UPDATE certifications SET status = 'rejected', "
+        "notes = 'Solicitação pendente duplicada' "
+        "WHERE status = 'pending' AND id NOT IN ("
+        "SELECT MIN(id) FROM certifications WHERE status = 'pending' "
+        "GROUP BY restaurant_id, certification_type)"
+    )
+    op.create_index(
+        'uq_certifications_pending_restaurant_type',
+        'certifications',
+        ['restaurant_id', 'certification_type'],
+        unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_certifications_pending_restaurant_type', table_name='certifications')
+    op.drop_index('ix_certifications_restaurant_type', table_name='certifications')
+    op.drop_index('ix_certifications_auditor_status', table_name='certifications')
+    op.drop_index('ix_certifications_status_type_created', table_name='certifications')
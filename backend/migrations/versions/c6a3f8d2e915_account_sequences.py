@@ -0,0 +1,31 @@
+"""account sequences
+
+Números de sequência alocados localmente para as contas de origem.
+
+Revision ID: c6a3f8d2e915
+Revises: b1d9e4f7a356
+Create Date: 2026-10-18 03:35:22.093467
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6a3f8d2e915'
+down_revision = 'b1d9e4f7a356'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('account_sequences',
+    sa.Column('account_id', sa.String(length=56), nullable=False),
+    sa.Column('sequence', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('account_sequences')
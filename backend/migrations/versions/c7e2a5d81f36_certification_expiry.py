@@ -0,0 +1,33 @@
+"""certification expiry
+
+Revision ID: c7e2a5d81f36
+Revises: 9a6d3f1b7e40
+Create Date: 2026-10-18 06:12:41.308519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a5d81f36'
+down_revision = '9a6d3f1b7e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('certifications', sa.Column('revoked_at', sa.DateTime(), nullable=True))
+    op.add_column('certifications', sa.Column('revocation_hash', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_certifications_status_expires',
+        'certifications',
+        ['status', 'expires_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_certifications_status_expires', table_name='certifications')
+    op.drop_column('certifications', 'revocation_hash')
+    op.drop_column('certifications', 'revoked_at')
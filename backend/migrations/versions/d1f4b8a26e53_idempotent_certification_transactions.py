@@ -0,0 +1,42 @@
+"""idempotent certification transactions
+
+Revision ID: d1f4b8a26e53
+Revises: c7e2a5d81f36
+Create Date: 2026-10-18 07:05:12.418730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f4b8a26e53'
+down_revision = 'c7e2a5d81f36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Operações registradas duas vezes (pela rota e pela ingestão) são
+    # removidas antes do índice único, mantendo a linha já confirmada pela
+    # ingestão ou, entre iguais, a mais antiga
+    op.execute(
+        "DELETE FROM certification_transactions WHERE id IN ("
+        "SELECT t.id FROM certification_transactions t "
+        "JOIN certification_transactions o "
+        "ON o.transaction_hash = t.transaction_hash "
+        "AND o.stellar_public_key = t.stellar_public_key "
+        "AND o.asset_code = t.asset_code "
+        "WHERE (o.paging_token IS NOT NULL AND t.paging_token IS NULL) "
+        "OR ((o.paging_token IS NULL) = (t.paging_token IS NULL) AND o.id < t.id))"
+    )
+    op.create_index(
+        'uq_certification_transactions_operation',
+        'certification_transactions',
+        ['transaction_hash', 'stellar_public_key', 'asset_code'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_certification_transactions_operation', table_name='certification_transactions')
@@ -0,0 +1,42 @@
+"""backfill active certifications
+
+Revision ID: d4a7c2e9f150
+Revises: d1f4b8a26e53
+Create Date: 2026-10-18 07:31:48.902215
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c2e9f150'
+down_revision = 'd1f4b8a26e53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Certificações aprovadas antes do índice existir: a mais recente de cada
+    # restaurante e tipo, em um único INSERT ... SELECT
+    op.get_bind().execute(
+        sa.text(
+            "INSERT INTO restaurant_active_certifications "
+            "(certification_type, restaurant_id, certification_id, activated_at) "
+            "SELECT c.certification_type, c.restaurant_id, MAX(c.id), MAX(c.issued_at) "
+            "FROM certifications c "
+            "WHERE c.status = 'approved' AND c.expires_at > :now "
+            "AND NOT EXISTS (SELECT 1 FROM restaurant_active_certifications a "
+            "WHERE a.restaurant_id = c.restaurant_id "
+            "AND a.certification_type = c.certification_type) "
+            "GROUP BY c.certification_type, c.restaurant_id"
+        ),
+        {"now": datetime.now()},
+    )
+
+
+def downgrade() -> None:
+    # Os dados preenchidos continuam válidos para o índice
+    pass
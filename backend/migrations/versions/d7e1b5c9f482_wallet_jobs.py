@@ -0,0 +1,42 @@
+"""wallet jobs
+
+Fila de provisionamento assíncrono das carteiras dos cadastros.
+
+Revision ID: d7e1b5c9f482
+Revises: c6a3f8d2e915
+Create Date: 2026-10-18 03:36:48.775201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e1b5c9f482'
+down_revision = 'c6a3f8d2e915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wallet_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('stellar_public_key', sa.String(length=56), nullable=False),
+    sa.Column('secret_key', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('trustlines', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_wallet_jobs_status_next_attempt', 'wallet_jobs', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wallet_jobs_status_next_attempt', table_name='wallet_jobs')
+    op.drop_table('wallet_jobs')
@@ -0,0 +1,40 @@
+"""wallet pool
+
+Estoque de carteiras pré-provisionadas para os cadastros.
+
+Revision ID: e2f4a7c1b638
+Revises: d7e1b5c9f482
+Create Date: 2026-10-18 03:38:10.352980
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f4a7c1b638'
+down_revision = 'd7e1b5c9f482'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wallet_pool',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stellar_public_key', sa.String(length=56), nullable=False),
+    sa.Column('encrypted_secret_key', sa.Text(), nullable=True),
+    sa.Column('trustlines', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stellar_public_key')
+    )
+    op.create_index(op.f('ix_wallet_pool_id'), 'wallet_pool', ['id'], unique=False)
+    op.create_index('ix_wallet_pool_status_id', 'wallet_pool', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wallet_pool_status_id', table_name='wallet_pool')
+    op.drop_index(op.f('ix_wallet_pool_id'), table_name='wallet_pool')
+    op.drop_table('wallet_pool')
@@ -0,0 +1,88 @@
+"""jsonb list columns
+
+Revision ID: e3a9c4d17b28
+Revises: b5d2f8e61a07
+Create Date: 2026-10-18 04:21:09.804316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c4d17b28'
+down_revision = 'b5d2f8e61a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No SQLite o JSON continua armazenado como texto; só o tipo declarado muda
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('certifications') as batch_op:
+            batch_op.alter_column('products', type_=sa.JSON(), existing_type=sa.Text(), existing_nullable=False)
+        with op.batch_alter_table('auditors') as batch_op:
+            batch_op.alter_column('specializations', type_=sa.JSON(), existing_type=sa.Text(), existing_nullable=False)
+        return
+
+    op.alter_column(
+        'certifications',
+        'products',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=False,
+        postgresql_using='products::jsonb',
+    )
+    op.alter_column(
+        'auditors',
+        'specializations',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=False,
+        postgresql_using='specializations::jsonb',
+    )
+    op.create_index(
+        'ix_certifications_products_gin',
+        'certifications',
+        ['products'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'products': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_auditors_specializations_gin',
+        'auditors',
+        ['specializations'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'specializations': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('auditors') as batch_op:
+            batch_op.alter_column('specializations', type_=sa.Text(), existing_type=sa.JSON(), existing_nullable=False)
+        with op.batch_alter_table('certifications') as batch_op:
+            batch_op.alter_column('products', type_=sa.Text(), existing_type=sa.JSON(), existing_nullable=False)
+        return
+
+    op.drop_index('ix_auditors_specializations_gin', table_name='auditors')
+    op.drop_index('ix_certifications_products_gin', table_name='certifications')
+    op.alter_column(
+        'auditors',
+        'specializations',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='specializations::text',
+    )
+    op.alter_column(
+        'certifications',
+        'products',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='products::text',
+    )
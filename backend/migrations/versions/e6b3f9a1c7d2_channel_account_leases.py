@@ -0,0 +1,29 @@
+"""channel account leases
+
+Revision ID: e6b3f9a1c7d2
+Revises: d4a7c2e9f150
+Create Date: 2026-10-18 08:02:17.553904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3f9a1c7d2'
+down_revision = 'd4a7c2e9f150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('channel_accounts',
+    sa.Column('public_key', sa.String(length=56), nullable=False),
+    sa.Column('lease_id', sa.String(length=36), nullable=True),
+    sa.Column('leased_until', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('public_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('channel_accounts')
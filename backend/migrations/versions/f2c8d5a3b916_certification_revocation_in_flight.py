@@ -0,0 +1,24 @@
+"""certification revocation in flight
+
+Revision ID: f2c8d5a3b916
+Revises: e6b3f9a1c7d2
+Create Date: 2026-10-18 08:40:53.117026
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d5a3b916'
+down_revision = 'e6b3f9a1c7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('certifications', sa.Column('revocation_started_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('certifications', 'revocation_started_at')
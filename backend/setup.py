@@ -4,7 +4,33 @@ Setup script para FoodTrust - Certificação Alimentar na Blockchain
 Cria chaves Stellar para o emissor de tokens e configura o ambiente
 """
 
-from stellar_sdk import Keypair
+from cryptography.fernet import Fernet
+from stellar_sdk import AuthorizationFlag, Keypair, Network, Server, TransactionBuilder
+
+HORIZON_TESTNET_URL = "https://horizon-testnet.stellar.org"
+
+
+def enable_clawback(issuer_keypair):
+    """Permite ao emissor recuperar (clawback) os tokens de certificações expiradas.
+
+    Vale apenas para trustlines criadas depois desta configuração.
+    """
+    server = Server(HORIZON_TESTNET_URL)
+    transaction = (
+        TransactionBuilder(
+            source_account=server.load_account(issuer_keypair.public_key),
+            network_passphrase=Network.TESTNET_NETWORK_PASSPHRASE,
+            base_fee=100,
+        )
+        .append_set_options_op(
+            set_flags=AuthorizationFlag.AUTHORIZATION_REVOCABLE
+            | AuthorizationFlag.AUTHORIZATION_CLAWBACK_ENABLED
+        )
+        .set_timeout(30)
+        .build()
+    )
+    transaction.sign(issuer_keypair)
+    server.submit_transaction(transaction)
 
 
 def create_env_file():
@@ -27,6 +53,11 @@ def create_env_file():
     print(f"   Secret Key:  {issuer_keypair.secret}")
     print()
 
+    # Chave que cifra as chaves secretas das carteiras guardadas no banco
+    wallet_encryption_key = Fernet.generate_key().decode()
+    print("✅ Chave de criptografia das carteiras gerada (WALLET_ENCRYPTION_KEY)")
+    print()
+
     # Criar arquivo .env
     env_content = f"""# FoodTrust - Configurações da Blockchain Stellar
 STELLAR_NETWORK=testnet
@@ -36,6 +67,9 @@ STELLAR_HORIZON_URL=https://horizon-testnet.stellar.org
 ISSUER_PUBLIC_KEY={issuer_keypair.public_key}
 ISSUER_SECRET_KEY={issuer_keypair.secret}
 
+# Criptografia das chaves das carteiras (não altere após o primeiro cadastro)
+WALLET_ENCRYPTION_KEY={wallet_encryption_key}
+
 # Assets de Certificação
 VEGAN_ASSET=VEGAN
 GLUTEN_FREE_ASSET=GLUTENFREE
@@ -68,6 +102,12 @@ DATABASE_URL={database_url}
         if response.status_code == 200:
             print("✅ Conta criada no testnet com sucesso!")
             print(f"   Endereço: {issuer_keypair.public_key}")
+
+            try:
+                enable_clawback(issuer_keypair)
+                print("✅ Clawback habilitado para revogar certificações expiradas")
+            except Exception as e:
+                print(f"⚠️  Erro ao habilitar clawback no emissor: {e}")
         else:
             print("⚠️  Erro ao criar conta no testnet. Verifique sua conexão.")
     except Exception as e:
@@ -75,11 +115,14 @@ DATABASE_URL={database_url}
 
     print()
     print("🎯 Próximos passos:")
-    print("1. Execute: alembic init migrations")
-    print("2. Configure o arquivo alembic.ini com a URL do banco de dados")
-    print("3. Execute: alembic revision --autogenerate -m 'Initial migration'")
-    print("4. Execute: alembic upgrade head")
-    print("5. Execute: uvicorn app.main:app --reload --host 0.0.0.0 --port 8000")
+    print("1. Execute: alembic upgrade head (cria e atualiza as tabelas do banco)")
+    print("2. (Opcional) Execute: python setup_channels.py para criar contas de canal")
+    print("3. Execute: uvicorn app.main:app --reload --host 0.0.0.0 --port 8000")
+    print(
+        "4. Execute: python -m app.workers.wallet_jobs para provisionar as carteiras "
+        "dos cadastros (ou defina WALLET_JOB_WORKERS > 0 para rodá-lo na API)"
+    )
+    print("5. Execute: python -m app.workers.expiry para expirar certificações vencidas")
     print("6. Acesse: http://localhost:8000 para ver a API")
     print("7. Acesse: http://localhost:8000/docs para ver a documentação")
     print()
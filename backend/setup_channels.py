@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cria as contas de canal usadas para enviar emissões em paralelo.
+
+As contas são criadas e financiadas pela conta emissora em uma única
+transação, e suas chaves são adicionadas ao arquivo .env.
+"""
+
+import asyncio
+
+from app.config import get_settings
+from app.services.stellarService import AsyncStellarService
+from stellar_sdk import Keypair, TransactionBuilder
+
+CHANNEL_STARTING_BALANCE = "5"  # XLM para reserva mínima e taxas
+
+
+async def submit_channel_accounts(channel_keypairs):
+    """Cria todas as contas de canal em uma única transação do emissor"""
+    stellar_service = AsyncStellarService()
+    try:
+        issuer_account = await stellar_service.load_account(
+            stellar_service.issuer_keypair.public_key
+        )
+        transaction_builder = TransactionBuilder(
+            source_account=issuer_account,
+            network_passphrase=stellar_service.network_passphrase,
+            base_fee=100,
+        )
+        for keypair in channel_keypairs:
+            transaction_builder.append_create_account_op(
+                destination=keypair.public_key,
+                starting_balance=CHANNEL_STARTING_BALANCE,
+            )
+        transaction = transaction_builder.set_timeout(30).build()
+        transaction.sign(stellar_service.issuer_keypair)
+
+        return await stellar_service.submit_transaction(transaction)
+    finally:
+        await stellar_service.close()
+
+
+def create_channel_accounts():
+    """Cria e financia as contas de canal e atualiza o .env"""
+
+    print("🚀 Configurando contas de canal do FoodTrust")
+    print("=" * 50)
+
+    settings = get_settings()
+    if not settings.ISSUER_SECRET_KEY:
+        print("⚠️  Configure ISSUER_SECRET_KEY no .env antes (execute setup.py)")
+        return
+
+    count = input("Quantas contas de canal deseja criar? [5]: ")
+    count = int(count) if count else 5
+
+    channel_keypairs = [Keypair.random() for _ in range(count)]
+
+    try:
+        response = asyncio.run(submit_channel_accounts(channel_keypairs))
+    except Exception as e:
+        print(f"⚠️  Erro ao criar contas de canal: {e}")
+        return
+
+    print(f"✅ {count} contas de canal criadas (transação {response['hash']})")
+    for keypair in channel_keypairs:
+        print(f"   {keypair.public_key}")
+    print()
+
+    secret_keys = [
+        key.strip() for key in settings.CHANNEL_SECRET_KEYS.split(",") if key.strip()
+    ]
+    secret_keys += [keypair.secret for keypair in channel_keypairs]
+
+    # Atualizar o .env mantendo as demais configurações
+    try:
+        with open(".env") as f:
+            lines = [
+                line for line in f.readlines() if not line.startswith("CHANNEL_SECRET_KEYS=")
+            ]
+    except FileNotFoundError:
+        lines = []
+
+    lines.append(f"CHANNEL_SECRET_KEYS={','.join(secret_keys)}\n")
+    with open(".env", "w") as f:
+        f.writelines(lines)
+
+    print("✅ Arquivo .env atualizado com CHANNEL_SECRET_KEYS")
+    print("⚠️  IMPORTANTE: Reinicie a API para usar as novas contas de canal!")
+
+
+if __name__ == "__main__":
+    create_channel_accounts()
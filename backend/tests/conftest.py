@@ -0,0 +1,100 @@
+"""
+Fixtures dos testes: banco SQLite criado pelas migrações e cliente da API.
+
+As variáveis de ambiente precisam ser definidas antes de importar a
+aplicação, pois as configurações e os engines são criados na importação.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import event
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_FILE}"
+os.environ.setdefault("WALLET_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+@pytest.fixture
+def alembic_config():
+    """Configuração do Alembic apontando para as migrações do projeto.
+
+    Para migrar outro banco, informe a conexão em config.attributes["connection"].
+    """
+    return _alembic_config()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    """Cria o schema do banco de testes com alembic upgrade head"""
+    from alembic import command
+
+    command.upgrade(_alembic_config(), "head")
+    yield
+    os.remove(DATABASE_FILE)
+
+
+@pytest.fixture(scope="session")
+def client(migrated_database):
+    from app.main import app
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(migrated_database):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class StatementCounter:
+    """Statements SQL executados pelas rotas (engine assíncrono)"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def count_statements():
+    """Conta os statements executados dentro do bloco `with count_statements():`"""
+    from app.database import async_engine
+
+    @contextmanager
+    def counting():
+        counter = StatementCounter()
+        event.listen(async_engine.sync_engine, "before_cursor_execute", counter._record)
+        try:
+            yield counter
+        finally:
+            event.remove(
+                async_engine.sync_engine, "before_cursor_execute", counter._record
+            )
+
+    return counting
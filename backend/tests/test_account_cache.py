@@ -0,0 +1,82 @@
+"""
+Cache de contas do Horizon: invalidação durante buscas em andamento.
+"""
+
+import asyncio
+
+from app.utils.cache import TTLCache
+
+
+def test_set_drops_values_fetched_before_invalidation():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation("conta")
+
+    cache.invalidate("conta")
+
+    assert cache.set("conta", "antiga", generation=generation) is False
+    assert cache.get("conta") is None
+    assert cache.set("conta", "nova", generation=cache.generation("conta"))
+    assert cache.get("conta") == "nova"
+
+
+def test_generations_stay_stale_after_being_pruned():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation("conta")
+    cache.invalidate("conta")
+
+    # Outras invalidações descartam a geração guardada para "conta"
+    for key in ("a", "b", "c"):
+        cache.invalidate(key)
+
+    assert cache.set("conta", "antiga", generation=generation) is False
+
+
+class SlowAccounts:
+    """Endpoint de contas do Horizon que responde quando liberado"""
+
+    def __init__(self):
+        self.released = asyncio.Event()
+        self.calls = 0
+
+    def accounts(self):
+        return self
+
+    def account_id(self, public_key):
+        return self
+
+    async def call(self):
+        self.calls += 1
+        await self.released.wait()
+        return {"balances": "antes da transação"}
+
+
+def stellar_service(server, cache):
+    from app.services.stellarService import AsyncStellarService
+
+    service = AsyncStellarService()
+    service.server = server
+    service.account_cache = cache
+    return service
+
+
+def test_revalidation_finishing_after_invalidation_is_discarded():
+    async def scenario():
+        cache = TTLCache(maxsize=10, ttl=0, stale_ttl=60)
+        cache.set("conta", {"balances": "expirado"})
+        server = SlowAccounts()
+        first, second = stellar_service(server, cache), stellar_service(server, cache)
+
+        # Entrada expirada: servida enquanto uma única revalidação roda
+        assert first._cached_account("conta") == {"balances": "expirado"}
+        assert second._cached_account("conta") == {"balances": "expirado"}
+        revalidation = first._revalidations["conta"]
+        await asyncio.sleep(0)
+
+        first.invalidate_account("conta")
+        server.released.set()
+        await revalidation
+
+        assert server.calls == 1
+        assert cache.get_entry("conta") is None
+
+    asyncio.run(scenario())
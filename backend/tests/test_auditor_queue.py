@@ -0,0 +1,208 @@
+"""
+Distribuição das certificações pendentes entre os auditores.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from sqlalchemy import delete, select
+from stellar_sdk import Keypair
+
+# Especialidade sem auditores nos outros módulos de teste
+SPECIALIZATION = "seafood_free"
+
+
+@pytest.fixture
+def catalogue(db):
+    """Cria auditores e restaurantes, removidos ao final do teste"""
+    auditor_ids, restaurant_ids = [], []
+
+    def auditor(is_active=True):
+        created = database_models.Auditor(
+            name="Auditor da fila",
+            email=f"{Keypair.random().public_key[:12].lower()}@example.com",
+            specializations=[SPECIALIZATION],
+            stellar_public_key=Keypair.random().public_key,
+            is_active=is_active,
+        )
+        db.add(created)
+        db.commit()
+        auditor_ids.append(created.id)
+        return created.id
+
+    def restaurant():
+        created = database_models.Restaurant(
+            name="Restaurante da fila",
+            address="Rua C",
+            stellar_public_key=Keypair.random().public_key,
+        )
+        db.add(created)
+        db.commit()
+        restaurant_ids.append(created.id)
+        return created.id
+
+    def pending(auditor_id=None, assigned_at=None):
+        certification = database_models.Certification(
+            restaurant_id=restaurant(),
+            certification_type=SPECIALIZATION,
+            products=["prato"],
+            status=CertificationStatus.PENDING,
+            auditor_id=auditor_id,
+            assigned_at=assigned_at or (auditor_id and datetime.now()),
+        )
+        db.add(certification)
+        db.commit()
+        return certification.id
+
+    yield auditor, restaurant, pending
+
+    db.rollback()
+    db.execute(
+        delete(database_models.Certification).where(
+            database_models.Certification.restaurant_id.in_(restaurant_ids)
+        )
+    )
+    db.execute(
+        delete(database_models.Restaurant).where(
+            database_models.Restaurant.id.in_(restaurant_ids)
+        )
+    )
+    db.execute(
+        delete(database_models.Auditor).where(database_models.Auditor.id.in_(auditor_ids))
+    )
+    db.commit()
+
+
+def assigned_auditors(db, certification_ids):
+    db.expire_all()
+    return db.scalars(
+        select(database_models.Certification.auditor_id)
+        .where(database_models.Certification.id.in_(certification_ids))
+        .order_by(database_models.Certification.id)
+    ).all()
+
+
+def assign_pending(**options):
+    from app.database import AsyncSessionLocal
+    from app.services.auditorQueueService import AuditorWorkQueue
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            assigned = await AuditorWorkQueue(**options).assign_pending(session)
+            await session.commit()
+            return assigned
+
+    return asyncio.run(run())
+
+
+def test_requests_go_to_the_least_loaded_auditor(client, catalogue):
+    auditor, restaurant, pending = catalogue
+    busy, idle = auditor(), auditor()
+    pending(busy)
+    pending(busy)
+
+    assigned = [
+        client.post(
+            "/api/certification/request",
+            json={
+                "restaurant_id": restaurant(),
+                "certification_type": SPECIALIZATION,
+                "products": ["prato"],
+            },
+        ).json()["data"]["auditor_id"]
+        for _ in range(4)
+    ]
+
+    # O auditor ocioso recebe até empatar; depois a menor carga alterna
+    assert assigned == [idle, idle, busy, idle]
+
+
+def test_requests_stay_queued_when_every_auditor_is_full(db, catalogue):
+    auditor, _, pending = catalogue
+    full = auditor()
+    pending(full)
+    queued = pending()
+
+    assign_pending(max_assigned=1)
+    assert assigned_auditors(db, [queued]) == [None]
+
+
+def test_stale_and_inactive_assignments_return_to_the_queue(db, catalogue):
+    auditor, _, pending = catalogue
+    stale_auditor, available = auditor(), auditor()
+    inactive = auditor(is_active=False)
+    stale = pending(stale_auditor, assigned_at=datetime.now() - timedelta(hours=2))
+    abandoned = pending(inactive)
+    current = [pending(stale_auditor), pending(stale_auditor)]
+
+    assign_pending(assignment_timeout=3600)
+    assert assigned_auditors(db, [stale, abandoned, *current]) == [
+        available,
+        available,
+        stale_auditor,
+        stale_auditor,
+    ]
+
+
+def test_deactivating_an_auditor_reassigns_their_certifications(client, db, catalogue):
+    auditor, _, pending = catalogue
+    leaving, remaining = auditor(), auditor()
+    certification = pending(leaving)
+
+    assert client.post(f"/api/auditor/{leaving}/deactivate").status_code == 200
+    assert assigned_auditors(db, [certification]) == [remaining]
+
+
+def test_bulk_requests_assign_every_new_certification(client, db, catalogue, monkeypatch):
+    from app.routes.certification import work_queue
+
+    auditor, restaurant, _ = catalogue
+    auditors = {auditor(), auditor()}
+    monkeypatch.setattr(work_queue, "max_assigned", 1000)
+
+    # Mais solicitações do que o limite padrão de assign_pending
+    response = client.post(
+        "/api/certification/request/bulk",
+        json={
+            "requests": [
+                {
+                    "restaurant_id": restaurant(),
+                    "certification_type": SPECIALIZATION,
+                    "products": ["prato"],
+                }
+                for _ in range(150)
+            ]
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    certification_ids = [
+        result["certification_id"] for result in response.json()["data"]["results"]
+    ]
+    assigned = assigned_auditors(db, certification_ids)
+    assert set(assigned) == auditors
+    assert sorted(assigned.count(auditor_id) for auditor_id in auditors) == [75, 75]
+
+
+def test_claim_at_capacity_still_releases_stale_assignments(db, catalogue):
+    from app.database import AsyncSessionLocal
+    from app.services.auditorQueueService import AuditorWorkQueue
+
+    auditor, _, pending = catalogue
+    stale_auditor, full = auditor(), auditor()
+    stale = pending(stale_auditor, assigned_at=datetime.now() - timedelta(hours=2))
+    pending(full)
+
+    async def claim():
+        async with AsyncSessionLocal() as session:
+            claimer = await session.get(database_models.Auditor, full)
+            queue = AuditorWorkQueue(max_assigned=1, assignment_timeout=3600)
+            return await queue.claim_next(session, claimer)
+
+    result = asyncio.run(claim())
+
+    assert result["success"] is False
+    assert assigned_auditors(db, [stale]) == [None]
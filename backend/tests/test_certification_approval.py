@@ -0,0 +1,165 @@
+"""
+Aprovações simultâneas de certificações emitidas em lote.
+
+O Horizon é substituído por um serviço falso; o lote, a alocação de
+sequências e o espelho de saldos são os da aplicação.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from app.config import get_settings
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.channelAccountPool import ChannelAccountPool
+from app.services.issuanceBatcher import CertificationIssuanceBatcher
+from app.services.sequenceManager import SequenceManager
+from app.services.stellarService import BaseStellarService
+from sqlalchemy import delete, select
+from stellar_sdk import Account, Keypair
+
+settings = get_settings()
+
+# Mais aprovações do que conexões no pool do engine assíncrono
+APPROVALS = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW + 1
+
+
+class FakeStellarService(BaseStellarService):
+    """Aceita qualquer pagamento de certificação sem consultar o Horizon"""
+
+    def __init__(self):
+        super().__init__()
+        self.issuer_keypair = Keypair.random()
+        self.sequence_manager = SequenceManager(self)
+        self.submitted = []
+
+    async def prepare_certification_payment(self, restaurant_public_key, certification_type):
+        return {"success": True, "asset_code": "GLUTENFREE"}
+
+    async def load_account(self, public_key):
+        return Account(public_key, 1)
+
+    async def submit_transaction(self, transaction):
+        self.submitted.append(transaction)
+        return {"hash": transaction.hash_hex()}
+
+    def invalidate_account(self, public_key):
+        pass
+
+
+@pytest.fixture
+def pending_certifications(db):
+    """Auditor e uma certificação pendente por restaurante, removidos ao final"""
+    auditor = database_models.Auditor(
+        name="Auditor das aprovações",
+        email="aprovacoes@example.com",
+        specializations=["gluten_free"],
+        stellar_public_key=Keypair.random().public_key,
+    )
+    db.add(auditor)
+    restaurants = [
+        database_models.Restaurant(
+            name=f"Restaurante {index}",
+            address="Rua D",
+            stellar_public_key=Keypair.random().public_key,
+        )
+        for index in range(APPROVALS)
+    ]
+    db.add_all(restaurants)
+    db.flush()
+    certifications = [
+        database_models.Certification(
+            restaurant_id=restaurant.id,
+            certification_type="gluten_free",
+            products=["pão"],
+            status=CertificationStatus.PENDING,
+        )
+        for restaurant in restaurants
+    ]
+    db.add_all(certifications)
+    db.commit()
+
+    yield auditor.id, [certification.id for certification in certifications]
+
+    db.rollback()
+    public_keys = [restaurant.stellar_public_key for restaurant in restaurants]
+    restaurant_ids = [restaurant.id for restaurant in restaurants]
+    for model, column, values in (
+        (database_models.CertificationTransaction, "stellar_public_key", public_keys),
+        (database_models.RestaurantChainBalance, "stellar_public_key", public_keys),
+        (database_models.RestaurantActiveCertification, "restaurant_id", restaurant_ids),
+        (database_models.Certification, "restaurant_id", restaurant_ids),
+        (database_models.Restaurant, "id", restaurant_ids),
+    ):
+        db.execute(delete(model).where(getattr(model, column).in_(values)))
+    db.execute(delete(database_models.Auditor).where(database_models.Auditor.id == auditor.id))
+    db.commit()
+
+
+@pytest.fixture
+def stellar(pending_certifications, db):
+    from app.dependencies import get_chain_mirror, get_issuance_batcher, get_stellar_service
+    from app.main import app
+
+    service = FakeStellarService()
+    batcher = CertificationIssuanceBatcher(
+        service,
+        max_operations=APPROVALS,
+        max_wait=1.0,
+        channel_pool=ChannelAccountPool(secret_keys=[]),
+    )
+    app.dependency_overrides[get_stellar_service] = lambda: service
+    app.dependency_overrides[get_chain_mirror] = lambda: ChainMirrorService(service)
+    app.dependency_overrides[get_issuance_batcher] = lambda: batcher
+    yield service
+
+    for dependency in (get_stellar_service, get_chain_mirror, get_issuance_batcher):
+        app.dependency_overrides.pop(dependency, None)
+    db.execute(
+        delete(database_models.AccountSequence).where(
+            database_models.AccountSequence.account_id == service.issuer_keypair.public_key
+        )
+    )
+    db.commit()
+
+
+def test_concurrent_approvals_do_not_exhaust_the_connection_pool(
+    db, stellar, pending_certifications
+):
+    from app.main import app
+
+    auditor_id, certification_ids = pending_certifications
+
+    async def approve_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(
+                    client.post(
+                        f"/api/certification/{certification_id}/approve",
+                        params={"auditor_id": auditor_id},
+                    )
+                    for certification_id in certification_ids
+                )
+            )
+
+    responses = asyncio.run(approve_all())
+
+    assert [response.status_code for response in responses] == [200] * APPROVALS
+    # Todas as aprovações entraram no mesmo lote, enviado uma única vez
+    assert len(stellar.submitted) == 1
+    assert {response.json()["data"]["transaction_hash"] for response in responses} == {
+        stellar.submitted[0].hash_hex()
+    }
+
+    db.expire_all()
+    auditor = db.get(database_models.Auditor, auditor_id)
+    assert auditor.certifications_issued == APPROVALS
+    statuses = db.scalars(
+        select(database_models.Certification.status).where(
+            database_models.Certification.id.in_(certification_ids)
+        )
+    ).all()
+    assert statuses == [CertificationStatus.APPROVED] * APPROVALS
@@ -0,0 +1,237 @@
+"""
+Revogação das certificações expiradas (clawback em lotes).
+
+O Horizon é substituído por um serviço falso que registra as transações
+enviadas e pode simular rejeições e envios sem resposta.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from app.models import database_models
+from app.models.schemas import CertificationStatus
+from sqlalchemy import delete, select
+from stellar_sdk import Account, Keypair
+from stellar_sdk.exceptions import BadRequestError
+
+
+class FakeSequenceManager:
+    def __init__(self):
+        self.sequence = 100
+
+    async def next_account(self, account_id):
+        self.sequence += 1
+        return Account(account_id, self.sequence - 1)
+
+    async def resync(self, account_id):
+        pass
+
+
+class FakeStellarService:
+    """Horizon em memória: guarda as transações aceitas pelo hash"""
+
+    def __init__(self):
+        from app.services.stellarService import BaseStellarService
+
+        self.builder = BaseStellarService()
+        self.builder.issuer_keypair = self.issuer_keypair = Keypair.random()
+        self.sequence_manager = FakeSequenceManager()
+        self.submitted = []
+        self.ledger = {}
+        self.failure = None
+
+    def build_clawback_batch_transaction(self, source_account, clawbacks):
+        return self.builder.build_clawback_batch_transaction(source_account, clawbacks)
+
+    async def submit_transaction(self, transaction):
+        operations = [
+            (operation.from_.account_id, operation.asset.code, operation.amount)
+            for operation in transaction.transaction.operations
+        ]
+        self.submitted.append(operations)
+        failure, self.failure = self.failure, None
+        if isinstance(failure, Exception):
+            raise failure
+        if failure != "dropped":
+            self.ledger[transaction.hash_hex()] = {"successful": True}
+        if failure is not None:
+            # "timeout": entrou no ledger, mas a resposta não chegou
+            raise asyncio.TimeoutError()
+        return {"hash": transaction.hash_hex()}
+
+    async def get_transaction(self, transaction_hash):
+        return self.ledger.get(transaction_hash)
+
+    def invalidate_account(self, public_key):
+        pass
+
+
+def rejected(*operation_codes):
+    error = BadRequestError.__new__(BadRequestError)
+    error.extras = {
+        "result_codes": {"transaction": "tx_failed", "operations": list(operation_codes)}
+    }
+    return error
+
+
+@pytest.fixture
+def stellar():
+    return FakeStellarService()
+
+
+@pytest.fixture
+def sweeper(stellar, monkeypatch):
+    from app.services import certificationExpiryService
+
+    monkeypatch.setattr(
+        certificationExpiryService.settings, "CERTIFICATION_REVOCATION_TIMEOUT", 60.0
+    )
+    return certificationExpiryService.CertificationExpirySweeper(stellar)
+
+
+@pytest.fixture
+def expired(db):
+    """Cria certificações vencidas; retorna (chave do restaurante, ids)
+
+    Os restaurantes criados são removidos ao final para não alterar as
+    páginas verificadas pelos outros testes.
+    """
+    public_keys = []
+
+    def create(cert_types):
+        public_key = Keypair.random().public_key
+        public_keys.append(public_key)
+        restaurant = database_models.Restaurant(
+            name="Expiração", address="Rua B", stellar_public_key=public_key
+        )
+        db.add(restaurant)
+        db.flush()
+        certifications = [
+            database_models.Certification(
+                restaurant_id=restaurant.id,
+                certification_type=cert_type,
+                products=["prato"],
+                status=CertificationStatus.APPROVED,
+                issued_at=datetime.now() - timedelta(days=400),
+                expires_at=datetime.now() - timedelta(days=1),
+            )
+            for cert_type in cert_types
+        ]
+        db.add_all(certifications)
+        db.commit()
+        return public_key, [certification.id for certification in certifications]
+
+    yield create
+
+    db.rollback()
+    for model in (
+        database_models.CertificationTransaction,
+        database_models.RestaurantChainBalance,
+    ):
+        db.execute(delete(model).where(model.stellar_public_key.in_(public_keys)))
+    restaurant_ids = select(database_models.Restaurant.id).where(
+        database_models.Restaurant.stellar_public_key.in_(public_keys)
+    )
+    db.execute(
+        delete(database_models.Certification).where(
+            database_models.Certification.restaurant_id.in_(restaurant_ids)
+        )
+    )
+    db.execute(
+        delete(database_models.Restaurant).where(
+            database_models.Restaurant.stellar_public_key.in_(public_keys)
+        )
+    )
+    db.commit()
+
+
+def certifications(db, ids):
+    db.expire_all()
+    return db.scalars(
+        select(database_models.Certification)
+        .where(database_models.Certification.id.in_(ids))
+        .order_by(database_models.Certification.id)
+    ).all()
+
+
+def test_sweep_claws_back_one_operation_per_account_and_asset(db, stellar, sweeper, expired):
+    first_key, first_ids = expired(["vegan", "vegan", "halal"])
+    second_key, second_ids = expired(["vegan"])
+
+    assert asyncio.run(sweeper.sweep()) == (4, 4)
+
+    assert len(stellar.submitted) == 1
+    assert sorted(stellar.submitted[0]) == sorted(
+        [
+            (first_key, "VEGAN", "2"),
+            (first_key, "HALAL", "1"),
+            (second_key, "VEGAN", "1"),
+        ]
+    )
+    rows = certifications(db, first_ids + second_ids)
+    assert all(row.status == CertificationStatus.EXPIRED for row in rows)
+    assert all(row.revoked_at and row.revocation_hash in stellar.ledger for row in rows)
+
+    balance = db.get(database_models.RestaurantChainBalance, (first_key, "VEGAN"))
+    assert balance.balance == Decimal("-2")
+
+
+def test_unanswered_submission_is_checked_on_horizon_before_retrying(
+    db, stellar, sweeper, expired, monkeypatch
+):
+    public_key, ids = expired(["kosher"])
+    stellar.failure = "timeout"
+
+    # Sem resposta: o lote fica em envio e não é reenviado antes do timeout
+    assert asyncio.run(sweeper.sweep()) == (1, 0)
+    assert asyncio.run(sweeper.sweep()) == (0, 0)
+    assert len(stellar.submitted) == 1
+    (row,) = certifications(db, ids)
+    assert row.revocation_hash and row.revoked_at is None
+
+    # Após o timeout o hash é encontrado no ledger e não há novo clawback
+    from app.services import certificationExpiryService
+
+    monkeypatch.setattr(
+        certificationExpiryService.settings, "CERTIFICATION_REVOCATION_TIMEOUT", 0.0
+    )
+    assert asyncio.run(sweeper.sweep()) == (0, 1)
+    assert len(stellar.submitted) == 1
+    (row,) = certifications(db, ids)
+    assert row.revoked_at is not None
+
+
+def test_submission_missing_from_ledger_is_resent(db, stellar, sweeper, expired, monkeypatch):
+    public_key, ids = expired(["kosher"])
+    stellar.failure = "dropped"
+    assert asyncio.run(sweeper.sweep()) == (1, 0)
+    (row,) = certifications(db, ids)
+    dropped_hash = row.revocation_hash
+
+    from app.services import certificationExpiryService
+
+    monkeypatch.setattr(
+        certificationExpiryService.settings, "CERTIFICATION_REVOCATION_TIMEOUT", 0.0
+    )
+    assert asyncio.run(sweeper.sweep()) == (0, 1)
+
+    assert len(stellar.submitted) == 2
+    (row,) = certifications(db, ids)
+    assert row.revoked_at is not None and row.revocation_hash != dropped_hash
+
+
+def test_rejected_batch_marks_unrecoverable_and_retries_the_rest(
+    db, stellar, sweeper, expired
+):
+    _, unrecoverable_ids = expired(["gluten_free"])
+    _, retried_ids = expired(["gluten_free"])
+    stellar.failure = rejected("op_not_clawback_enabled", "op_success")
+
+    assert asyncio.run(sweeper.sweep()) == (2, 2)
+
+    assert len(stellar.submitted) == 2
+    unrecoverable, retried = certifications(db, unrecoverable_ids + retried_ids)
+    assert unrecoverable.revoked_at is not None and unrecoverable.revocation_hash is None
+    assert retried.revoked_at is not None and retried.revocation_hash in stellar.ledger
@@ -0,0 +1,158 @@
+"""
+Índices da tabela certifications criados pelas migrações.
+
+Confere que os índices existem após alembic upgrade head, que o SQLite os
+escolhe para as consultas das rotas (EXPLAIN QUERY PLAN) e que a migração
+b5d2f8e61a07 resolve pendências duplicadas antes do índice único parcial,
+que passa a barrar novas duplicatas.
+"""
+
+from datetime import datetime
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+CERTIFICATION_INDEXES = {
+    "ix_certifications_status_type_created": (
+        ["status", "certification_type", "created_at"],
+        False,
+    ),
+    "ix_certifications_auditor_status": (["auditor_id", "status"], False),
+    "ix_certifications_restaurant_type": (["restaurant_id", "certification_type"], False),
+    "uq_certifications_pending_restaurant_type": (
+        ["restaurant_id", "certification_type"],
+        True,
+    ),
+    "ix_certifications_status_expires": (["status", "expires_at"], False),
+}
+
+
+@pytest.fixture(scope="module")
+def engine(migrated_database):
+    from app.database import engine
+
+    return engine
+
+
+def query_plan(engine, sql: str, **params) -> str:
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_certification_indexes_exist_after_migration(engine):
+    indexes = {
+        index["name"]: (index["column_names"], bool(index["unique"]))
+        for index in inspect(engine).get_indexes("certifications")
+    }
+
+    for name, definition in CERTIFICATION_INDEXES.items():
+        assert indexes.get(name) == definition, name
+
+
+@pytest.mark.parametrize(
+    "sql, params, index_name",
+    [
+        # GET /certification/pending?cert_type=...
+        (
+            "SELECT id FROM certifications "
+            "WHERE status = :status AND certification_type = :cert_type "
+            "ORDER BY created_at",
+            {"status": "pending", "cert_type": "vegan"},
+            "ix_certifications_status_type_created",
+        ),
+        # GET /certification/pending?auditor_id=...
+        (
+            "SELECT id FROM certifications WHERE auditor_id = :auditor_id AND status = :status",
+            {"auditor_id": 1, "status": "pending"},
+            "ix_certifications_auditor_status",
+        ),
+        # GET /certification/restaurant/{id}
+        (
+            "SELECT id FROM certifications WHERE restaurant_id = :restaurant_id",
+            {"restaurant_id": 1},
+            "ix_certifications_restaurant_type",
+        ),
+        # Varredura de expiração
+        (
+            "SELECT id FROM certifications WHERE status = :status AND expires_at <= :now",
+            {"status": "approved", "now": datetime(2026, 1, 1)},
+            "ix_certifications_status_expires",
+        ),
+    ],
+)
+def test_route_queries_use_certification_indexes(engine, sql, params, index_name):
+    plan = query_plan(engine, sql, **params)
+
+    assert index_name in plan, plan
+
+
+def test_index_migration_rejects_duplicate_pending_requests(alembic_config, tmp_path):
+    """Pendências duplicadas criadas antes do índice único mantêm só a mais antiga"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'dedupe.db'}")
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        command.upgrade(alembic_config, "7c1e4b9a3d52")
+
+        connection.execute(
+            text(
+                "INSERT INTO restaurants (id, name, address, stellar_public_key, created_at) "
+                "VALUES (1, 'R1', 'Rua A', 'G1', :now), (2, 'R2', 'Rua B', 'G2', :now)"
+            ),
+            {"now": datetime.now()},
+        )
+        rows = [
+            (1, 1, "vegan", "pending"),
+            (2, 1, "vegan", "pending"),
+            (3, 1, "vegan", "pending"),
+            (4, 1, "halal", "pending"),
+            (5, 1, "vegan", "approved"),
+            (6, 2, "vegan", "pending"),
+        ]
+        for row_id, restaurant_id, cert_type, status in rows:
+            connection.execute(
+                text(
+                    "INSERT INTO certifications "
+                    "(id, restaurant_id, certification_type, products, status, created_at) "
+                    "VALUES (:id, :restaurant_id, :cert_type, '[]', :status, :now)"
+                ),
+                {
+                    "id": row_id,
+                    "restaurant_id": restaurant_id,
+                    "cert_type": cert_type,
+                    "status": status,
+                    "now": datetime.now(),
+                },
+            )
+
+        command.upgrade(alembic_config, "b5d2f8e61a07")
+
+        # Daqui em diante a verificação de duplicidade é o próprio índice
+        with pytest.raises(IntegrityError):
+            connection.execute(
+                text(
+                    "INSERT INTO certifications "
+                    "(restaurant_id, certification_type, products, status, created_at) "
+                    "VALUES (1, 'vegan', '[]', 'pending', :now)"
+                ),
+                {"now": datetime.now()},
+            )
+
+        statuses = dict(
+            connection.execute(text("SELECT id, status FROM certifications")).all()
+        )
+        notes = dict(connection.execute(text("SELECT id, notes FROM certifications")).all())
+
+    assert statuses == {
+        1: "pending",
+        2: "rejected",
+        3: "rejected",
+        4: "pending",
+        5: "approved",
+        6: "pending",
+    }
+    assert notes[2] == notes[3] == "Solicitação pendente duplicada"
+    assert notes[1] is None
+    engine.dispose()
@@ -0,0 +1,81 @@
+"""
+Empréstimo de contas de canal pela tabela channel_accounts.
+
+Dois pools no mesmo banco fazem o papel de dois workers do uvicorn.
+"""
+
+import asyncio
+
+from stellar_sdk import Keypair
+
+CHANNEL_SECRETS = [Keypair.random().secret for _ in range(2)]
+
+
+def test_pools_never_lease_the_same_channel_at_once(migrated_database):
+    from app.services.channelAccountPool import ChannelAccountPool
+
+    pools = [ChannelAccountPool(CHANNEL_SECRETS), ChannelAccountPool(CHANNEL_SECRETS)]
+    in_use, leased = set(), []
+
+    async def submit(pool):
+        async with pool.lease() as keypair:
+            assert keypair.public_key not in in_use
+            in_use.add(keypair.public_key)
+            leased.append(keypair.public_key)
+            await asyncio.sleep(0.02)
+            in_use.discard(keypair.public_key)
+
+    async def main():
+        await asyncio.gather(*(submit(pools[index % 2]) for index in range(10)))
+        # As contas voltam livres para o próximo empréstimo
+        return [await pool._acquire() for pool in pools]
+
+    reacquired = asyncio.run(main())
+
+    assert len(leased) == 10
+    assert set(leased) == {Keypair.from_secret(secret).public_key for secret in CHANNEL_SECRETS}
+    assert all(lease is not None for lease in reacquired)
+
+
+def test_abandoned_lease_expires(migrated_database, monkeypatch):
+    from app.services import channelAccountPool
+
+    monkeypatch.setattr(channelAccountPool.settings, "CHANNEL_LEASE_TIMEOUT", 0.05)
+    secrets = [Keypair.random().secret]
+    crashed = channelAccountPool.ChannelAccountPool(secrets)
+    other = channelAccountPool.ChannelAccountPool(secrets)
+
+    async def main():
+        abandoned = await crashed._acquire()
+        while_leased = await other._acquire()
+        await asyncio.sleep(0.1)
+        return abandoned, while_leased, await other._acquire()
+
+    abandoned, while_leased, after_expiry = asyncio.run(main())
+
+    assert abandoned is not None
+    assert while_leased is None
+    assert after_expiry[0].public_key == abandoned[0].public_key
+
+
+def test_lease_held_past_its_timeout_is_renewed(migrated_database, monkeypatch):
+    from app.services import channelAccountPool
+
+    monkeypatch.setattr(channelAccountPool.settings, "CHANNEL_LEASE_TIMEOUT", 0.15)
+    secrets = [Keypair.random().secret]
+    submitting = channelAccountPool.ChannelAccountPool(secrets)
+    other = channelAccountPool.ChannelAccountPool(secrets)
+
+    async def main():
+        attempts = []
+        async with submitting.lease():
+            # Envio lento: várias vezes o timeout do empréstimo
+            for _ in range(5):
+                await asyncio.sleep(0.1)
+                attempts.append(await other._acquire())
+        return attempts, await other._acquire()
+
+    while_submitting, after_release = asyncio.run(main())
+
+    assert while_submitting == [None] * 5
+    assert after_release is not None
@@ -0,0 +1,165 @@
+"""
+Ingestão das operações do emissor a partir de um stream gravado.
+
+Os registros são os servidos por app.workers.horizon_replay para a conta
+emissora, na mesma ordem e com o mesmo filtro.
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+from app.models import database_models
+from app.services.chainMirrorService import ChainMirrorService
+from app.services.ingestionService import LedgerIngestionService
+from app.workers import horizon_replay
+from sqlalchemy import delete, select
+from stellar_sdk import Keypair
+
+ISSUER = Keypair.random()
+OTHER_ISSUER = Keypair.random().public_key
+FIRST, SECOND = Keypair.random().public_key, Keypair.random().public_key
+
+
+class FakeStellarService:
+    issuer_keypair = ISSUER
+
+
+def operation(paging_token, transaction_hash, type, account, asset_code, issuer=None):
+    issuer = issuer or ISSUER.public_key
+    record = {
+        "id": paging_token,
+        "paging_token": paging_token,
+        "transaction_successful": True,
+        "source_account": issuer,
+        "type": type,
+        "created_at": "2026-03-01T12:00:00Z",
+        "transaction_hash": transaction_hash,
+        "asset_type": "credit_alphanum12",
+        "asset_code": asset_code,
+        "asset_issuer": issuer,
+        "amount": "1.0000000",
+        "transaction": {"memo": f"cert:{asset_code}"},
+    }
+    if type == "payment":
+        record.update({"from": issuer, "to": account})
+    else:
+        record["from"] = account
+    return record
+
+
+RECORDS = [
+    operation("104", "c" * 64, "clawback", FIRST, "VEGAN"),
+    operation("101", "a" * 64, "payment", FIRST, "VEGAN"),
+    operation("102", "b" * 64, "payment", SECOND, "HALAL"),
+    operation("103", "b" * 64, "payment", FIRST, "HALAL"),
+    # Token de outro emissor enviado pelo emissor: ignorado, mas o cursor avança
+    {
+        **operation("105", "d" * 64, "payment", FIRST, "VEGAN", issuer=OTHER_ISSUER),
+        "source_account": ISSUER.public_key,
+    },
+    # Operação que não envolve o emissor: fora do stream da conta
+    operation("106", "e" * 64, "payment", SECOND, "VEGAN", issuer=OTHER_ISSUER),
+]
+
+
+@pytest.fixture
+def recorded_stream(tmp_path, monkeypatch, db):
+    path = tmp_path / "operations.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in RECORDS))
+    monkeypatch.setenv("HORIZON_REPLAY_FILE", str(path))
+    yield [
+        record
+        for record in horizon_replay.load_records()
+        if horizon_replay.involves_account(record, ISSUER.public_key)
+    ]
+
+    db.rollback()
+    for model in (
+        database_models.CertificationTransaction,
+        database_models.RestaurantChainBalance,
+    ):
+        db.execute(delete(model).where(model.stellar_public_key.in_([FIRST, SECOND])))
+    db.execute(
+        delete(database_models.IngestionCursor).where(
+            database_models.IngestionCursor.name == LedgerIngestionService.CURSOR_NAME
+        )
+    )
+    db.commit()
+
+
+def ingest(db, ingestion, records):
+    applied = []
+    for record in records:
+        applied.append(ingestion.apply_operation(db, record))
+        db.commit()
+    return applied
+
+
+def test_replaying_the_stream_twice_is_idempotent(db, recorded_stream):
+    stellar = FakeStellarService()
+    chain_mirror = ChainMirrorService(stellar)
+    ingestion = LedgerIngestionService(stellar, chain_mirror)
+
+    # A rota de aprovação já registrou a primeira emissão, ainda sem paging token
+    chain_mirror.record_operation(
+        db,
+        transaction_hash="a" * 64,
+        operation_type="payment",
+        source_account=ISSUER.public_key,
+        public_key=FIRST,
+        asset_code="VEGAN",
+        asset_issuer=ISSUER.public_key,
+        amount=Decimal("1"),
+    )
+    db.commit()
+
+    # O replay é servido em ordem de paging token
+    assert [record["paging_token"] for record in recorded_stream] == [
+        "101",
+        "102",
+        "103",
+        "104",
+        "105",
+    ]
+    assert ingest(db, ingestion, recorded_stream) == [False, True, True, True, False]
+    # Reinício com o cursor perdido: todo o stream é reaplicado
+    assert ingest(db, ingestion, recorded_stream) == [False] * 5
+
+    assert ingestion.load_cursor(db) == "105"
+    balances = {
+        (row.stellar_public_key, row.asset_code): row.balance
+        for row in db.scalars(
+            select(database_models.RestaurantChainBalance).where(
+                database_models.RestaurantChainBalance.stellar_public_key.in_(
+                    [FIRST, SECOND]
+                )
+            )
+        )
+    }
+    assert balances == {
+        (FIRST, "VEGAN"): Decimal("0"),
+        (FIRST, "HALAL"): Decimal("1"),
+        (SECOND, "HALAL"): Decimal("1"),
+    }
+
+    transactions = db.execute(
+        select(
+            database_models.CertificationTransaction.paging_token,
+            database_models.CertificationTransaction.memo,
+        )
+        .where(
+            database_models.CertificationTransaction.stellar_public_key.in_(
+                [FIRST, SECOND]
+            )
+        )
+        .order_by(database_models.CertificationTransaction.paging_token)
+    ).all()
+    # Uma linha por operação; a emissão local foi confirmada com o paging token
+    assert [paging_token for paging_token, _ in transactions] == [
+        "101",
+        "102",
+        "103",
+        "104",
+    ]
+    assert transactions[0].memo == "cert:VEGAN"
@@ -0,0 +1,213 @@
+"""
+Número de statements SQL por página nas rotas de listagem.
+
+Cada rota deve executar uma quantidade fixa de queries, independente do
+tamanho da página (sem N+1 ao montar certificações, restaurantes ou totais).
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from app.models import database_models
+from app.models.schemas import CertificationStatus, CurrentUser
+
+RESTAURANTS = 30
+USERS = 30
+AUDITORS = 6
+
+
+@pytest.fixture(scope="module", autouse=True)
+def catalogue(migrated_database):
+    """Restaurantes com saldos espelhados, certificações, auditores e usuários"""
+    from app.database import SessionLocal
+
+    created_at = datetime(2026, 1, 1)
+    db = SessionLocal()
+    try:
+        for index in range(RESTAURANTS):
+            public_key = f"GRESTAURANT{index:045d}"
+            restaurant = database_models.Restaurant(
+                name=f"Restaurante {index}",
+                address=f"Rua das Flores, {index}",
+                stellar_public_key=public_key,
+                created_at=created_at + timedelta(minutes=index),
+            )
+            db.add(restaurant)
+            db.flush()
+
+            for asset_code in ("VEGAN", "HALAL"):
+                db.add(
+                    database_models.RestaurantChainBalance(
+                        stellar_public_key=public_key,
+                        asset_code=asset_code,
+                        asset_issuer="G" + "I" * 55,
+                        balance=Decimal("1"),
+                        synced_at=created_at,
+                    )
+                )
+            for cert_type in ("vegan", "halal"):
+                certification = database_models.Certification(
+                    restaurant_id=restaurant.id,
+                    certification_type=cert_type,
+                    products=["prato"],
+                    status=CertificationStatus.APPROVED,
+                    issued_at=created_at,
+                    expires_at=created_at + timedelta(days=3650),
+                    created_at=created_at,
+                )
+                db.add(certification)
+                db.flush()
+                db.add(
+                    database_models.RestaurantActiveCertification(
+                        restaurant_id=restaurant.id,
+                        certification_type=cert_type,
+                        certification_id=certification.id,
+                    )
+                )
+            db.add(
+                database_models.Certification(
+                    restaurant_id=restaurant.id,
+                    certification_type="kosher",
+                    products=["prato"],
+                    status=CertificationStatus.PENDING,
+                    created_at=created_at,
+                )
+            )
+
+        for index in range(AUDITORS):
+            db.add(
+                database_models.Auditor(
+                    name=f"Auditor {index}",
+                    email=f"auditor{index}@example.com",
+                    specializations=["vegan", "kosher"],
+                    stellar_public_key=f"GAUDITOR{index:048d}",
+                    is_active=True,
+                )
+            )
+
+        for index in range(USERS):
+            db.add(
+                database_models.User(
+                    name=f"Usuário {index}",
+                    email=f"user{index}@example.com",
+                    password_hash="x",
+                    stellar_public_key=f"GUSER{index:051d}",
+                    created_at=created_at + timedelta(minutes=index),
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def authenticated(client):
+    """Dispensa o token nas rotas de usuários"""
+    from app.main import app
+    from app.routes.user import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=1,
+        name="Teste",
+        email="teste@example.com",
+        stellar_public_key="G" + "T" * 55,
+        created_at=datetime(2026, 1, 1),
+    )
+    yield client
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def fetch_page(client, count_statements, url, params):
+    with count_statements() as statements:
+        response = client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    return response.json(), statements
+
+
+@pytest.mark.parametrize(
+    "url, params, expected_statements",
+    [
+        # COUNT, página, saldos espelhados
+        ("/api/restaurant/list", {}, 3),
+        # página (keyset), saldos espelhados
+        ("/api/restaurant/list/cursor", {}, 2),
+        # COUNT (SQLite não tem estimativa), página, saldos espelhados
+        ("/api/restaurant/list/cursor", {"include_total": True}, 3),
+        # COUNT, página pelo índice de certificações, saldos espelhados
+        (
+            "/api/restaurant/search/by-certification",
+            {"certifications": ["vegan", "HALAL"]},
+            3,
+        ),
+    ],
+)
+@pytest.mark.parametrize("size", [5, 25])
+def test_restaurant_pages_use_fixed_statements(
+    client, count_statements, url, params, expected_statements, size
+):
+    body, statements = fetch_page(client, count_statements, url, {**params, "size": size})
+
+    assert len(body["items"]) == size
+    assert all(len(item["certifications"]) == 2 for item in body["items"])
+    assert len(statements) == expected_statements, statements.statements
+
+
+def test_search_by_unknown_certification_returns_empty_page(client, count_statements):
+    body, statements = fetch_page(
+        client,
+        count_statements,
+        "/api/restaurant/search/by-certification",
+        {"certifications": ["inexistente"], "size": 5},
+    )
+
+    assert body == {"items": [], "total": 0, "page": 1, "size": 5, "pages": 0}
+    assert len(statements) == 0, statements.statements
+
+
+@pytest.mark.parametrize("limit", [5, 25])
+def test_restaurant_search_uses_fixed_statements(client, count_statements, limit):
+    body, statements = fetch_page(
+        client, count_statements, "/api/restaurant/search", {"q": "Restaurante", "limit": limit}
+    )
+
+    assert len(body["data"]["results"]) == limit
+    # busca ranqueada e saldos espelhados
+    assert len(statements) == 2, statements.statements
+
+
+def test_pending_certifications_load_restaurants_in_one_statement(client, count_statements):
+    body, statements = fetch_page(client, count_statements, "/api/certification/pending", {})
+
+    certifications = body["data"]["certifications"]
+    assert len(certifications) == RESTAURANTS
+    assert all(item["restaurant"]["name"] for item in certifications)
+    assert len(statements) == 1, statements.statements
+
+
+def test_auditor_list_uses_one_statement(client, count_statements):
+    body, statements = fetch_page(
+        client, count_statements, "/api/auditor/list", {"specialization": "kosher"}
+    )
+
+    assert len(body["data"]["auditors"]) == AUDITORS
+    assert len(statements) == 1, statements.statements
+
+
+@pytest.mark.parametrize(
+    "url, params, expected_statements",
+    [
+        ("/api/user/list", {}, 2),
+        ("/api/user/list/cursor", {}, 1),
+    ],
+)
+@pytest.mark.parametrize("size", [5, 25])
+def test_user_pages_use_fixed_statements(
+    authenticated, count_statements, url, params, expected_statements, size
+):
+    body, statements = fetch_page(
+        authenticated, count_statements, url, {**params, "size": size}
+    )
+
+    assert len(body["items"]) == size
+    assert len(statements) == expected_statements, statements.statements
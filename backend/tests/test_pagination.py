@@ -0,0 +1,85 @@
+"""
+Paginação por cursor em (created_at, id).
+
+A migração a7d3e5c1f209 preenche created_at nulo nas tabelas paginadas e
+passa a exigi-lo, para que toda linha possa virar cursor.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from alembic import command
+from app.models import database_models
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_paginate
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 1, 12, 30, 15, 250000)
+
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("não é um cursor")
+
+
+def test_rows_without_created_at_are_backfilled_and_paginated(alembic_config, tmp_path):
+    database_file = tmp_path / "pagination.db"
+    engine = create_engine(f"sqlite:///{database_file}")
+    # Formato em que o SQLAlchemy grava DateTime no SQLite
+    earliest = "2025-06-01 00:00:00.000000"
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        command.upgrade(alembic_config, "f2c8d5a3b916")
+
+        connection.execute(
+            text(
+                "INSERT INTO restaurants (id, name, address, stellar_public_key, created_at) "
+                "VALUES (1, 'R1', 'Rua A', 'G1', NULL), (2, 'R2', 'Rua B', 'G2', :later), "
+                "(3, 'R3', 'Rua C', 'G3', :earliest), (4, 'R4', 'Rua D', 'G4', NULL)"
+            ),
+            {"earliest": earliest, "later": "2025-07-01 00:00:00.000000"},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO users (id, name, email, password_hash, stellar_public_key) "
+                "VALUES (1, 'U1', 'u1@example.com', 'x', 'GU1')"
+            )
+        )
+
+        command.upgrade(alembic_config, "a7d3e5c1f209")
+
+        restaurants = dict(
+            connection.execute(text("SELECT id, created_at FROM restaurants")).all()
+        )
+        user_created_at = connection.scalar(text("SELECT created_at FROM users"))
+        with pytest.raises(IntegrityError):
+            connection.execute(
+                text(
+                    "INSERT INTO restaurants (name, address, stellar_public_key, created_at) "
+                    "VALUES ('R5', 'Rua E', 'G5', NULL)"
+                )
+            )
+    engine.dispose()
+
+    # Sem datas conhecidas recebem a mais antiga da tabela
+    assert restaurants[1] == restaurants[4] == restaurants[3] == earliest
+    assert user_created_at is not None
+
+    async def all_pages():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_file}")
+        ids, cursor = [], None
+        async with AsyncSession(async_engine) as db:
+            while True:
+                page, cursor = await keyset_paginate(
+                    db, select(database_models.Restaurant), database_models.Restaurant, cursor, 1
+                )
+                ids.extend(restaurant.id for restaurant in page)
+                if cursor is None:
+                    break
+        await async_engine.dispose()
+        return ids
+
+    assert asyncio.run(all_pages()) == [1, 3, 4, 2]
@@ -0,0 +1,55 @@
+"""
+Cache de usuários autenticados: invalidação durante a consulta ao banco.
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.routes.user import get_current_user, invalidate_principal, principal_cache
+from app.utils.security import create_access_token
+
+USER_ID = 987654
+
+
+class UpdatedDuringLoad:
+    """Sessão cujo usuário é atualizado (e invalidado) enquanto é carregado"""
+
+    def __init__(self, invalidate: bool):
+        self.invalidate = invalidate
+
+    async def get(self, model, user_id):
+        user = SimpleNamespace(
+            id=user_id,
+            name="Antes da atualização",
+            email="principal@example.com",
+            stellar_public_key="G" + "P" * 55,
+            created_at=datetime(2026, 1, 1),
+            token_version=0,
+        )
+        if self.invalidate:
+            invalidate_principal(user_id, 0)
+        return user
+
+
+def current_user(db):
+    token = create_access_token({"sub": str(USER_ID), "ver": 0})
+    return asyncio.run(get_current_user(token=token, db=db))
+
+
+def test_principal_is_cached_after_the_load():
+    principal_cache.invalidate((USER_ID, 0))
+
+    principal = current_user(UpdatedDuringLoad(invalidate=False))
+
+    assert principal_cache.get((USER_ID, 0)) == principal
+
+
+def test_invalidation_during_the_load_is_not_overwritten():
+    principal_cache.invalidate((USER_ID, 0))
+
+    principal = current_user(UpdatedDuringLoad(invalidate=True))
+
+    # A requisição atual usa o que leu, mas o cache não guarda o valor antigo
+    assert principal.name == "Antes da atualização"
+    assert principal_cache.get((USER_ID, 0)) is None
@@ -0,0 +1,80 @@
+"""
+Cadastro de restaurantes e usuários com carteira cifrada no banco.
+"""
+
+import pytest
+from app.models import database_models
+from app.models.schemas import WalletJobStatus
+from app.utils.security import decrypt_secret
+from sqlalchemy import delete, select
+
+
+@pytest.fixture
+def registered(db):
+    """Chaves públicas cadastradas no teste; entidades e jobs removidos ao final"""
+    public_keys = []
+    yield public_keys
+
+    db.rollback()
+    for model in (
+        database_models.WalletJob,
+        database_models.Restaurant,
+        database_models.User,
+    ):
+        db.execute(delete(model).where(model.stellar_public_key.in_(public_keys)))
+    db.commit()
+
+
+def wallet_job(db, public_key):
+    return db.scalar(
+        select(database_models.WalletJob).where(
+            database_models.WalletJob.stellar_public_key == public_key
+        )
+    )
+
+
+def test_restaurant_registration_stores_the_encrypted_wallet_key(client, db, registered):
+    response = client.post(
+        "/api/restaurant/register",
+        json={"name": "Restaurante Cadastro", "address": "Rua das Palmeiras, 10"},
+    )
+
+    wallet = response.json()["data"]["wallet"]
+    registered.append(wallet["public_key"])
+    assert response.status_code == 202, response.text
+
+    job = wallet_job(db, wallet["public_key"])
+    assert job.status == WalletJobStatus.PENDING
+    assert job.secret_key != wallet["secret_key"]
+    assert decrypt_secret(job.secret_key) == wallet["secret_key"]
+
+
+def test_user_registration_stores_the_encrypted_wallet_key(client, db, registered):
+    response = client.post(
+        "/api/user/register",
+        json={"name": "Usuária", "email": "cadastro@example.com", "password": "senha-segura"},
+    )
+
+    public_key = response.json()["data"]["wallet"]["public_key"]
+    registered.append(public_key)
+    assert response.status_code == 202, response.text
+
+    job = wallet_job(db, public_key)
+    assert job.status == WalletJobStatus.PENDING
+    assert decrypt_secret(job.secret_key).startswith("S")
+
+
+def test_startup_fails_without_wallet_encryption_key(monkeypatch):
+    from app.main import app
+    from app.utils import security
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(security.settings, "WALLET_ENCRYPTION_KEY", "")
+    security._get_fernet.cache_clear()
+    try:
+        with pytest.raises(ValueError, match="WALLET_ENCRYPTION_KEY"):
+            with TestClient(app):
+                pass
+    finally:
+        monkeypatch.undo()
+        security._get_fernet.cache_clear()
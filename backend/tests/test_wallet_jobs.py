@@ -0,0 +1,88 @@
+"""
+Provisionamento de carteiras: do cadastro ao job concluído pelo worker.
+"""
+
+import asyncio
+
+import pytest
+from app.config import CERTIFICATION_ASSETS
+from app.models import database_models
+from app.models.schemas import WalletJobStatus
+from app.services.walletProvisioningService import WalletProvisioningWorker
+from sqlalchemy import delete, select
+from stellar_sdk import Keypair
+
+
+class FakeStellarService:
+    """Friendbot e trustlines aceitos sem consultar o Horizon"""
+
+    def __init__(self):
+        self.issuer_keypair = Keypair.random()
+        self.funded = []
+        self.trustline_secrets = []
+
+    async def get_account_info(self, public_key, use_cache=True):
+        return None
+
+    async def create_test_account(self, public_key):
+        self.funded.append(public_key)
+        return True
+
+    async def setup_all_trustlines(self, secret_key):
+        self.trustline_secrets.append(secret_key)
+        return {"success": True, "trustlines": list(CERTIFICATION_ASSETS.values())}
+
+
+@pytest.fixture
+def registered(db):
+    public_keys = []
+    yield public_keys
+
+    db.rollback()
+    for model in (
+        database_models.RestaurantChainBalance,
+        database_models.WalletJob,
+        database_models.Restaurant,
+    ):
+        db.execute(delete(model).where(model.stellar_public_key.in_(public_keys)))
+    db.commit()
+
+
+def test_worker_provisions_the_wallet_of_a_new_restaurant(client, db, registered):
+    response = client.post(
+        "/api/restaurant/register",
+        json={"name": "Restaurante Worker", "address": "Rua das Acácias, 20"},
+    )
+    wallet = response.json()["data"]["wallet"]
+    registered.append(wallet["public_key"])
+    job_id = response.json()["data"]["job"]["job_id"]
+    assert response.status_code == 202, response.text
+
+    stellar = FakeStellarService()
+
+    async def run_until_done():
+        worker = WalletProvisioningWorker(stellar, workers=1)
+        await worker.start()
+        try:
+            for _ in range(100):
+                status = client.get(f"/api/jobs/{job_id}").json()["data"]["status"]
+                if status == WalletJobStatus.SUCCEEDED:
+                    return status
+                await asyncio.sleep(0.05)
+            return status
+        finally:
+            await worker.stop()
+
+    assert asyncio.run(run_until_done()) == WalletJobStatus.SUCCEEDED
+    assert stellar.funded == [wallet["public_key"]]
+    assert stellar.trustline_secrets == [wallet["secret_key"]]
+
+    db.expire_all()
+    job = db.get(database_models.WalletJob, job_id)
+    assert job.secret_key is None
+    balances = db.scalars(
+        select(database_models.RestaurantChainBalance.asset_code).where(
+            database_models.RestaurantChainBalance.stellar_public_key == wallet["public_key"]
+        )
+    ).all()
+    assert sorted(balances) == sorted(CERTIFICATION_ASSETS.values())